@@ -18,12 +18,38 @@ from src.log_utils import setup_logging
 
 logger = setup_logging()
 
-from colorama import init as colorama_init
 
-colorama_init()
+def _enable_windows_vt_mode() -> bool:
+    """
+    尝试为 Windows 控制台开启原生 ANSI 转义序列支持 (Windows 10+)。
 
-from src.notify_config import load_notify_config, get_notify_config
-from src.executors import SHIELD_AVAILABLE
+    Returns:
+        True 如果控制台已支持或成功开启虚拟终端处理
+    """
+    try:
+        import ctypes
+        from ctypes import wintypes
+
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.GetStdHandle(-11)  # STD_OUTPUT_HANDLE
+        mode = wintypes.DWORD()
+        if not kernel32.GetConsoleMode(handle, ctypes.byref(mode)):
+            return False
+        enable_vt = 0x0004  # ENABLE_VIRTUAL_TERMINAL_PROCESSING
+        if mode.value & enable_vt:
+            return True
+        return bool(kernel32.SetConsoleMode(handle, mode.value | enable_vt))
+    except Exception:
+        return False
+
+
+# 仅 Windows 控制台需要 ANSI 转换；GUI 任务输出由 TaskRunner 重定向并自行解析颜色码，
+# 无控制台或非 Windows 时跳过，避免为 stdout/stderr 套上逐次写入过滤的包装器。
+# Windows 10+ 控制台可直接开启原生 ANSI 支持，仅在不支持时才回退到 colorama 的转换包装
+if sys.platform == "win32" and sys.stdout is not None and sys.stdout.isatty():
+    if not _enable_windows_vt_mode():
+        from colorama import init as colorama_init
+        colorama_init()
 
 
 def main():
@@ -31,8 +57,13 @@ def main():
     from PyQt6.QtWidgets import QApplication
     from src.ui.theme import get_stylesheet
     from src.ui.main_window import MainWindow
+    from src.notify_config import load_notify_config, get_notify_config
+    from src.executors.shield_executor import SHIELD_AVAILABLE
+    from src.core import prefetch_encoder_capabilities
 
     load_notify_config()
+    # 后台预先探测编码器列表，首次压制时无需同步等待
+    prefetch_encoder_capabilities()
 
     app = QApplication(sys.argv)
     app.setStyleSheet(get_stylesheet())
@@ -3,14 +3,44 @@
 批量序列重命名模块：按规则批量重命名图片和视频文件。
 """
 import os
-import re
 import shutil
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Tuple
-from collections import defaultdict
+from functools import lru_cache
+from itertools import groupby
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 
 from colorama import Fore, Style
 
+# 文件夹名中不允许出现在文件名里的字符 -> 替换为下划线的转换表
+_ILLEGAL_CHARS_TABLE = str.maketrans(dict.fromkeys('\\/:*?"<>|', "_"))
+
+# 文件操作并发数: 重命名/移动多为元数据操作，可大量并发；
+# 复制受磁盘带宽限制，并发过多反而导致机械硬盘频繁寻道
+RENAME_MAX_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+COPY_MAX_WORKERS = 5
+
+# Windows 复制模式的读写缓冲区大小: shutil 在 Windows 上以 1 MiB 分块读写，
+# 视频文件较大，放大缓冲区以减少系统调用次数
+# (Linux/macOS 上 shutil 直接走 sendfile/fcopyfile，不需要)
+COPY_BUFFER_SIZE = 4 * 1024 * 1024
+
+# 按大小排序时文件数超过该阈值才并发 stat (网络盘每次 stat 都是一次往返)；
+# 文件较少时线程池开销反而更大
+PARALLEL_STAT_THRESHOLD = 500
+STAT_MAX_WORKERS = 32
+
+# 进度行每累计多少条合并输出一次 (重命名单条很快，逐行写终端反而成为瓶颈)
+LOG_FLUSH_LINES = 256
+
+# 模式 -> 操作名称
+_OP_NAMES = {
+    "rename_in_place": "重命名",
+    "copy_rename": "复制",
+    "move_rename": "移动",
+}
+
 
 @dataclass
 class RenameConfig:
@@ -57,89 +87,131 @@ def get_file_size(file_path: str) -> int:
         return 0
 
 
-def _collect_files(
+def _entry_size(entry: os.DirEntry) -> int:
+    """获取目录项的文件大小 (字节)，复用 DirEntry 缓存的 stat 结果。"""
+    try:
+        return entry.stat().st_size
+    except OSError:
+        return 0
+
+
+def _entry_sizes(entries: List[os.DirEntry]) -> List[int]:
+    """批量获取目录项的文件大小，数量较多时使用线程池并发 stat。"""
+    if len(entries) <= PARALLEL_STAT_THRESHOLD:
+        return [_entry_size(e) for e in entries]
+    with ThreadPoolExecutor(max_workers=STAT_MAX_WORKERS) as pool:
+        return list(pool.map(_entry_size, entries))
+
+
+def _collect_entries(
     directory: str,
-    extensions: List[str],
+    ext_tags: Dict[str, str],
     recursive: bool = True,
-) -> List[str]:
+) -> List[Tuple[os.DirEntry, str]]:
     """
-    收集目录中符合扩展名条件的文件列表 (不排序)。
+    收集目录中符合扩展名条件的文件目录项 (不排序)，同时附带扩展名对应的标签。
 
     Args:
         directory: 目录路径
-        extensions: 扩展名列表 (不含点号)
+        ext_tags: {扩展名 (小写，无点号): 标签}，如扩展名到媒体类型的映射
         recursive: 是否递归
 
     Returns:
-        文件路径列表
+        (os.DirEntry, 标签) 列表 (可直接复用 DirEntry 缓存的 stat 结果)
     """
-    files = []
-    extensions = set(normalize_extensions(extensions))
-
-    if recursive:
-        for root, _, filenames in os.walk(directory):
-            for filename in filenames:
-                ext = os.path.splitext(filename)[1].lower().lstrip(".")
-                if ext in extensions:
-                    files.append(os.path.join(root, filename))
-    else:
-        for filename in os.listdir(directory):
-            filepath = os.path.join(directory, filename)
-            if os.path.isfile(filepath):
-                ext = os.path.splitext(filename)[1].lower().lstrip(".")
-                if ext in extensions:
-                    files.append(filepath)
+    entries = []
+
+    # 基于 os.scandir 的迭代遍历，顺序与 os.walk 自顶向下一致；
+    # 先按文件名过滤扩展名，不匹配的条目不做 stat
+    stack = [directory]
+    while stack:
+        current = stack.pop()
+        subdirs = []
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        if recursive:
+                            subdirs.append(entry.path)
+                        continue
+                    tag = ext_tags.get(os.path.splitext(entry.name)[1][1:].lower())
+                    if tag is not None and entry.is_file():
+                        entries.append((entry, tag))
+        except OSError:
+            continue
+        stack.extend(reversed(subdirs))
 
-    return files
+    return entries
 
 
-def get_sorted_files(
-    directory: str,
-    extensions: List[str],
-    recursive: bool = True,
+def _sort_entries(
+    entries: List[Tuple[os.DirEntry, str]],
     sort_method: str = "name",
     sort_order: str = "asc",
     priority_keyword: str = "",
-) -> List[str]:
+) -> List[Tuple[os.DirEntry, str]]:
     """
-    获取排序后的文件列表，支持按名称/大小排序、升降序和关键词提前。
+    按名称/大小排序目录项，支持升降序和关键词提前。
 
     Args:
-        directory: 目录路径
-        extensions: 扩展名列表 (不含点号)
-        recursive: 是否递归
+        entries: _collect_entries 的返回值
         sort_method: 排序方式 ("name" 或 "size")
         sort_order: 排序方向 ("asc" 或 "desc")
         priority_keyword: 关键词提前排序 (文件名包含该关键词的优先)
 
     Returns:
-        排序后的文件路径列表
+        排序后的 (os.DirEntry, 标签) 列表
     """
-    files = _collect_files(directory, extensions, recursive)
-
-    # 确定排序键
+    # 确定排序键 (按大小排序时复用遍历得到的 stat，不再逐个 getsize)
     reverse = (sort_order == "desc")
     if sort_method == "size":
-        sort_key = get_file_size
+        sizes = _entry_sizes([e for e, _ in entries])
+        order = sorted(range(len(entries)), key=sizes.__getitem__, reverse=reverse)
+        entries = [entries[i] for i in order]
     else:
         # 按文件名排序 (不含路径，忽略大小写)
-        sort_key = lambda f: os.path.basename(f).lower()
-
-    files.sort(key=sort_key, reverse=reverse)
+        entries = sorted(entries, key=lambda item: item[0].name.lower(), reverse=reverse)
 
     # 关键词提前排序
     if priority_keyword and priority_keyword.strip():
         keyword = priority_keyword.strip()
         priority = []
         normal = []
-        for f in files:
-            if keyword in os.path.basename(f):
-                priority.append(f)
+        for item in entries:
+            if keyword in item[0].name:
+                priority.append(item)
             else:
-                normal.append(f)
-        files = priority + normal
+                normal.append(item)
+        entries = priority + normal
+
+    return entries
+
+
+def get_sorted_files(
+    directory: str,
+    extensions: List[str],
+    recursive: bool = True,
+    sort_method: str = "name",
+    sort_order: str = "asc",
+    priority_keyword: str = "",
+) -> List[str]:
+    """
+    获取排序后的文件列表，支持按名称/大小排序、升降序和关键词提前。
+
+    Args:
+        directory: 目录路径
+        extensions: 扩展名列表 (不含点号)
+        recursive: 是否递归
+        sort_method: 排序方式 ("name" 或 "size")
+        sort_order: 排序方向 ("asc" 或 "desc")
+        priority_keyword: 关键词提前排序 (文件名包含该关键词的优先)
 
-    return files
+    Returns:
+        排序后的文件路径列表
+    """
+    entries = _collect_entries(directory, dict.fromkeys(normalize_extensions(extensions), ""), recursive)
+    entries = _sort_entries(entries, sort_method, sort_order, priority_keyword)
+    return [entry.path for entry, _ in entries]
 
 
 # 保留兼容性别名
@@ -183,8 +255,21 @@ def process_parent_folder_name(
     """
     # 获取相对路径
     rel_path = os.path.relpath(file_path, base_dir)
-    dir_path = os.path.dirname(rel_path)
+    return _folder_prefix(os.path.dirname(rel_path), exclude_underscore)
 
+
+@lru_cache(maxsize=4096)
+def _folder_prefix(dir_path: str, exclude_underscore: bool) -> str:
+    """
+    根据相对目录生成文件夹前缀 (同一目录下的文件共享结果)。
+
+    Args:
+        dir_path: 相对于基础目录的目录路径
+        exclude_underscore: 是否排除下划线后的文字
+
+    Returns:
+        文件夹前缀字符串
+    """
     if not dir_path or dir_path == ".":
         return ""
 
@@ -193,11 +278,11 @@ def process_parent_folder_name(
     
     processed_parts = []
     for part in parts:
-        if exclude_underscore and "_" in part:
-            # 取第一个下划线之前的部分
-            part = part.split("_", 1)[0]
+        if exclude_underscore:
+            # 取第一个下划线之前的部分 (无下划线时为整个名称)
+            part = part.partition("_")[0]
         # 清理非法字符
-        part = re.sub(r'[\\/:*?"<>|]', "_", part)
+        part = part.translate(_ILLEGAL_CHARS_TABLE)
         part = part.strip("_")
         if part:
             processed_parts.append(part)
@@ -219,15 +304,170 @@ def determine_media_type(file_path: str, config: RenameConfig) -> Optional[str]:
         "图片", "视频", 或 None
     """
     ext = os.path.splitext(file_path)[1].lower().lstrip(".")
-    
-    image_exts = set(normalize_extensions(config.image_extensions))
-    video_exts = set(normalize_extensions(config.video_extensions))
+    return _media_type_map(config).get(ext)
+
 
-    if config.target_type in ("images", "both") and ext in image_exts:
-        return "图片"
-    if config.target_type in ("videos", "both") and ext in video_exts:
-        return "视频"
-    return None
+def _media_type_map(config: RenameConfig) -> Dict[str, str]:
+    """
+    获取 扩展名 -> 媒体类型 的映射 (按配置内容缓存，逐文件调用也无需重复标准化扩展名)。
+
+    Args:
+        config: 重命名配置
+
+    Returns:
+        {扩展名 (小写，无点号): "图片" / "视频"}，同时属于两类时图片优先
+    """
+    return _build_media_type_map(
+        config.target_type, tuple(config.image_extensions), tuple(config.video_extensions),
+    )
+
+
+@lru_cache(maxsize=32)
+def _build_media_type_map(
+    target_type: str,
+    image_extensions: Tuple[str, ...],
+    video_extensions: Tuple[str, ...],
+) -> Dict[str, str]:
+    """构建扩展名到媒体类型的映射 (结果被缓存共享，调用方不得修改)。"""
+    mapping: Dict[str, str] = {}
+    if target_type in ("videos", "both"):
+        mapping.update(dict.fromkeys(normalize_extensions(video_extensions), "视频"))
+    if target_type in ("images", "both"):
+        mapping.update(dict.fromkeys(normalize_extensions(image_extensions), "图片"))
+    return mapping
+
+
+def _path_key(path: str) -> str:
+    """路径比较键 (兼容大小写不敏感的文件系统)。"""
+    return os.path.normcase(os.path.normpath(path))
+
+
+def _group_key(item: Tuple[str, str, str, str]) -> Tuple[str, str]:
+    """(相对目录, 媒体类型, 文件路径, 相对路径) -> 分组键 (相对目录, 媒体类型)。"""
+    return item[0], item[1]
+
+
+def _copy_file(file_path: str, new_path: str) -> None:
+    """复制文件并保留元数据 (同 shutil.copy2)；Windows 上使用更大的读写缓冲区。"""
+    if sys.platform != "win32":
+        shutil.copy2(file_path, new_path)
+        return
+    with open(file_path, "rb") as fsrc, open(new_path, "wb") as fdst:
+        shutil.copyfileobj(fsrc, fdst, COPY_BUFFER_SIZE)
+    shutil.copystat(file_path, new_path)
+
+
+def _apply_rename_op(mode: str, file_path: str, new_path: str) -> None:
+    """
+    按模式执行单个文件的重命名/复制/移动。
+
+    目标路径已由 _plan_rename_ops 排除冲突，原地重命名使用 os.replace，
+    各平台行为一致 (Windows 上 os.rename 遇到已存在的目标会直接报错)。
+    """
+    if mode == "rename_in_place":
+        os.replace(file_path, new_path)
+    elif mode == "copy_rename":
+        _copy_file(file_path, new_path)
+    else:  # move_rename
+        shutil.move(file_path, new_path)
+
+
+def _plan_rename_ops(
+    grouped_files: Iterable[Tuple[Tuple[str, str], Iterable[Tuple[str, str]]]],
+    input_path: str,
+    output_base: str,
+    config: RenameConfig,
+) -> Tuple[List[Tuple[str, str, str, str]], List[Tuple[str, str, str, str]]]:
+    """
+    生成重命名计划，结果与逐个顺序执行时一致。
+
+    通过模拟文件系统占用情况 (已规划的目标 + 已移走的源文件) 进行冲突检测，
+    并将目标路径恰好是前序操作源文件的操作单独列出，以便在其让出后再执行。
+
+    Args:
+        grouped_files: 按分组产出的 ((相对目录, 媒体类型), (文件路径, 相对路径) 序列)
+        input_path: 输入目录路径
+        output_base: 输出目录
+        config: 重命名配置
+
+    Returns:
+        (可并发执行的操作列表, 需按顺序执行的操作列表)，
+        每项为 (源路径, 目标路径, 源相对路径, 目标相对路径)，相对路径用于日志输出
+    """
+    planned = set()   # 已规划的目标路径
+    released = set()  # 已规划移走的源路径 (复制模式不释放)
+    independent_ops = []
+    chained_ops = []
+
+    existing: Dict[str, Set[str]] = {}  # 目标目录 -> 规划前已存在的文件名 (每个目录只扫描一次)
+
+    def dir_names(dir_path: str) -> Set[str]:
+        dir_key = _path_key(dir_path)
+        names = existing.get(dir_key)
+        if names is None:
+            try:
+                with os.scandir(dir_path) as it:
+                    names = {os.path.normcase(entry.name) for entry in it}
+            except OSError:
+                names = set()
+            existing[dir_key] = names
+        return names
+
+    def taken(path: str) -> bool:
+        key = _path_key(path)
+        if key in planned:
+            return True
+        if key in released:
+            return False
+        dir_path, name = os.path.split(path)
+        return os.path.normcase(name) in dir_names(dir_path)
+
+    for (rel_dir, media_type), file_list in grouped_files:
+        # 同组文件位于同一目录，前缀只需计算一次
+        if config.recursive and rel_dir:
+            prefix = _folder_prefix(rel_dir, config.exclude_underscore)
+        else:
+            prefix = ""
+
+        # 确定输出目录 (同组共用)
+        if config.mode == "rename_in_place":
+            # 原地重命名：在原目录
+            target_dir = os.path.join(input_path, rel_dir) if rel_dir else input_path
+        elif rel_dir:
+            # 复制/移动：保持目录结构
+            target_dir = os.path.join(output_base, rel_dir)
+        else:
+            target_dir = output_base
+
+        # 每个分组独立编号
+        for idx, (file_path, rel_src) in enumerate(file_list, 1):
+            ext = os.path.splitext(file_path)[1]
+            
+            # 生成新文件名
+            new_name = f"{prefix}{media_type}_{idx}{ext}"
+            new_path = os.path.join(target_dir, new_name)
+
+            # 避免覆盖
+            src_key = _path_key(file_path)
+            if taken(new_path) and src_key != _path_key(new_path):
+                base, ext = os.path.splitext(new_path)
+                counter = 1
+                while taken(new_path):
+                    new_path = f"{base}_{counter}{ext}"
+                    counter += 1
+
+            dst_key = _path_key(new_path)
+            op = (file_path, new_path, rel_src, os.path.join(rel_dir, os.path.basename(new_path)))
+            if dst_key in released and dst_key != src_key:
+                chained_ops.append(op)
+            else:
+                independent_ops.append(op)
+
+            planned.add(dst_key)
+            if config.mode != "copy_rename" and dst_key != src_key:
+                released.add(src_key)
+
+    return independent_ops, chained_ops
 
 
 def batch_rename(
@@ -259,26 +499,19 @@ def batch_rename(
     if not os.path.isdir(input_path):
         return 0, 1, [f"输入路径不是有效目录: {input_path}"]
 
-    # 获取所有扩展名
-    all_extensions = []
-    if config.target_type in ("images", "both"):
-        all_extensions.extend(config.image_extensions)
-    if config.target_type in ("videos", "both"):
-        all_extensions.extend(config.video_extensions)
-
-    # 获取所有符合条件的文件 (按配置排序)
-    files = get_sorted_files(
-        input_path, all_extensions, config.recursive,
+    # 获取所有符合条件的文件 (按配置排序)，遍历时即按扩展名确定媒体类型
+    media_files = _sort_entries(
+        _collect_entries(input_path, _media_type_map(config), config.recursive),
         sort_method=config.sort_method,
         sort_order=config.sort_order,
         priority_keyword=config.priority_keyword,
     )
 
-    if not files:
+    if not media_files:
         print(f"{Fore.YELLOW}[提示] 未找到符合条件的文件{Style.RESET_ALL}")
         return 0, 0, []
 
-    print(f"找到 {len(files)} 个文件")
+    print(f"找到 {len(media_files)} 个文件")
     print("-" * 50)
 
     # 确定输出目录
@@ -291,84 +524,82 @@ def batch_rename(
             output_base = os.path.join(input_path, "rename_output")
         os.makedirs(output_base, exist_ok=True)
 
-    # 按 (相对目录, 媒体类型) 分组并计数
-    # 键: (相对目录路径, 媒体类型) -> 文件列表
-    grouped_files: Dict[Tuple[str, str], List[str]] = defaultdict(list)
-
-    for file_path in files:
-        media_type = determine_media_type(file_path, config)
-        if not media_type:
-            continue
-
+    # 按 (相对目录, 媒体类型) 分组并计数:
+    # 稳定排序保持组内的排序结果，groupby 逐组产出，无需为每组单独建列表
+    # 相对路径每个文件只计算一次，分组与日志输出共用
+    keyed_files = []
+    for entry, media_type in media_files:
         if config.recursive:
-            rel_dir = os.path.dirname(os.path.relpath(file_path, input_path))
+            rel_src = os.path.relpath(entry.path, input_path)
+            rel_dir = os.path.dirname(rel_src)
         else:
+            rel_src = entry.name
             rel_dir = ""
+        keyed_files.append((rel_dir, media_type, entry.path, rel_src))
+    del media_files
+
+    keyed_files.sort(key=_group_key)
+    grouped_files = (
+        (key, ((item[2], item[3]) for item in group))
+        for key, group in groupby(keyed_files, key=_group_key)
+    )
 
-        key = (rel_dir, media_type)
-        grouped_files[key].append(file_path)
+    # 串行生成完整操作计划 (含冲突处理)，并发阶段只执行文件系统调用
+    independent_ops, chained_ops = _plan_rename_ops(grouped_files, input_path, output_base, config)
 
     success_count = 0
     fail_count = 0
     errors = []
+    op_label = f"{Fore.GREEN}[{_OP_NAMES[config.mode]}]{Style.RESET_ALL}"
+    pending_lines = []
+
+    def flush_lines() -> None:
+        if pending_lines:
+            print("\n".join(pending_lines), flush=True)
+            pending_lines.clear()
+
+    def report(op: Tuple[str, str, str, str], error: Optional[Exception]) -> None:
+        nonlocal success_count, fail_count
+        file_path, _, rel_src, rel_dst = op
+        if error is None:
+            pending_lines.append(f"{op_label} {rel_src} -> {rel_dst}")
+            success_count += 1
+        else:
+            pending_lines.append(f"{Fore.RED}[失败]{Style.RESET_ALL} {os.path.basename(file_path)}: {error}")
+            fail_count += 1
+            errors.append(f"{os.path.basename(file_path)}: {str(error)}")
+        if len(pending_lines) >= LOG_FLUSH_LINES:
+            flush_lines()
 
-    # 处理每个分组
-    for (rel_dir, media_type), file_list in grouped_files.items():
-        # 每个分组独立编号
-        for idx, file_path in enumerate(file_list, 1):
-            ext = os.path.splitext(file_path)[1]
-            
-            # 生成新文件名
-            if config.recursive and rel_dir:
-                prefix = process_parent_folder_name(
-                    file_path, input_path, config.exclude_underscore
-                )
-                new_name = f"{prefix}{media_type}_{idx}{ext}"
-            else:
-                new_name = f"{media_type}_{idx}{ext}"
-
-            # 确定输出路径
-            if config.mode == "rename_in_place":
-                # 原地重命名：在原目录
-                new_path = os.path.join(os.path.dirname(file_path), new_name)
-            else:
-                # 复制/移动：保持目录结构
-                if rel_dir:
-                    target_dir = os.path.join(output_base, rel_dir)
-                    os.makedirs(target_dir, exist_ok=True)
-                    new_path = os.path.join(target_dir, new_name)
-                else:
-                    new_path = os.path.join(output_base, new_name)
-
-            # 避免覆盖
-            if os.path.exists(new_path) and os.path.normpath(file_path) != os.path.normpath(new_path):
-                base, ext = os.path.splitext(new_path)
-                counter = 1
-                while os.path.exists(new_path):
-                    new_path = f"{base}_{counter}{ext}"
-                    counter += 1
-
-            try:
-                if config.mode == "rename_in_place":
-                    os.rename(file_path, new_path)
-                    op = "重命名"
-                elif config.mode == "copy_rename":
-                    shutil.copy2(file_path, new_path)
-                    op = "复制"
-                else:  # move_rename
-                    shutil.move(file_path, new_path)
-                    op = "移动"
-
-                rel_src = os.path.relpath(file_path, input_path)
-                rel_dst = os.path.relpath(new_path, output_base if config.mode != "rename_in_place" else input_path)
-                print(f"{Fore.GREEN}[{op}]{Style.RESET_ALL} {rel_src} -> {rel_dst}")
-                success_count += 1
-
-            except Exception as e:
-                print(f"{Fore.RED}[失败]{Style.RESET_ALL} {os.path.basename(file_path)}: {e}")
-                fail_count += 1
-                errors.append(f"{os.path.basename(file_path)}: {str(e)}")
-
+    # 复制/移动模式: 执行前创建保持目录结构所需的子目录 (规划阶段不产生副作用)
+    if config.mode != "rename_in_place":
+        for target_dir in {os.path.dirname(op[1]) for op in (*independent_ops, *chained_ops)}:
+            os.makedirs(target_dir, exist_ok=True)
+
+    # 目标路径互不依赖的操作并发执行
+    if independent_ops:
+        max_workers = COPY_MAX_WORKERS if config.mode == "copy_rename" else RENAME_MAX_WORKERS
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(independent_ops))) as pool:
+            futures = {
+                pool.submit(_apply_rename_op, config.mode, op[0], op[1]): op
+                for op in independent_ops
+            }
+            for future in as_completed(futures):
+                report(futures[future], future.exception())
+
+    # 目标路径是前序操作腾出的原文件名，需等其让出后按顺序执行
+    for op in chained_ops:
+        file_path, new_path = op[0], op[1]
+        try:
+            if os.path.exists(new_path):
+                # 前序操作失败，目标仍被占用 (必须检查，否则 os.replace 会覆盖该文件)
+                raise FileExistsError(f"目标文件已存在: {os.path.basename(new_path)}")
+            _apply_rename_op(config.mode, file_path, new_path)
+            report(op, None)
+        except Exception as e:
+            report(op, e)
+
+    flush_lines()
     print("-" * 50)
     print(f"完成: 成功 {success_count} 个, 失败 {fail_count} 个")
 
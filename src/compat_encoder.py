@@ -13,19 +13,36 @@ Windows 系统字体、字重等兼容性问题。
 """
 import os
 import subprocess
+import sys
 import tempfile
 import shutil
+from functools import lru_cache
 from typing import Optional, List, Tuple
 
 from colorama import Fore, Style
 
-from .utils import get_base_dir, get_internal_dir, get_ffmpeg_path
+from .utils import (
+    get_base_dir, get_internal_dir, get_ffmpeg_path, iter_output_text, SUBPROCESS_FLAGS,
+    split_args, format_command, parse_resolution,
+)
 from .presets import ENCODERS
+from .core import rate_control_args
 
 import logging
 logger = logging.getLogger(__name__)
 
 
+# AVS 脚本模板 (路径均为正斜杠格式)
+_AVS_TEMPLATE = """# XiaoXue Toolbox - Compat Mode AVS Script
+LoadPlugin("{lsmash}")
+LoadPlugin("{vsfilter}")
+LWLibavVideoSource("{video}", cache=False)
+TextSub("{subtitle}")
+ConvertToYV12()
+"""
+
+
+@lru_cache(maxsize=1)
 def get_bin_dir() -> str:
     """
     获取 bin 目录的绝对路径。
@@ -50,12 +67,12 @@ def generate_avs_script(
     video_path: str,
     subtitle_path: str,
     output_avs_path: str,
-) -> Tuple[str, str]:
+) -> Tuple[str, Optional[str]]:
     """
     生成 AviSynth 脚本文件。
     
     为避免 VSFilter TextSub 无法处理中文路径的问题，
-    将字幕文件复制到临时目录使用 ASCII 文件名。
+    字幕路径含非 ASCII 字符时将字幕文件复制到临时目录使用 ASCII 文件名。
     
     Args:
         video_path: 输入视频的绝对路径
@@ -63,51 +80,67 @@ def generate_avs_script(
         output_avs_path: 输出 .avs 脚本的路径
         
     Returns:
-        (avs_path, temp_subtitle_path) - AVS 文件路径和临时字幕文件路径
+        (avs_path, temp_subtitle_path) - AVS 文件路径和临时字幕文件路径 (未复制字幕时为 None)
     """
     bin_dir = get_bin_dir()
     temp_dir = tempfile.gettempdir()
     
-    # 诊断日志: 打印 bin 目录信息
+    # 诊断日志: 打印 bin 目录信息 (单次遍历目录，复用目录项缓存的文件信息)
+    try:
+        with os.scandir(bin_dir) as it:
+            bin_entries = {os.path.normcase(entry.name): entry for entry in it}
+        bin_dir_exists = True
+    except OSError:
+        bin_entries = {}
+        bin_dir_exists = False
     print(f"{Fore.CYAN}[诊断] bin 目录路径: {bin_dir}{Style.RESET_ALL}")
-    print(f"[诊断] bin 目录是否存在: {os.path.isdir(bin_dir)}")
+    print(f"[诊断] bin 目录是否存在: {bin_dir_exists}")
     
     # 检查关键 DLL 文件
     dlls = ["AviSynth.dll", "LSMASHSource.dll", "VSFilter.dll"]
     for dll in dlls:
         dll_path = os.path.join(bin_dir, dll)
-        exists = os.path.isfile(dll_path)
-        size = os.path.getsize(dll_path) if exists else 0
+        entry = bin_entries.get(os.path.normcase(dll))
+        exists = entry is not None and entry.is_file()
+        size = entry.stat().st_size if exists else 0
         print(f"[诊断] {dll}: 存在={exists}, 大小={size} bytes, 路径={dll_path}")
     
-    # 将字幕文件复制到临时目录，使用 ASCII 文件名
-    subtitle_ext = os.path.splitext(subtitle_path)[1]
-    temp_subtitle = os.path.join(temp_dir, f"xiaoxue_temp_sub{subtitle_ext}")
-    shutil.copy2(subtitle_path, temp_subtitle)
-    logger.info(f"复制字幕到临时目录: {temp_subtitle}")
+    # 字幕路径含非 ASCII 字符时复制到临时目录，使用 ASCII 文件名；
+    # 纯 ASCII 路径可直接被 AviSynth 读取，无需复制
+    subtitle_abs = os.path.abspath(subtitle_path)
+    if subtitle_abs.isascii() and '"' not in subtitle_abs:
+        temp_subtitle = None
+        subtitle_source = subtitle_abs
+    else:
+        subtitle_ext = os.path.splitext(subtitle_path)[1]
+        temp_subtitle = os.path.join(temp_dir, f"xiaoxue_temp_sub{subtitle_ext}")
+        # 仅需内容，copyfile 走平台快速复制路径且不额外复制元数据
+        shutil.copyfile(subtitle_path, temp_subtitle)
+        logger.info(f"复制字幕到临时目录: {temp_subtitle}")
+        subtitle_source = temp_subtitle
     
     # 将所有路径转换为正斜杠格式 (AviSynth 要求)
     lsmash_dll = os.path.join(bin_dir, "LSMASHSource.dll").replace("\\", "/")
     vsfilter_dll = os.path.join(bin_dir, "VSFilter.dll").replace("\\", "/")
     video_avs_path = os.path.abspath(video_path).replace("\\", "/")
-    subtitle_avs_path = temp_subtitle.replace("\\", "/")
+    subtitle_avs_path = subtitle_source.replace("\\", "/")
     
     # 诊断日志: 打印 AVS 脚本中使用的路径
     print(f"[诊断] AVS 中 LSMASHSource.dll 路径: {lsmash_dll}")
     print(f"[诊断] AVS 中 VSFilter.dll 路径: {vsfilter_dll}")
     
     # AVS 脚本内容
-    avs_content = f'''# XiaoXue Toolbox - Compat Mode AVS Script
-LoadPlugin("{lsmash_dll}")
-LoadPlugin("{vsfilter_dll}")
-LWLibavVideoSource("{video_avs_path}", cache=False)
-TextSub("{subtitle_avs_path}")
-ConvertToYV12()
-'''
-    
-    # 使用不带 BOM 的 UTF-8 编码 (FFmpeg AviSynth 模块不支持 BOM)
-    with open(output_avs_path, 'w', encoding='utf-8') as f:
-        f.write(avs_content)
+    avs_content = _AVS_TEMPLATE.format(
+        lsmash=lsmash_dll,
+        vsfilter=vsfilter_dll,
+        video=video_avs_path,
+        subtitle=subtitle_avs_path,
+    )
+    
+    # 使用不带 BOM 的 UTF-8 编码 (FFmpeg AviSynth 模块不支持 BOM)；
+    # 二进制写入，各平台统一使用 LF 换行
+    with open(output_avs_path, 'wb') as f:
+        f.write(avs_content.encode('utf-8'))
     
     logger.info(f"生成 AVS 脚本: {output_avs_path}")
     return output_avs_path, temp_subtitle
@@ -127,6 +160,7 @@ def build_compat_encode_command(
     audio_bitrate: str = "192k",
     extra_args: Optional[str] = None,
     rc_mode: Optional[str] = None,
+    threads: Optional[int] = None,
 ) -> List[str]:
     """
     构建兼容模式的 FFmpeg 编码命令。
@@ -149,6 +183,8 @@ def build_compat_encode_command(
         audio_bitrate: 音频码率
         extra_args: 额外 FFmpeg 参数
         rc_mode: 码率控制模式
+        threads: 编码线程数上限 (None 时由 FFmpeg 自动决定；
+            多个编码并行时限制单进程线程数，避免过度占用 CPU)
         
     Returns:
         FFmpeg 命令列表
@@ -166,12 +202,9 @@ def build_compat_encode_command(
     
     # 视频滤镜 (仅分辨率缩放，字幕已由 AVS 处理)
     vf_filters = []
-    if resolution and isinstance(resolution, str) and "x" in resolution:
-        try:
-            w, h = resolution.split("x")
-            vf_filters.append(f"scale={w}:{h}")
-        except ValueError:
-            pass
+    size = parse_resolution(resolution) if isinstance(resolution, str) else None
+    if size:
+        vf_filters.append(f"scale={size[0]}:{size[1]}")
     
     if vf_filters:
         cmd.extend(["-vf", ",".join(vf_filters)])
@@ -180,34 +213,16 @@ def build_compat_encode_command(
     actual_encoder = ENCODERS.get(encoder, encoder) if encoder else "libx264"
     cmd.extend(["-c:v", actual_encoder])
     
+    extra_tokens = split_args(extra_args) if extra_args else []
+
+    # 线程数上限 (额外参数中已指定时不覆盖)
+    if threads and "-threads" not in extra_tokens:
+        cmd.extend(["-threads", str(threads)])
+    
     # 编码参数 - 复用 core.py 的逻辑
     if actual_encoder != "copy":
-        is_nvenc = "nvenc" in actual_encoder
-        is_qsv = "qsv" in actual_encoder
-        is_amf = "amf" in actual_encoder
-        
         # 码率控制
-        if rc_mode == "vbr" and bitrate:
-            cmd.extend(["-b:v", bitrate])
-            if is_nvenc:
-                cmd.extend(["-rc", "vbr"])
-            cmd.extend(["-maxrate", bitrate, "-bufsize", bitrate])
-        elif rc_mode == "cbr" and bitrate:
-            cmd.extend(["-b:v", bitrate])
-            if is_nvenc:
-                cmd.extend(["-rc", "cbr"])
-            cmd.extend(["-minrate", bitrate, "-maxrate", bitrate, "-bufsize", bitrate])
-        elif bitrate:
-            cmd.extend(["-b:v", bitrate])
-        elif crf is not None:
-            if is_nvenc:
-                cmd.extend(["-cq", str(crf)])
-            elif is_qsv:
-                cmd.extend(["-global_quality", str(crf)])
-            elif is_amf:
-                cmd.extend(["-qp_i", str(crf), "-qp_p", str(crf)])
-            else:
-                cmd.extend(["-crf", str(crf)])
+        cmd.extend(rate_control_args(actual_encoder, crf, bitrate, rc_mode))
         
         # 速度预设
         if speed_preset:
@@ -223,8 +238,7 @@ def build_compat_encode_command(
         cmd.extend(["-b:a", audio_bitrate])
     
     # 额外参数
-    if extra_args:
-        cmd.extend(extra_args.split())
+    cmd.extend(extra_tokens)
     
     cmd.append(output_path)
     return cmd
@@ -245,6 +259,8 @@ def run_compat_encode(
     extra_args: Optional[str] = None,
     rc_mode: Optional[str] = None,
     dry_run: bool = False,
+    passthrough_output: Optional[bool] = None,
+    threads: Optional[int] = None,
 ) -> int:
     """
     执行兼容模式字幕压制的完整流程。
@@ -264,6 +280,9 @@ def run_compat_encode(
         extra_args: 额外 FFmpeg 参数
         rc_mode: 码率控制模式
         dry_run: 仅打印命令，不执行
+        passthrough_output: FFmpeg 直接输出到终端而不经管道转发；
+            默认在 stdout 为终端时启用 (GUI 重定向输出时仍走管道)
+        threads: FFmpeg 编码线程数上限 (None 时由 FFmpeg 自动决定)
         
     Returns:
         进程返回码 (0 表示成功)
@@ -295,9 +314,10 @@ def run_compat_encode(
             audio_bitrate=audio_bitrate,
             extra_args=extra_args,
             rc_mode=rc_mode,
+            threads=threads,
         )
         
-        cmd_str = " ".join(cmd)
+        cmd_str = format_command(cmd)
         logger.info(f"Compat mode command: {cmd_str}")
         
         print(f"{Fore.CYAN}[小雪工具箱] 执行命令:{Style.RESET_ALL}", flush=True)
@@ -316,27 +336,28 @@ def run_compat_encode(
         env = os.environ.copy()
         env["PATH"] = bin_dir + os.pathsep + env.get("PATH", "")
         
-        process = subprocess.Popen(
-            cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            universal_newlines=True,
-            encoding='utf-8',
-            errors='replace',
-            bufsize=1,
-            env=env,  # 使用修改后的环境变量
-            creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0,
-        )
-        
-        # 实时读取输出
-        while True:
-            line = process.stdout.readline()
-            if not line and process.poll() is not None:
-                break
-            if line:
-                print(line, end='', flush=True)
-        
-        process.wait()
+        if passthrough_output is None:
+            passthrough_output = _stdout_is_terminal()
+
+        if passthrough_output:
+            # 直接继承终端输出，无需 Python 逐块转发
+            process = subprocess.run(cmd, env=env, check=False)
+        else:
+            process = subprocess.Popen(
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                bufsize=0,  # 无缓冲，直接按块读取原始字节
+                env=env,  # 使用修改后的环境变量
+                creationflags=SUBPROCESS_FLAGS,
+            )
+
+            # 实时读取输出 (FFmpeg 进度行以 \r 结尾，按块读取可立即显示)
+            with process.stdout:
+                for text in iter_output_text(process.stdout.fileno()):
+                    print(text, end='', flush=True)
+
+            process.wait()
         
         if process.returncode == 0:
             print(f"\n{Fore.GREEN}[成功] 兼容模式压制完成!{Style.RESET_ALL}", flush=True)
@@ -356,6 +377,14 @@ def run_compat_encode(
         cleanup_temp_files(avs_script, input_path, temp_subtitle)
 
 
+def _stdout_is_terminal() -> bool:
+    """判断当前 sys.stdout 是否为真实终端 (GUI 重定向或无控制台时为 False)。"""
+    try:
+        return sys.stdout is not None and sys.stdout.isatty()
+    except (AttributeError, ValueError):
+        return False
+
+
 def cleanup_temp_files(avs_path: str, video_path: str, temp_subtitle: str = None) -> None:
     """
     清理兼容模式产生的临时文件。
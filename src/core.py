@@ -2,20 +2,51 @@
 """
 FFmpeg 核心调用模块：构建命令行并执行。
 """
+import io
+import json
+import queue
+import re
 import subprocess
+import threading
 import os
+import sys
+import glob
 import tempfile
-from typing import Optional, List, Tuple
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Iterable, Optional, List, Tuple
 
 from colorama import Fore, Style
 
-from .utils import get_ffmpeg_path, escape_path_for_ffmpeg
-from .presets import QUALITY_PRESETS, ENCODERS
+from .utils import (
+    get_base_dir, get_ffmpeg_path, escape_path_for_ffmpeg, iter_output_text, SUBPROCESS_FLAGS,
+    split_args, format_command, parse_resolution, escape_path_for_param_list,
+)
+from .presets import PRESET_ENCODE_DEFAULTS, ENCODERS
 
 # 初始化 Logger
 import logging
 logger = logging.getLogger(__name__)
 
+# 进度回调队列容量 (回调跟不上时丢弃最旧的行)
+PROGRESS_QUEUE_SIZE = 2048
+
+# 失败时用于硬件编码器错误分析的输出行数 (保留末尾)
+ERROR_SCAN_LINES = 200
+
+# 结构化进度输出参数: 以 key=value 行输出进度块 (以 progress=continue/end 结尾)，
+# 并关闭人类可读的统计行
+PROGRESS_ARGS = ["-progress", "pipe:1", "-nostats"]
+
+# 统计行中的 key=value 项 (如 "frame=  123 fps= 25 q=28.0 time=00:00:05.00 speed=1.2x")
+_STATS_RE = re.compile(r"(\w+)=\s*(\S+)")
+
+# FFmpeg 编码器列表缓存文件 (按 FFmpeg 可执行文件的路径/大小/修改时间失效)
+FFMPEG_CAPS_FILE = os.path.join(get_base_dir(), "ffmpeg_caps.json")
+
 
 def _build_stream_map_args(
     stream_type: str,
@@ -63,6 +94,143 @@ def _build_stream_map_args(
     return args
 
 
+def _build_video_filters(
+    subtitle_path: Optional[str],
+    resolution: Optional[str],
+    fps: Optional[int] = None,
+    use_cuda: bool = False,
+) -> List[str]:
+    """
+    构建单条视频滤镜链 (帧率 -> 缩放 -> 字幕)。
+
+    先降帧再缩放可减少需要处理的帧数，字幕最后叠加在缩放后的画面上，
+    整条链在一个 -vf 中由 FFmpeg 逐帧一次处理完成。
+
+    Args:
+        subtitle_path: 字幕文件路径 (烧录字幕，可选)。
+        resolution: 分辨率 (如 "1920x1080")。
+        fps: 帧率 (以 fps 滤镜实现，代替输出端 -r)。
+        use_cuda: 使用 scale_cuda (GPU 全流程)。
+
+    Returns:
+        滤镜列表，为空表示无需 -vf。
+    """
+    vf_filters = []
+    if fps:
+        vf_filters.append(f"fps={fps}")
+    size = parse_resolution(resolution) if isinstance(resolution, str) else None
+    if size:  # 无效分辨率格式时跳过
+        scale_filter = "scale_cuda" if use_cuda else "scale"
+        vf_filters.append(f"{scale_filter}={size[0]}:{size[1]}")
+    if subtitle_path:
+        escaped_sub = escape_path_for_ffmpeg(subtitle_path)
+        vf_filters.append(f"subtitles={escaped_sub}")
+    return vf_filters
+
+
+def _apply_thread_args(
+    cmd: List[str],
+    actual_encoder: str,
+    cpu_filters: bool,
+    extra_tokens: List[str],
+    threads: Optional[int] = None,
+) -> None:
+    """
+    添加线程策略参数: 指定线程数时作为编码线程上限，否则 CPU 编码器显式使用自动线程数；
+    CPU 滤镜链按核心数并行 (用户或预设的额外参数中已指定时不覆盖)。
+
+    Args:
+        cmd: 命令列表 (原地修改，-filter_threads 作为全局参数插入到 -y 之后)。
+        actual_encoder: 实际编码器名称。
+        cpu_filters: 是否存在 CPU 滤镜链。
+        extra_tokens: 额外参数拆分后的列表。
+        threads: 编码线程数上限 (None/0 为自动)。
+    """
+    if actual_encoder != "copy" and "-threads" not in extra_tokens:
+        if threads:
+            cmd.extend(["-threads", str(threads)])
+        elif actual_encoder in ("libx264", "libx265"):
+            cmd.extend(["-threads", "0"])
+    if cpu_filters and "-filter_threads" not in extra_tokens:
+        cmd[2:2] = ["-filter_threads", str(os.cpu_count() or 1)]
+
+
+# 编码器家族 -> 恒定质量参数名 (CRF/CQ 值填入每个参数)
+_QUALITY_FLAGS = {
+    "nvenc": ("-cq",),
+    "qsv": ("-global_quality",),
+    "amf": ("-qp_i", "-qp_p"),
+    "cpu": ("-crf",),
+}
+
+# (编码器家族, 码率控制模式) -> 编码器专属的码率控制参数 (未列出的组合不需要)
+_RC_FLAGS = {
+    ("nvenc", "2pass"): ("-rc", "vbr_hq", "-2pass", "1"),
+    ("amf", "2pass"): ("-rc", "vbr_peak", "-2pass", "1"),
+    ("nvenc", "vbr"): ("-rc", "vbr"),
+    ("amf", "vbr"): ("-rc", "vbr_peak"),
+    ("nvenc", "cbr"): ("-rc", "cbr"),
+    ("amf", "cbr"): ("-rc", "cbr"),
+}
+
+# 码率控制模式 -> 以目标码率为值的限速参数
+_RATE_LIMIT_FLAGS = {
+    "2pass": ("-maxrate", "-bufsize"),
+    "vbr": ("-maxrate", "-bufsize"),
+    "cbr": ("-minrate", "-maxrate", "-bufsize"),
+}
+
+# 在编码器内部完成多遍分析的家族 (2pass 时不需要限速参数)
+_INTERNAL_MULTIPASS = frozenset({"nvenc", "amf"})
+
+
+# 编码器名称后缀 -> 家族 (FFmpeg 硬件编码器统一以 _nvenc/_qsv/_amf 结尾，如 av1_nvenc)
+_FAMILY_SUFFIXES = (("_nvenc", "nvenc"), ("_qsv", "qsv"), ("_amf", "amf"))
+
+
+@lru_cache(maxsize=None)
+def encoder_family(encoder: str) -> str:
+    """根据编码器名称判断家族: nvenc / qsv / amf / cpu (结果按名称缓存)。"""
+    for suffix, family in _FAMILY_SUFFIXES:
+        if encoder.endswith(suffix):
+            return family
+    return "cpu"
+
+
+def rate_control_args(
+    encoder: str, crf: Optional[int], bitrate: Optional[str], rc_mode: Optional[str]
+) -> List[str]:
+    """
+    构建码率控制参数 - 根据编码器类型查表适配。
+
+    指定码率时使用码率 (附加编码器专属参数与限速参数)，否则使用 CRF/CQ 恒定质量。
+
+    Args:
+        encoder: 实际编码器名称 (非 copy)。
+        crf: CRF/CQ 值。
+        bitrate: 视频码率 (优先于 CRF)。
+        rc_mode: 码率控制模式 (2pass/vbr/cbr，其他值为恒定质量模式)。
+
+    Returns:
+        FFmpeg 参数列表。
+    """
+    family = encoder_family(encoder)
+    if bitrate:
+        args = ["-b:v", bitrate, *_RC_FLAGS.get((family, rc_mode), ())]
+        limit_flags = _RATE_LIMIT_FLAGS.get(rc_mode, ())
+        if rc_mode == "2pass" and family in _INTERNAL_MULTIPASS:
+            limit_flags = ()
+        for flag in limit_flags:
+            args.extend([flag, bitrate])
+        return args
+    if crf is not None:
+        args = []
+        for flag in _QUALITY_FLAGS[family]:
+            args.extend([flag, str(crf)])
+        return args
+    return []
+
+
 def build_encode_command(
     input_path: str,
     output_path: str,
@@ -82,6 +250,9 @@ def build_encode_command(
     audio_tracks_custom: str = "",
     subtitle_tracks: str = "none",
     subtitle_tracks_custom: str = "",
+    hw_decode: bool = False,
+    progress: bool = False,
+    threads: Optional[int] = None,
 ) -> List[str]:
     """
     构建视频编码 FFmpeg 命令。
@@ -105,6 +276,10 @@ def build_encode_command(
         audio_tracks_custom: 自定义音轨编号 (逗号分隔，如 "0,2")。
         subtitle_tracks: 字幕选择模式 ("all"/"none"/"custom"/数字)。
         subtitle_tracks_custom: 自定义字幕编号 (逗号分隔)。
+        hw_decode: NVENC 编码时启用 CUDA 硬件解码 + scale_cuda 缩放
+            (烧录字幕时 subtitles 滤镜需要 CPU 帧，自动回退)。
+        progress: 输出结构化进度 (-progress pipe:1)，配合 make_progress_parser 使用。
+        threads: 编码线程数上限 (None/0 为自动)。
 
     Returns:
         FFmpeg 命令列表。
@@ -124,140 +299,58 @@ def build_encode_command(
     cmd.extend(subtitle_map_args)
 
     # 如果使用预设, 加载预设参数
-    if preset_name and preset_name in QUALITY_PRESETS and preset_name != "自定义 (Custom)":
-        preset = QUALITY_PRESETS[preset_name]
-        encoder = encoder or preset.get("encoder")
+    preset = PRESET_ENCODE_DEFAULTS.get(preset_name) if preset_name else None
+    if preset:
+        encoder = encoder or preset["encoder"]
         
         # 修复: 正确读取 cq 值 (如果预设中有 cq，则覆盖 crf)
-        if "cq" in preset and preset["cq"] is not None:
+        if preset["cq"] is not None:
             crf = preset["cq"]
         else:
-            crf = crf if crf is not None else preset.get("crf")
+            crf = crf if crf is not None else preset["crf"]
             
-        speed_preset = speed_preset or preset.get("preset")
-        resolution = resolution or preset.get("resolution")
-        fps = fps if fps is not None else preset.get("fps")
-        audio_bitrate = audio_bitrate or preset.get("audio_bitrate", "192k")
+        speed_preset = speed_preset or preset["speed_preset"]
+        resolution = resolution or preset["resolution"]
+        fps = fps if fps is not None else preset["fps"]
+        audio_bitrate = audio_bitrate or preset["audio_bitrate"]
         
         # 支持预设中的额外参数
-        if preset.get("extra_args"):
-            preset_extra = preset.get("extra_args")
+        if preset["extra_args"]:
             if extra_args:
-                extra_args = f"{preset_extra} {extra_args}"
+                extra_args = f"{preset['extra_args']} {extra_args}"
             else:
-                extra_args = preset_extra
+                extra_args = preset["extra_args"]
 
-    # 视频滤镜链
-    vf_filters = []
-    if subtitle_path:
-        escaped_sub = escape_path_for_ffmpeg(subtitle_path)
-        vf_filters.append(f"subtitles='{escaped_sub}'")
-    if resolution and isinstance(resolution, str) and "x" in resolution:
-        try:
-            w, h = resolution.split("x")
-            vf_filters.append(f"scale={w}:{h}")
-        except ValueError:
-            pass  # 无效分辨率格式，跳过
+    # 视频编码器
+    actual_encoder = ENCODERS.get(encoder, encoder) if encoder else "libx264"
+
+    # GPU 全流程: 解码、缩放、编码均在显卡上完成
+    use_cuda = hw_decode and encoder_family(actual_encoder) == "nvenc" and not subtitle_path
+    if use_cuda:
+        cmd[2:2] = ["-hwaccel", "cuda", "-hwaccel_output_format", "cuda"]
+
+    # 视频滤镜链 (流复制时无法应用滤镜，帧率仍交给 -r)
+    filter_fps = fps if actual_encoder != "copy" else None
+    vf_filters = _build_video_filters(subtitle_path, resolution, filter_fps, use_cuda)
 
     if vf_filters:
         cmd.extend(["-vf", ",".join(vf_filters)])
 
-    # 视频编码器
-    actual_encoder = ENCODERS.get(encoder, encoder) if encoder else "libx264"
     cmd.extend(["-c:v", actual_encoder])
 
+    extra_tokens = split_args(extra_args) if extra_args else []
+    _apply_thread_args(cmd, actual_encoder, bool(vf_filters) and not use_cuda, extra_tokens, threads)
+
     # 编码参数 - 根据编码器类型自动适配
     if actual_encoder != "copy":
-        # 识别编码器类型
-        is_nvenc = "nvenc" in actual_encoder
-        is_qsv = "qsv" in actual_encoder
-        is_amf = "amf" in actual_encoder
-        is_cpu = actual_encoder in ("libx264", "libx265")
-        
-        # 处理码率控制模式
-        if rc_mode == "2pass":
-            # 2-Pass 编码逻辑 (当前简化为 VBR 高质量模式)
-            # 注意: 真正的 2-pass 需要运行两次 ffmpeg，这里用高质量 VBR 替代
-            if bitrate:
-                cmd.extend(["-b:v", bitrate])
-                if is_nvenc:
-                    cmd.extend(["-rc", "vbr_hq", "-2pass", "1"])
-                elif is_amf:
-                    cmd.extend(["-rc", "vbr_peak", "-2pass", "1"])
-                else:
-                    # CPU 编码器使用 VBR 高质量
-                    cmd.extend(["-maxrate", bitrate, "-bufsize", bitrate])
-            elif crf is not None:
-                # 没有码率时回退到 CRF/CQ 模式
-                if is_nvenc:
-                    cmd.extend(["-cq", str(crf)])
-                elif is_qsv:
-                    cmd.extend(["-global_quality", str(crf)])
-                else:
-                    cmd.extend(["-crf", str(crf)])
-                    
-        elif rc_mode == "vbr":
-            # VBR 可变码率模式
-            if bitrate:
-                cmd.extend(["-b:v", bitrate])
-                if is_nvenc:
-                    cmd.extend(["-rc", "vbr"])
-                elif is_amf:
-                    cmd.extend(["-rc", "vbr_peak"])
-                # CPU 编码器默认就是 VBR
-                cmd.extend(["-maxrate", bitrate, "-bufsize", bitrate])
-            elif crf is not None:
-                # 没有码率时回退到 CRF/CQ 模式
-                if is_nvenc:
-                    cmd.extend(["-cq", str(crf)])
-                elif is_qsv:
-                    cmd.extend(["-global_quality", str(crf)])
-                else:
-                    cmd.extend(["-crf", str(crf)])
-                    
-        elif rc_mode == "cbr":
-            # CBR 恒定码率模式
-            if bitrate:
-                cmd.extend(["-b:v", bitrate])
-                if is_nvenc:
-                    cmd.extend(["-rc", "cbr"])
-                elif is_amf:
-                    cmd.extend(["-rc", "cbr"])
-                # CPU 编码器通过 minrate=maxrate=bitrate 实现 CBR
-                cmd.extend(["-minrate", bitrate, "-maxrate", bitrate, "-bufsize", bitrate])
-            elif crf is not None:
-                # CBR 必须有码率，回退到 CRF
-                if is_nvenc:
-                    cmd.extend(["-cq", str(crf)])
-                elif is_qsv:
-                    cmd.extend(["-global_quality", str(crf)])
-                else:
-                    cmd.extend(["-crf", str(crf)])
-                    
-        else:
-            # 默认 CRF/CQ 恒定质量模式
-            if bitrate:
-                # 如果指定了码率，优先使用码率
-                cmd.extend(["-b:v", bitrate])
-            elif crf is not None:
-                # 根据编码器类型选择正确的参数
-                if is_nvenc:
-                    cmd.extend(["-cq", str(crf)])
-                elif is_qsv:
-                    cmd.extend(["-global_quality", str(crf)])
-                elif is_amf:
-                    # AMF 使用 qp_i/qp_p/qp_b
-                    cmd.extend(["-qp_i", str(crf), "-qp_p", str(crf)])
-                else:
-                    # CPU 编码器 (libx264/libx265)
-                    cmd.extend(["-crf", str(crf)])
+        cmd.extend(rate_control_args(actual_encoder, crf, bitrate, rc_mode))
 
         # 速度预设
         if speed_preset:
             cmd.extend(["-preset", speed_preset])
 
-    # 帧率
-    if fps:
+    # 帧率 (编码时已并入滤镜链)
+    if fps and filter_fps is None:
         cmd.extend(["-r", str(fps)])
 
     # 音频编码 (仅在保留音轨时添加)
@@ -271,13 +364,108 @@ def build_encode_command(
         cmd.extend(["-c:s", "copy"])
 
     # 额外参数
-    if extra_args:
-        cmd.extend(extra_args.split())
+    cmd.extend(extra_tokens)
+
+    if progress:
+        cmd.extend(PROGRESS_ARGS)
 
     cmd.append(output_path)
     return cmd
 
 
+@dataclass
+class OutputSpec:
+    """
+    多路输出中单个输出的编码参数 (配合 build_multi_output_command 使用)。
+    """
+    path: str
+    encoder: str = "libx264"
+    crf: Optional[int] = None
+    bitrate: Optional[str] = None
+    resolution: Optional[str] = None
+    speed_preset: Optional[str] = None
+    rc_mode: Optional[str] = None
+
+
+def build_multi_output_command(
+    input_path: str,
+    outputs: List[OutputSpec],
+    audio_encoder: str = "aac",
+    audio_bitrate: str = "192k",
+    audio_tracks: str = "0",
+    audio_tracks_custom: str = "",
+    progress: bool = False,
+) -> List[str]:
+    """
+    构建单输入多输出的编码命令 (如同一素材的多档码率)。
+
+    输入只解复用、解码一次，解码后的帧分发给各路编码器；
+    需要缩放时通过 -filter_complex 的 split 在解码后分叉，再分别缩放。
+
+    Args:
+        input_path: 输入视频路径。
+        outputs: 各路输出的编码参数。
+        audio_encoder: 音频编码器 (各路相同)。
+        audio_bitrate: 音频码率。
+        audio_tracks: 音轨选择模式 ("all"/"none"/"custom"/数字)。
+        audio_tracks_custom: 自定义音轨编号 (逗号分隔)。
+        progress: 输出结构化进度 (-progress pipe:1)。
+
+    Returns:
+        FFmpeg 命令列表。
+    """
+    ffmpeg = get_ffmpeg_path()
+    cmd = [ffmpeg, "-y"]
+    if progress:
+        cmd.extend(PROGRESS_ARGS)
+    cmd.extend(["-i", input_path])
+
+    specs = [(spec, ENCODERS.get(spec.encoder, spec.encoder)) for spec in outputs]
+    # 各路的缩放滤镜 (流复制无法应用滤镜)
+    scales = [
+        ",".join(_build_video_filters(None, spec.resolution)) if encoder != "copy" else ""
+        for spec, encoder in specs
+    ]
+
+    # 各路视频的映射来源: 无需缩放时直接映射输入流，否则映射滤镜图的输出。
+    # 流复制不能接收滤镜图输出，始终直接映射输入流，只有重新编码的各路参与 split
+    video_sources = ["0:v:0"] * len(specs)
+    if any(scales):
+        encoded = [i for i, (_, encoder) in enumerate(specs) if encoder != "copy"]
+        if len(encoded) > 1:
+            branches = {i: f"[s{i}]" for i in encoded}
+            graph = [f"[0:v:0]split={len(encoded)}{''.join(branches.values())}"]
+        else:
+            branches = {i: "[0:v:0]" for i in encoded}
+            graph = []
+        for i in encoded:
+            if scales[i]:
+                graph.append(f"{branches[i]}{scales[i]}[v{i}]")
+                video_sources[i] = f"[v{i}]"
+            else:
+                video_sources[i] = branches[i]
+        cmd.extend(["-filter_complex", ";".join(graph)])
+
+    audio_map_args = _build_stream_map_args("a", audio_tracks, audio_tracks_custom)
+
+    for (spec, encoder), source in zip(specs, video_sources):
+        cmd.extend(["-map", source])
+        cmd.extend(audio_map_args)
+        cmd.extend(["-c:v", encoder])
+        if encoder != "copy":
+            _apply_thread_args(cmd, encoder, False, [])
+            cmd.extend(rate_control_args(encoder, spec.crf, spec.bitrate, spec.rc_mode))
+            if spec.speed_preset:
+                cmd.extend(["-preset", spec.speed_preset])
+        if audio_tracks != "none":
+            cmd.extend(["-c:a", audio_encoder])
+            if audio_encoder != "copy":
+                cmd.extend(["-b:a", audio_bitrate])
+        cmd.append(spec.path)
+
+    return cmd
+
+
 def build_replace_audio_command(
     video_path: str,
     audio_path: str,
@@ -321,6 +509,8 @@ def build_remux_command(
     audio_tracks_custom: str = "",
     subtitle_tracks: str = "all",
     subtitle_tracks_custom: str = "",
+    input_args: Optional[List[str]] = None,
+    output_args: Optional[List[str]] = None,
 ) -> List[str]:
     """
     构建转封装命令 (不重新编码)。
@@ -332,12 +522,17 @@ def build_remux_command(
         audio_tracks_custom: 自定义音轨编号。
         subtitle_tracks: 字幕选择模式。
         subtitle_tracks_custom: 自定义字幕编号。
+        input_args: 位于 -i 之前的输入参数 (如 -fflags +genpts)。
+        output_args: 位于输出路径之前的输出参数 (如 -movflags +faststart)。
 
     Returns:
         FFmpeg 命令列表。
     """
     ffmpeg = get_ffmpeg_path()
-    cmd = [ffmpeg, "-y", "-i", input_path]
+    cmd = [ffmpeg, "-y"]
+    if input_args:
+        cmd.extend(input_args)
+    cmd.extend(["-i", input_path])
 
     # 映射视频流 (全部)
     cmd.extend(["-map", "0:v"])
@@ -351,6 +546,8 @@ def build_remux_command(
     cmd.extend(subtitle_map_args)
 
     cmd.extend(["-c", "copy"])
+    if output_args:
+        cmd.extend(output_args)
     cmd.append(output_path)
     return cmd
 
@@ -411,7 +608,177 @@ def build_extract_video_command(
     return cmd
 
 
-def run_ffmpeg_command(cmd: List[str], progress_callback=None, dry_run: bool = False) -> int:
+def merge_output_commands(cmds: List[List[str]]) -> List[str]:
+    """
+    将输入相同的多条命令合并为单条多输出命令。
+
+    输入只读取、解复用一次，也只启动一个 FFmpeg 进程；
+    各命令的输出参数与输出路径依次追加在第一条命令之后。
+
+    Args:
+        cmds: 命令列表的列表，输入部分 (直到第一个 -i 及其路径) 必须相同。
+
+    Returns:
+        合并后的命令列表。
+
+    Raises:
+        ValueError: 命令的输入部分不一致。
+    """
+    first = cmds[0]
+    input_end = first.index("-i") + 2
+    merged = list(first)
+    for cmd in cmds[1:]:
+        if cmd[:input_end] != first[:input_end]:
+            raise ValueError(f"命令的输入不一致，无法合并: {format_command(cmd[:input_end])}")
+        merged.extend(cmd[input_end:])
+    return merged
+
+
+def _split_progress_line(line: str) -> Optional[Tuple[str, str]]:
+    """
+    解析 -progress 输出的 key=value 行。
+
+    Args:
+        line: 输出行。
+
+    Returns:
+        (键, 值)，不是进度行时返回 None。
+    """
+    key, sep, value = line.rstrip("\n").partition("=")
+    if not sep or not key.replace("_", "").isalnum() or " " in value:
+        return None
+    return key, value
+
+
+def parse_progress(line: str) -> Optional[Dict[str, str]]:
+    """
+    解析 FFmpeg 统计行 (frame=... fps=... time=... speed=...) 为 {键: 值} 字典。
+
+    所有 key=value 项由同一个预编译正则一次扫描取出，值保留原始文本 (如 "1.2x")。
+
+    Args:
+        line: 输出行。
+
+    Returns:
+        {键: 值} 字典，行中没有 key=value 项时返回 None。
+    """
+    return dict(_STATS_RE.findall(line)) or None
+
+
+def make_progress_parser(callback):
+    """
+    构建解析结构化进度的行回调 (作为 run_ffmpeg_command 的 progress_callback 使用)。
+
+    Args:
+        callback: 每个进度块结束时调用，参数为该块的 {键: 值} 字典
+            (如 frame、out_time_ms、speed、progress)。
+
+    Returns:
+        接收单行输出的回调函数，非进度行被忽略。
+    """
+    block = {}
+
+    def on_line(line: str) -> None:
+        item = _split_progress_line(line)
+        if item is None:
+            return
+        key, value = item
+        block[key] = value
+        if key == "progress":
+            callback(dict(block))
+            block.clear()
+
+    return on_line
+
+
+def _callback_worker(callback_queue: "queue.Queue", callback) -> None:
+    """在独立线程中依次执行进度回调，收到 None 时结束。"""
+    while True:
+        line = callback_queue.get()
+        if line is None:
+            return
+        try:
+            callback(line)
+        except Exception:
+            logger.exception("进度回调执行失败")
+
+
+def _put_drop_oldest(callback_queue: "queue.Queue", line: str) -> None:
+    """放入队列，队列已满时丢弃最旧的一行 (进度行会被后续行取代)。"""
+    while True:
+        try:
+            callback_queue.put_nowait(line)
+            return
+        except queue.Full:
+            try:
+                callback_queue.get_nowait()
+            except queue.Empty:
+                pass
+
+
+def _iter_output_line_batches(fd: int):
+    """
+    按块读取子进程输出并切分为行 (\r 与 \r\n 均视为换行)。
+
+    每次读取一大块再在内存中切分，代替逐行读取管道，减少系统调用次数；
+    同一块中的完整行一起产出，便于调用方合并写入。
+
+    Args:
+        fd: 子进程输出管道的文件描述符
+
+    Yields:
+        以 \n 结尾的输出行列表 (末尾不完整的一行在 EOF 时原样产出)
+    """
+    pending = ""
+    for text in iter_output_text(fd):
+        lines = (pending + text).split("\n")
+        pending = lines.pop()
+        if lines:
+            yield [line + "\n" for line in lines]
+    if pending:
+        yield [pending]
+
+
+def _quiet_command(cmd: List[str]) -> List[str]:
+    """
+    在可执行文件之后插入静默参数 (命令中已有的同名参数不重复添加)。
+
+    Args:
+        cmd: 命令列表
+
+    Returns:
+        新的命令列表
+    """
+    extra = [arg for arg in ("-hide_banner", "-nostats") if arg not in cmd]
+    if "-loglevel" not in cmd and "-v" not in cmd:
+        extra += ["-loglevel", "error"]
+    return [cmd[0], *extra, *cmd[1:]]
+
+
+def _run_quiet(cmd: List[str]) -> Tuple[int, List[str]]:
+    """
+    静默执行 FFmpeg: 不逐行读取统计输出，只在结束后收集错误日志。
+
+    Args:
+        cmd: 命令列表
+
+    Returns:
+        (返回码, 错误日志行列表)
+    """
+    result = subprocess.run(
+        _quiet_command(cmd),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        creationflags=SUBPROCESS_FLAGS,
+    )
+    stderr = result.stderr.decode("utf-8", errors="replace")
+    return result.returncode, stderr.splitlines(keepends=True)
+
+
+def run_ffmpeg_command(
+    cmd: List[str], progress_callback=None, dry_run: bool = False, output=None,
+    quiet: bool = False, fallback=None,
+) -> int:
     """
     执行 FFmpeg 命令，实时打印输出。
 
@@ -419,130 +786,174 @@ def run_ffmpeg_command(cmd: List[str], progress_callback=None, dry_run: bool = F
         cmd: 命令列表。
         progress_callback: 可选的进度回调函数。
         dry_run: 若为 True，仅打印命令不执行。
+        output: 输出目标 (文本流)，默认为当前 sys.stdout；
+            并发执行时可传入独立缓冲，避免多个任务的输出交错。
+        quiet: 若为 True 且未传入 progress_callback，以 -loglevel error 执行并
+            直接等待进程结束，不在 Python 中逐行转发统计输出 (只打印错误日志)。
+        fallback: 可选的无参函数，返回改用 CPU 编码器的替代命令；
+            检测到硬件编码器错误时自动执行替代命令 (只回退一次)。
 
     Returns:
-        进程返回码。
+        进程返回码 (回退时为替代命令的返回码)。
     """
-    cmd_str = " ".join(cmd)
+    out = output if output is not None else sys.stdout
+    cmd_str = format_command(cmd)
     
     # 记录到日志文件
     logger.info(f"Executing command: {cmd_str}")
     
-    print(f"{Fore.CYAN}[小雪工具箱] 执行命令:{Style.RESET_ALL}", flush=True)
-    print(cmd_str, flush=True)
-    print("-" * 50, flush=True)
+    print(f"{Fore.CYAN}[小雪工具箱] 执行命令:{Style.RESET_ALL}", file=out, flush=True)
+    print(cmd_str, file=out, flush=True)
+    print("-" * 50, file=out, flush=True)
 
     if dry_run:
-        print(f"{Fore.YELLOW}[Debug 模式] 仅输出命令，不执行。{Style.RESET_ALL}", flush=True)
+        print(f"{Fore.YELLOW}[Debug 模式] 仅输出命令，不执行。{Style.RESET_ALL}", file=out, flush=True)
         return 0
 
-    # 收集输出用于错误分析
-    output_lines = []
+    # 收集输出末尾若干行用于错误分析 (错误信息位于日志末尾，长时间编码也不会无限增长)
+    output_lines = deque(maxlen=ERROR_SCAN_LINES)
 
     try:
-        # 使用 Popen 以实时读取输出
+        if quiet and progress_callback is None:
+            returncode, error_lines = _run_quiet(cmd)
+            if error_lines:
+                print("".join(error_lines), end='', file=out, flush=True)
+                output_lines.extend(error_lines)
+            if _print_result(returncode, output_lines, out) and fallback:
+                return _run_fallback(fallback, progress_callback, out, quiet)
+            return returncode
+
+        # 使用 Popen 以实时读取输出；直接传入参数列表 (shell=False)，不经过 shell 解析
         process = subprocess.Popen(
             cmd,
             stdout=subprocess.PIPE,
             stderr=subprocess.STDOUT,
-            universal_newlines=True,
-            encoding='utf-8',
-            errors='replace',
-            bufsize=1,  # 行缓冲
-            creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0,
+            bufsize=0,  # 无缓冲，按块读取原始字节
+            creationflags=SUBPROCESS_FLAGS,
         )
 
-        # 实时读取输出
-        while True:
-            line = process.stdout.readline()
-            if not line and process.poll() is not None:
-                break
-            if line:
-                print(line, end='', flush=True)
-                output_lines.append(line)
-                if progress_callback:
-                    progress_callback(line)
+        # 进度回调在独立线程中执行，回调较慢时不阻塞管道读取 (否则管道写满会拖慢 FFmpeg)
+        callback_queue = None
+        if progress_callback:
+            callback_queue = queue.Queue(PROGRESS_QUEUE_SIZE)
+            callback_thread = threading.Thread(
+                target=_callback_worker, args=(callback_queue, progress_callback), daemon=True,
+            )
+            callback_thread.start()
+
+        # 实时读取输出 (按块读取管道直到 EOF，再切分为行)；
+        # 结构化进度行只转给回调，不打印也不参与错误分析
+        hide_progress = "-progress" in cmd
+        try:
+            with process.stdout:
+                for lines in _iter_output_line_batches(process.stdout.fileno()):
+                    if hide_progress:
+                        visible = [line for line in lines if not _split_progress_line(line)]
+                    else:
+                        visible = lines
+                    if visible:
+                        # 同一次读取到的多行合并为单次写入
+                        print("".join(visible), end='', file=out, flush=True)
+                        output_lines.extend(visible)
+                    if callback_queue is not None:
+                        for line in lines:
+                            _put_drop_oldest(callback_queue, line)
+        finally:
+            if callback_queue is not None:
+                callback_queue.put(None)
+                callback_thread.join()
 
         process.wait()
-
-        if process.returncode == 0:
-            print(f"\n{Fore.GREEN}[成功] 任务完成!{Style.RESET_ALL}", flush=True)
-        else:
-            print(f"\n{Fore.RED}[失败] FFmpeg 返回错误 (code={process.returncode}){Style.RESET_ALL}", flush=True)
-            # 检测硬件编码器错误并给出友好提示
-            _check_hardware_encoder_error(output_lines)
-
+        if _print_result(process.returncode, output_lines, out) and fallback:
+            return _run_fallback(fallback, progress_callback, out, quiet)
         return process.returncode
 
     except FileNotFoundError as e:
-        print(f"\n{Fore.RED}[错误] 找不到 FFmpeg: {e}{Style.RESET_ALL}", flush=True)
-        print(f"请确保 bin 目录下有 ffmpeg.exe", flush=True)
+        print(f"\n{Fore.RED}[错误] 找不到 FFmpeg: {e}{Style.RESET_ALL}", file=out, flush=True)
+        print(f"请确保 bin 目录下有 ffmpeg.exe", file=out, flush=True)
         return -1
     except Exception as e:
-        print(f"\n{Fore.RED}[错误] 执行失败: {e}{Style.RESET_ALL}", flush=True)
+        print(f"\n{Fore.RED}[错误] 执行失败: {e}{Style.RESET_ALL}", file=out, flush=True)
         return -1
 
 
-def _check_hardware_encoder_error(output_lines: List[str]) -> None:
+def _print_result(returncode: int, output_lines: Iterable[str], out) -> Optional[str]:
     """
-    检测硬件编码器错误并输出友好提示。
+    打印执行结果，失败时检测硬件编码器错误并给出友好提示。
 
-    Args:
-        output_lines: FFmpeg 输出行列表。
+    Returns:
+        检测到的硬件编码器类型 ("nvenc"/"qsv"/"amf")，未检测到时为 None。
     """
-    output_text = "\n".join(output_lines)
-    
-    # NVENC 错误关键词
-    nvenc_errors = [
+    if returncode == 0:
+        print(f"\n{Fore.GREEN}[成功] 任务完成!{Style.RESET_ALL}", file=out, flush=True)
+        return None
+    print(f"\n{Fore.RED}[失败] FFmpeg 返回错误 (code={returncode}){Style.RESET_ALL}", file=out, flush=True)
+    return _check_hardware_encoder_error(output_lines, out)
+
+
+def _run_fallback(fallback, progress_callback, out, quiet: bool) -> int:
+    """硬件编码器初始化失败后，改用替代命令重新执行 (不再继续回退)。"""
+    print(f"{Fore.YELLOW}[回退] 硬件编码器不可用，自动改用 CPU 编码器重新执行{Style.RESET_ALL}", file=out, flush=True)
+    return run_ffmpeg_command(fallback(), progress_callback=progress_callback, output=out, quiet=quiet)
+
+
+# 硬件编码器错误关键词 (按 NVENC、QSV、AMF 顺序匹配，忽略大小写)
+_HW_ERROR_KEYWORDS = (
+    ("nvenc", (
         "No NVENC capable devices found",
         "Cannot load cuvidparser",
         "Driver does not support the required nvenc API version",
         "The minimum required Nvidia driver for nvenc",
         "nvenc encoder error",
         "Failed to init NVENC",
-    ]
-    
-    # QSV 错误关键词  
-    qsv_errors = [
+    )),
+    ("qsv", (
         "Error initializing an MFX session",
         "device failed",
         "MFXInit failed",
         "Could not initialize mfx session",
         "QSV is not supported",
-    ]
-    
-    # AMF 错误关键词
-    amf_errors = [
+    )),
+    ("amf", (
         "CreateComponent failed",
         "AMF failed",
         "amf encoder error",
         "Failed to create AMF",
         "AMFComponentOptimizedPush_QueryMHESupport",
-    ]
-    
+    )),
+)
+
+# 每类关键词预编译为单个正则，一次扫描即可判断
+_HW_ERROR_PATTERNS = tuple(
+    (name, re.compile("|".join(map(re.escape, keywords)), re.IGNORECASE))
+    for name, keywords in _HW_ERROR_KEYWORDS
+)
+
+
+def _check_hardware_encoder_error(output_lines: Iterable[str], output=None) -> Optional[str]:
+    """
+    检测硬件编码器错误并输出友好提示。
+
+    Args:
+        output_lines: FFmpeg 输出行 (含换行符)。
+        output: 输出目标 (文本流)，默认为当前 sys.stdout。
+
+    Returns:
+        检测到的硬件编码器类型 ("nvenc"/"qsv"/"amf")，未检测到时为 None。
+    """
+    out = output if output is not None else sys.stdout
+    output_text = "".join(output_lines)
+
     detected_encoder = None
-    
-    for keyword in nvenc_errors:
-        if keyword.lower() in output_text.lower():
-            detected_encoder = "nvenc"
+    for name, pattern in _HW_ERROR_PATTERNS:
+        if pattern.search(output_text):
+            detected_encoder = name
             break
     
-    if not detected_encoder:
-        for keyword in qsv_errors:
-            if keyword.lower() in output_text.lower():
-                detected_encoder = "qsv"
-                break
-    
-    if not detected_encoder:
-        for keyword in amf_errors:
-            if keyword.lower() in output_text.lower():
-                detected_encoder = "amf"
-                break
-    
     if detected_encoder:
-        print(f"\n{Fore.YELLOW}{'='*60}{Style.RESET_ALL}")
-        print(f"{Fore.YELLOW}[提示] 检测到硬件编码器错误{Style.RESET_ALL}")
-        print(f"{Fore.YELLOW}{'='*60}{Style.RESET_ALL}")
+        print(f"\n{Fore.YELLOW}{'='*60}{Style.RESET_ALL}", file=out)
+        print(f"{Fore.YELLOW}[提示] 检测到硬件编码器错误{Style.RESET_ALL}", file=out)
+        print(f"{Fore.YELLOW}{'='*60}{Style.RESET_ALL}", file=out)
         
         if detected_encoder == "nvenc":
             print(f"""
@@ -554,7 +965,7 @@ def _check_hardware_encoder_error(output_lines: List[str]) -> None:
 {Fore.GREEN}解决建议:{Style.RESET_ALL}
   1. 访问 NVIDIA 官网下载最新驱动: https://www.nvidia.cn/drivers/
   2. 若无法更新驱动，可改用 CPU 编码器 (H.264/H.265)
-""")
+""", file=out)
         elif detected_encoder == "qsv":
             print(f"""
 {Fore.CYAN}Intel QSV 编码失败可能的原因:{Style.RESET_ALL}
@@ -566,7 +977,7 @@ def _check_hardware_encoder_error(output_lines: List[str]) -> None:
   1. 下载 Intel 核显驱动: https://www.intel.cn/content/www/cn/zh/download-center/home.html
   2. 确认 BIOS 中核显未被禁用
   3. 若无法使用 QSV，可改用 CPU 编码器 (H.264/H.265)
-""")
+""", file=out)
         elif detected_encoder == "amf":
             print(f"""
 {Fore.CYAN}AMD AMF 编码失败可能的原因:{Style.RESET_ALL}
@@ -577,7 +988,177 @@ def _check_hardware_encoder_error(output_lines: List[str]) -> None:
 {Fore.GREEN}解决建议:{Style.RESET_ALL}
   1. 下载最新 AMD 驱动: https://www.amd.com/zh-hans/support
   2. 若无法更新驱动，可改用 CPU 编码器 (H.264/H.265)
-""")
+""", file=out)
+
+    return detected_encoder
+
+
+@lru_cache(maxsize=1)
+def _nvidia_gpu_count() -> int:
+    """
+    通过 nvidia-smi -L 获取 NVIDIA GPU 数量 (结果缓存)。
+
+    Returns:
+        GPU 数量，无法检测时返回 0。
+    """
+    try:
+        result = subprocess.run(
+            ["nvidia-smi", "-L"],
+            capture_output=True,
+            text=True,
+            timeout=5,
+            creationflags=SUBPROCESS_FLAGS,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return 0
+    if result.returncode != 0:
+        return 0
+    return sum(1 for line in result.stdout.splitlines() if line.startswith("GPU "))
+
+
+def _parse_encoder_list(text: str) -> List[str]:
+    """解析 ffmpeg -encoders 的输出，返回编码器名称列表 (跳过图例部分)。"""
+    names = []
+    in_list = False
+    for line in text.splitlines():
+        if not in_list:
+            in_list = line.strip().startswith("------")
+            continue
+        parts = line.split(None, 2)
+        if len(parts) >= 2:
+            names.append(parts[1])
+    return names
+
+
+@lru_cache(maxsize=1)
+def get_encoder_capabilities() -> frozenset:
+    """
+    获取当前 FFmpeg 支持的编码器名称集合。
+
+    结果持久化到 FFMPEG_CAPS_FILE，FFmpeg 可执行文件未变化时不再重复探测。
+
+    Returns:
+        编码器名称集合，无法探测时为空集合 (表示未知)。
+    """
+    ffmpeg = get_ffmpeg_path()
+    try:
+        st = os.stat(ffmpeg)
+        key = {"path": ffmpeg, "size": st.st_size, "mtime": st.st_mtime_ns}
+    except OSError:
+        key = None
+
+    if key is not None:
+        try:
+            with open(FFMPEG_CAPS_FILE, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+            if all(cached.get(k) == v for k, v in key.items()):
+                return frozenset(cached["encoders"])
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            pass
+
+    try:
+        result = subprocess.run(
+            [ffmpeg, "-hide_banner", "-encoders"],
+            capture_output=True,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+            timeout=10,
+            creationflags=SUBPROCESS_FLAGS,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return frozenset()
+    encoders = _parse_encoder_list(result.stdout)
+    if result.returncode != 0 or not encoders:
+        return frozenset()
+
+    if key is not None:
+        try:
+            with open(FFMPEG_CAPS_FILE, "w", encoding="utf-8") as f:
+                json.dump({**key, "encoders": encoders}, f)
+        except OSError as e:
+            logger.warning(f"无法写入编码器缓存: {e}")
+    return frozenset(encoders)
+
+
+def prefetch_encoder_capabilities() -> None:
+    """在后台线程中预先探测编码器列表，避免首次压制时同步等待 ffmpeg -encoders。"""
+    threading.Thread(target=get_encoder_capabilities, daemon=True).start()
+
+
+def run_ffmpeg_batch(
+    cmds: List[List[str]],
+    max_concurrent: int = 2,
+    progress_callback=None,
+    dry_run: bool = False,
+    quiet: bool = False,
+    headers: Optional[List[str]] = None,
+    on_result=None,
+) -> List[int]:
+    """
+    并发执行多个互不依赖的 FFmpeg 命令。
+
+    每个任务的输出写入独立缓冲，任务完成后整体输出，避免多个任务的日志交错。
+    含 NVENC 编码的批次并发数不超过检测到的 GPU 数量 (无法检测时为 1)。
+
+    Args:
+        cmds: 命令列表的列表。
+        max_concurrent: 最大并发任务数。
+        progress_callback: 可选的进度回调函数，参数为 (任务序号, 输出行)。
+        dry_run: 若为 True，仅打印命令不执行。
+        quiet: 若为 True，未传入进度回调的任务只收集错误日志 (见 run_ffmpeg_command)。
+        headers: 可选，与 cmds 一一对应的任务标题 (默认为 "[序号/总数]")。
+        on_result: 可选，每个任务完成时在调用线程中执行，参数为 (任务序号, 返回码)，
+            可用于与剩余任务重叠进行的后续处理 (如删除原文件)。
+
+    Returns:
+        与 cmds 顺序一致的返回码列表。
+    """
+    if not cmds:
+        return []
+
+    if any("-c:v" in cmd and encoder_family(cmd[cmd.index("-c:v") + 1]) == "nvenc" for cmd in cmds):
+        max_concurrent = min(max_concurrent, _nvidia_gpu_count() or 1)
+    max_workers = max(1, min(max_concurrent, len(cmds)))
+
+    def run_one(index: int, cmd: List[str]) -> Tuple[int, str]:
+        buf = io.StringIO()
+        callback = None
+        if progress_callback:
+            callback = lambda line: progress_callback(index, line)
+        result = run_ffmpeg_command(
+            cmd, progress_callback=callback, dry_run=dry_run, output=buf, quiet=quiet,
+        )
+        return result, buf.getvalue()
+
+    total = len(cmds)
+    results = [0] * total
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(run_one, i, cmd): i for i, cmd in enumerate(cmds)}
+        for future in as_completed(futures):
+            i = futures[future]
+            results[i], log_text = future.result()
+            header = headers[i] if headers else f"[{i + 1}/{total}]"
+            # 标题与日志合并为单次写入
+            print(f"\n{header}\n{log_text}", end="", flush=True)
+            if on_result is not None:
+                on_result(i, results[i])
+
+    return results
+
+
+@lru_cache(maxsize=1)
+def _default_passlog_dir() -> str:
+    """
+    获取两遍编码统计文件的默认目录。
+
+    Linux 下优先使用 /dev/shm (tmpfs)，统计文件只驻留内存，不落盘；
+    其他平台或 /dev/shm 不可写时回退到系统临时目录。
+    """
+    shm_dir = "/dev/shm"
+    if os.name != "nt" and os.path.isdir(shm_dir) and os.access(shm_dir, os.W_OK):
+        return shm_dir
+    return tempfile.gettempdir()
 
 
 def build_2pass_commands(
@@ -597,7 +1178,10 @@ def build_2pass_commands(
     audio_tracks_custom: str = "",
     subtitle_tracks: str = "none",
     subtitle_tracks_custom: str = "",
-) -> Tuple[List[str], List[str]]:
+    passlogfile: Optional[str] = None,
+    passlog_dir: Optional[str] = None,
+    threads: Optional[int] = None,
+) -> Tuple[Optional[List[str]], List[str]]:
     """
     构建真正的两遍编码 FFmpeg 命令。
 
@@ -614,41 +1198,36 @@ def build_2pass_commands(
         audio_bitrate: 音频码率。
         subtitle_path: 字幕文件路径。
         extra_args: 额外参数。
+        passlogfile: CPU 编码器两遍统计文件的路径前缀。
+        passlog_dir: 未指定 passlogfile 时统计文件所在目录，默认优先使用内存盘。
+            为空时在临时目录生成每个任务独立的前缀，避免并发任务互相覆盖。
+        threads: 编码线程数上限 (None/0 为自动)。
 
     Returns:
-        (pass1_cmd, pass2_cmd) 两遍编码的命令列表。
+        (pass1_cmd, pass2_cmd) 两遍编码的命令列表；
+        NVENC 在单条命令内完成多遍编码，此时 pass1_cmd 为 None。
     """
     ffmpeg = get_ffmpeg_path()
 
     # 如果使用预设, 加载预设参数
-    if preset_name and preset_name in QUALITY_PRESETS and preset_name != "自定义 (Custom)":
-        preset = QUALITY_PRESETS[preset_name]
-        encoder = encoder or preset.get("encoder")
-        speed_preset = speed_preset or preset.get("preset")
-        resolution = resolution or preset.get("resolution")
-        fps = fps if fps is not None else preset.get("fps")
-        audio_bitrate = audio_bitrate or preset.get("audio_bitrate", "192k")
+    preset = PRESET_ENCODE_DEFAULTS.get(preset_name) if preset_name else None
+    if preset:
+        encoder = encoder or preset["encoder"]
+        speed_preset = speed_preset or preset["speed_preset"]
+        resolution = resolution or preset["resolution"]
+        fps = fps if fps is not None else preset["fps"]
+        audio_bitrate = audio_bitrate or preset["audio_bitrate"]
 
     # 确定实际编码器
     actual_encoder = ENCODERS.get(encoder, encoder) if encoder else "libx264"
     
     # 识别编码器类型
-    is_nvenc = "nvenc" in actual_encoder
-    is_qsv = "qsv" in actual_encoder
-    is_amf = "amf" in actual_encoder
-    is_cpu = actual_encoder in ("libx264", "libx265")
+    family = encoder_family(actual_encoder)
+    is_nvenc = family == "nvenc"
+    is_amf = family == "amf"
 
     # 视频滤镜链
-    vf_filters = []
-    if subtitle_path:
-        escaped_sub = escape_path_for_ffmpeg(subtitle_path)
-        vf_filters.append(f"subtitles='{escaped_sub}'")
-    if resolution and isinstance(resolution, str) and "x" in resolution:
-        try:
-            w, h = resolution.split("x")
-            vf_filters.append(f"scale={w}:{h}")
-        except ValueError:
-            pass
+    vf_filters = _build_video_filters(subtitle_path, resolution, fps)
 
     # 构建基础命令部分
     base_cmd = [ffmpeg, "-y", "-i", input_path]
@@ -657,43 +1236,60 @@ def build_2pass_commands(
         base_cmd.extend(["-vf", ",".join(vf_filters)])
 
     base_cmd.extend(["-c:v", actual_encoder])
+    extra_tokens = split_args(extra_args) if extra_args else []
+    _apply_thread_args(base_cmd, actual_encoder, bool(vf_filters), extra_tokens, threads)
     base_cmd.extend(["-b:v", bitrate])
 
     # 根据编码器类型添加速度预设
     if speed_preset:
         base_cmd.extend(["-preset", speed_preset])
 
-    if fps:
-        base_cmd.extend(["-r", str(fps)])
+    # CPU 编码器的两遍统计文件 (NVENC/AMF 在编码器内部完成多遍分析，不产生统计文件)
+    if not is_nvenc and not is_amf:
+        if not passlogfile:
+            passlogfile = os.path.join(
+                passlog_dir or _default_passlog_dir(),
+                f"xiaoxue_2pass_{uuid.uuid4().hex[:12]}",
+            )
+        base_cmd.extend(["-passlogfile", passlogfile])
+        if actual_encoder == "libx265":
+            # libx265 不读取 -passlogfile，需通过 x265-params 指定统计文件；
+            # 用户额外参数中的 x265-params 合并到同一参数中 (统计文件放在最后，以保证各任务独立)
+            x265_params = [f"stats={escape_path_for_param_list(passlogfile + '.x265.log')}"]
+            if "-x265-params" in extra_tokens:
+                index = extra_tokens.index("-x265-params")
+                if index + 1 < len(extra_tokens):
+                    user_params = extra_tokens[index + 1]
+                    if "stats=" in user_params:
+                        logger.warning("额外参数中的 x265 stats 已被本任务独立的统计文件覆盖")
+                    x265_params.insert(0, user_params)
+                extra_tokens = extra_tokens[:index] + extra_tokens[index + 2:]
+            base_cmd.extend(["-x265-params", ":".join(x265_params)])
 
     # 额外参数
-    if extra_args:
-        base_cmd.extend(extra_args.split())
+    base_cmd.extend(extra_tokens)
 
     # ===== Pass 1: 分析阶段 =====
-    pass1_cmd = base_cmd.copy()
-    
+    # NVENC 通过 -multipass 在单条命令内完成多遍分析，无需单独的第一遍
     if is_nvenc:
-        # NVENC 2-pass
-        pass1_cmd.extend(["-multipass", "fullres"])
-        pass1_cmd.extend(["-2pass", "1"])
-    elif is_amf:
-        # AMF 2-pass
-        pass1_cmd.extend(["-2pass", "1"])
+        pass1_cmd = None
     else:
-        # CPU 编码器 (libx264/libx265)
-        pass1_cmd.extend(["-pass", "1"])
-    
-    # 第一遍禁用音频，输出到空设备
-    pass1_cmd.extend(["-an", "-f", "null"])
-    pass1_cmd.append("NUL" if os.name == "nt" else "/dev/null")
+        pass1_cmd = base_cmd.copy()
+        if is_amf:
+            # AMF 2-pass
+            pass1_cmd.extend(["-2pass", "1"])
+        else:
+            # CPU 编码器 (libx264/libx265)
+            pass1_cmd.extend(["-pass", "1"])
+
+        # 第一遍只分析视频: 丢弃音频/字幕/数据流，null 封装器输出到 "-" (不写任何文件)
+        pass1_cmd.extend(["-an", "-sn", "-dn", "-f", "null", "-"])
 
     # ===== Pass 2: 实际编码 =====
     pass2_cmd = base_cmd.copy()
     
     if is_nvenc:
         pass2_cmd.extend(["-multipass", "fullres"])
-        pass2_cmd.extend(["-2pass", "1"])  # NVENC 不需要单独的 pass 2 标志
     elif is_amf:
         pass2_cmd.extend(["-2pass", "1"])
     else:
@@ -722,12 +1318,18 @@ def build_2pass_commands(
     return pass1_cmd, pass2_cmd
 
 
-def run_2pass_encode(pass1_cmd: List[str], pass2_cmd: List[str], dry_run: bool = False) -> int:
+def _pass_banner(title: str) -> str:
+    """构建两遍编码阶段标题栏 (单次写入)。"""
+    rule = f"{Fore.CYAN}{'=' * 50}{Style.RESET_ALL}"
+    return f"\n{rule}\n{Fore.CYAN}{title}{Style.RESET_ALL}\n{rule}"
+
+
+def run_2pass_encode(pass1_cmd: Optional[List[str]], pass2_cmd: List[str], dry_run: bool = False) -> int:
     """
     执行真正的两遍编码。
 
     Args:
-        pass1_cmd: 第一遍命令。
+        pass1_cmd: 第一遍命令 (为 None 时编码器内部完成多遍分析，只执行第二遍命令)。
         pass2_cmd: 第二遍命令。
         dry_run: 若为 True，仅打印命令不执行。
 
@@ -736,46 +1338,53 @@ def run_2pass_encode(pass1_cmd: List[str], pass2_cmd: List[str], dry_run: bool =
     """
     if dry_run:
         logger.info(f"[2-Pass] Dry Run")
-        logger.info(f"Pass 1: {' '.join(pass1_cmd)}")
-        logger.info(f"Pass 2: {' '.join(pass2_cmd)}")
-        
-        print(f"{Fore.CYAN}[小雪工具箱] 执行命令 (2-Pass):{Style.RESET_ALL}", flush=True)
-        print(f"Pass 1: {' '.join(pass1_cmd)}", flush=True)
-        print(f"Pass 2: {' '.join(pass2_cmd)}", flush=True)
-        print(f"{Fore.YELLOW}[Debug 模式] 仅输出命令，不执行。{Style.RESET_ALL}", flush=True)
+        lines = [f"{Fore.CYAN}[小雪工具箱] 执行命令 (2-Pass):{Style.RESET_ALL}"]
+        if pass1_cmd is not None:
+            logger.info(f"Pass 1: {format_command(pass1_cmd)}")
+            lines.append(f"Pass 1: {format_command(pass1_cmd)}")
+            lines.append(f"Pass 2: {format_command(pass2_cmd)}")
+        else:
+            lines.append(f"多遍编码: {format_command(pass2_cmd)}")
+        logger.info(f"Pass 2: {format_command(pass2_cmd)}")
+        lines.append(f"{Fore.YELLOW}[Debug 模式] 仅输出命令，不执行。{Style.RESET_ALL}")
+        print("\n".join(lines), flush=True)
         return 0
-    print(f"\n{Fore.CYAN}{'='*50}{Style.RESET_ALL}")
-    print(f"{Fore.CYAN}[Pass 1/2] 分析视频...{Style.RESET_ALL}")
-    print(f"{Fore.CYAN}{'='*50}{Style.RESET_ALL}")
 
-    print(f"{Fore.CYAN}{'='*50}{Style.RESET_ALL}")
-    print(f"{Fore.CYAN}[Pass 1/2] 分析视频...{Style.RESET_ALL}")
-    print(f"{Fore.CYAN}{'='*50}{Style.RESET_ALL}")
+    if pass1_cmd is None:
+        print(_pass_banner("[多遍编码] 编码器内部完成分析与编码..."), flush=True)
+        return run_ffmpeg_command(pass2_cmd, dry_run=False)
+
+    print(_pass_banner("[Pass 1/2] 分析视频..."), flush=True)
 
     result1 = run_ffmpeg_command(pass1_cmd, dry_run=False)
     
     if result1 != 0:
         print(f"\n{Fore.RED}[错误] Pass 1 失败，终止编码{Style.RESET_ALL}")
+        _cleanup_2pass_logs(pass1_cmd)
         return result1
 
-    print(f"\n{Fore.CYAN}{'='*50}{Style.RESET_ALL}")
-    print(f"{Fore.CYAN}[Pass 2/2] 正式编码...{Style.RESET_ALL}")
-    print(f"{Fore.CYAN}{'='*50}{Style.RESET_ALL}")
-
-    print(f"{Fore.CYAN}{'='*50}{Style.RESET_ALL}")
-    print(f"{Fore.CYAN}[Pass 2/2] 正式编码...{Style.RESET_ALL}")
-    print(f"{Fore.CYAN}{'='*50}{Style.RESET_ALL}")
+    # 第一遍成功后立即启动第二遍，统计文件仍在页缓存 (或 tmpfs) 中
+    print(_pass_banner("[Pass 2/2] 正式编码..."), flush=True)
 
     result2 = run_ffmpeg_command(pass2_cmd, dry_run=False)
-
-    # 清理 2-pass 临时文件
-    for ext in [".log", ".log.mbtree", "-0.log", "-0.log.mbtree"]:
-        log_file = f"ffmpeg2pass{ext}"
-        if os.path.exists(log_file):
-            try:
-                os.remove(log_file)
-            except Exception:
-                pass
+    _cleanup_2pass_logs(pass1_cmd)
 
     return result2
 
+
+def _cleanup_2pass_logs(pass1_cmd: List[str]) -> None:
+    """
+    清理两遍编码的统计文件 (-passlogfile 前缀下的 .log / .mbtree / .cutree 等)。
+
+    Args:
+        pass1_cmd: 第一遍命令 (从中读取 -passlogfile 前缀)。
+    """
+    if "-passlogfile" not in pass1_cmd:
+        return
+    prefix = pass1_cmd[pass1_cmd.index("-passlogfile") + 1]
+    for log_file in glob.glob(glob.escape(prefix) + "*"):
+        try:
+            os.remove(log_file)
+        except Exception:
+            pass
+
@@ -12,6 +12,8 @@ from enum import Enum
 
 from colorama import Fore, Style
 
+from .utils import parse_resolution
+
 
 class EncodeMode(Enum):
     """编码模式枚举"""
@@ -50,6 +52,15 @@ class EncodeParams:
     subtitle_path: Optional[str] = None
     compat_mode: bool = False
     
+    # 硬件解码 (NVENC GPU 全流程)
+    hw_decode: bool = False
+
+    # 硬件编码器初始化失败时自动改用 CPU 编码器 (libx264)
+    auto_fallback: bool = False
+
+    # 编码线程数上限 (0 为自动)
+    threads: int = 0
+    
     # 其他参数
     extra_args: Optional[str] = None
     dry_run: bool = False
@@ -64,6 +75,10 @@ class EncodeParams:
     subtitle_tracks: str = "none"       # 字幕选择模式
     subtitle_tracks_custom: str = ""    # 自定义字幕编号 (逗号分隔)
     
+    # 压制后分发参数
+    post_transfer_mode: str = "none"    # 分发模式 (none/copy/move)
+    post_transfer_dir: str = ""         # 分发目标目录
+    
     def get_encode_mode(self) -> EncodeMode:
         """
         根据参数确定编码模式。
@@ -101,10 +116,7 @@ class EncodeParams:
         if self.resolution:
             if "x" not in self.resolution:
                 return False, f"分辨率格式错误，应为 WxH: {self.resolution}"
-            try:
-                w, h = self.resolution.split("x")
-                int(w), int(h)
-            except ValueError:
+            if parse_resolution(self.resolution) is None:
                 return False, f"分辨率格式错误: {self.resolution}"
         
         return True, ""
@@ -137,6 +149,9 @@ def resolve_encoder_params(
     preset_name = args.preset
     is_custom = preset_name == "自定义 (Custom)"
     
+    nvenc_preset = getattr(args, 'nvenc_preset', '使用预设默认')
+    use_nvenc_preset = bool(nvenc_preset) and nvenc_preset != '使用预设默认'
+    
     # 默认值
     encoder = "libx264"
     crf = None
@@ -154,12 +169,9 @@ def resolve_encoder_params(
         audio_encoder = preset.get("audio_encoder", "copy")
         audio_bitrate = preset.get("audio_bitrate", "192k")
         
-        # NVENC 预设：检查用户是否选择了自定义档位
-        nvenc_preset = getattr(args, 'nvenc_preset', '使用预设默认')
-        if nvenc_preset and nvenc_preset != '使用预设默认':
-            # 用户选择了 NVENC 档位，覆盖预设默认值
-            if "nvenc" in encoder:
-                speed_preset = nvenc_preset
+        # NVENC 预设：用户选择了 NVENC 档位时覆盖预设默认值
+        if use_nvenc_preset and "nvenc" in encoder:
+            speed_preset = nvenc_preset
     else:
         # 自定义模式：从 args 中读取参数
         encoder = encoders.get(args.encoder, "libx264")
@@ -170,8 +182,7 @@ def resolve_encoder_params(
         # 自定义模式下根据编码器类型选择速度预设
         if "nvenc" in encoder:
             # NVENC 编码器：使用 N卡速度档位
-            nvenc_preset = getattr(args, 'nvenc_preset', '使用预设默认')
-            if nvenc_preset and nvenc_preset != '使用预设默认':
+            if use_nvenc_preset:
                 speed_preset = nvenc_preset
             else:
                 speed_preset = "p4"  # NVENC 默认档位
@@ -210,6 +221,10 @@ def resolve_encoder_params(
     subtitle_tracks_val = SUBTITLE_TRACK_OPTIONS.get(subtitle_track_key, "none")
     subtitle_tracks_custom_val = getattr(args, 'subtitle_tracks_custom', '')
 
+    # 解析压制后分发参数
+    from .presets import POST_TRANSFER_MODES
+    transfer_mode_name = getattr(args, 'post_transfer_mode', '不分发')
+
     # 构建参数对象
     return EncodeParams(
         input_path=args.input,
@@ -225,6 +240,9 @@ def resolve_encoder_params(
         audio_bitrate=audio_bitrate,
         subtitle_path=args.subtitle if args.subtitle else None,
         compat_mode=getattr(args, 'compat_mode', False),
+        hw_decode=getattr(args, 'hw_decode', False),
+        auto_fallback=getattr(args, 'auto_fallback', False),
+        threads=getattr(args, 'encode_threads', 0) or 0,
         extra_args=args.extra_args if args.extra_args else None,
         dry_run=getattr(args, 'debug_mode', False),
         is_custom=is_custom,
@@ -233,6 +251,8 @@ def resolve_encoder_params(
         audio_tracks_custom=audio_tracks_custom_val,
         subtitle_tracks=subtitle_tracks_val,
         subtitle_tracks_custom=subtitle_tracks_custom_val,
+        post_transfer_mode=POST_TRANSFER_MODES.get(transfer_mode_name, 'none'),
+        post_transfer_dir=getattr(args, 'post_transfer_dir', '') or '',
     )
 
 
@@ -244,24 +264,37 @@ def print_encode_info(params: EncodeParams, quality_presets: Dict[str, Any]) ->
         params: 编码参数对象
         quality_presets: 质量预设字典 (用于获取预设信息)
     """
+    # 逐行收集后一次写出，避免每行 flush 一次
+    lines = []
     if not params.is_custom and params.preset_name in quality_presets:
         preset = quality_presets[params.preset_name]
-        print(f"[预设] {params.preset_name}", flush=True)
-        print(f"  编码器: {params.encoder}", flush=True)
-        print(f"  CRF: {preset.get('crf') or preset.get('cq', 'N/A')}", flush=True)
-        print(f"  速度: {preset.get('preset', 'N/A')}", flush=True)
+        lines.append(f"[预设] {params.preset_name}")
+        lines.append(f"  编码器: {params.encoder}")
+        lines.append(f"  CRF: {preset.get('crf') or preset.get('cq', 'N/A')}")
+        lines.append(f"  速度: {preset.get('preset', 'N/A')}")
     else:
-        print(f"[自定义模式]", flush=True)
-        print(f"  编码器: {params.encoder}", flush=True)
-        print(f"  CRF: {params.crf}", flush=True)
+        lines.append(f"[自定义模式]")
+        lines.append(f"  编码器: {params.encoder}")
+        lines.append(f"  CRF: {params.crf}")
         if params.rc_mode:
-            print(f"  码率控制: {params.rc_mode}", flush=True)
+            lines.append(f"  码率控制: {params.rc_mode}")
         if params.bitrate:
-            print(f"  视频码率: {params.bitrate}", flush=True)
+            lines.append(f"  视频码率: {params.bitrate}")
     
-    # 打印编码模式
+    # 硬件解码仅普通编码模式生效 (2-Pass/兼容模式的命令构建不使用)
     mode = params.get_encode_mode()
+    if params.hw_decode and "nvenc" in params.encoder:
+        if mode != EncodeMode.NORMAL:
+            lines.append(f"{Fore.YELLOW}[GPU 全流程] 当前编码模式不支持，本次使用软件解码{Style.RESET_ALL}")
+        elif params.subtitle_path:
+            lines.append(f"{Fore.YELLOW}[GPU 全流程] 烧录字幕需要 CPU 滤镜，本次使用软件解码{Style.RESET_ALL}")
+        else:
+            lines.append(f"{Fore.CYAN}[GPU 全流程] 已启用 CUDA 硬件解码 + 缩放{Style.RESET_ALL}")
+    
+    # 打印编码模式
     if mode == EncodeMode.COMPAT:
-        print(f"{Fore.CYAN}[兼容模式] 已启用 AviSynth + VSFilter 字幕渲染{Style.RESET_ALL}", flush=True)
+        lines.append(f"{Fore.CYAN}[兼容模式] 已启用 AviSynth + VSFilter 字幕渲染{Style.RESET_ALL}")
     elif mode == EncodeMode.TWO_PASS:
-        print(f"{Fore.CYAN}[2-Pass 模式] 将执行真正的两遍编码{Style.RESET_ALL}", flush=True)
+        lines.append(f"{Fore.CYAN}[2-Pass 模式] 将执行真正的两遍编码{Style.RESET_ALL}")
+
+    print("\n".join(lines), flush=True)
@@ -5,38 +5,47 @@
 每个执行器按功能域分组，便于独立测试和维护。
 """
 
-from .common import print_task_header
+import importlib
 
-from .video_executor import (
-    execute_encode,
-    execute_replace_audio,
-    execute_extract_av,
-)
-
-from .file_executor import (
-    execute_remux,
-    execute_image_convert,
-)
-
-from .batch_executor import (
-    execute_folder_creator,
-    execute_batch_rename,
-)
+# 导出名 -> 所在子模块。按需导入 (PEP 562)，导入本包或某个执行器子模块时
+# 不会连带加载其它执行器及其依赖 (core、Pillow、通知等)
+_LAZY_EXPORTS = {
+    # 共用
+    "print_task_header": "common",
+    # 视频
+    "execute_encode": "video_executor",
+    "execute_replace_audio": "video_executor",
+    "execute_extract_av": "video_executor",
+    # 文件
+    "execute_remux": "file_executor",
+    "execute_image_convert": "file_executor",
+    # 批量
+    "execute_folder_creator": "batch_executor",
+    "execute_batch_rename": "batch_executor",
+    # 质量检测
+    "execute_qc": "qc_executor",
+    # 杂项
+    "execute_notification": "misc_executor",
+    "execute_help": "misc_executor",
+    # Shield (SHIELD_AVAILABLE 仅探测 imgutils 是否安装，不真正导入)
+    "execute_shield": "shield_executor",
+    "SHIELD_AVAILABLE": "shield_executor",
+    # 媒体元数据检测
+    "execute_media_probe": "probe_executor",
+}
 
-from .qc_executor import (
-    execute_qc,
-)
 
-from .misc_executor import (
-    execute_notification,
-    execute_help,
-)
+def __getattr__(name):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value  # 缓存，之后的访问不再经过 __getattr__
+    return value
 
-# Shield 执行器 (始终导入，内部通过 SHIELD_AVAILABLE 标志控制可用性)
-from .shield_executor import execute_shield, SHIELD_AVAILABLE
 
-# 媒体元数据检测执行器
-from .probe_executor import execute_media_probe
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_EXPORTS))
 
 
 __all__ = [
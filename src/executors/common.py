@@ -2,9 +2,25 @@
 """
 执行器共用模块：包含各执行器共享的辅助函数。
 """
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import List, Optional, Tuple
 
 from colorama import Fore, Style
 
+# 标题栏分隔线
+_RULE = "=" * 50
+
+# 覆盖模式删除原文件的并发数 (删除主要耗时在系统调用延迟，多线程可并行发出)
+DELETE_MAX_WORKERS = 8
+
+
+@lru_cache(maxsize=None)
+def _task_banner(task_name: str) -> str:
+    """构建并缓存任务标题栏文本 (任务名称集合固定，每个只格式化一次)。"""
+    return f"\n{_RULE}\n{Fore.CYAN}【{task_name}】{Style.RESET_ALL}\n{_RULE}\n"
+
 
 def print_task_header(task_name: str):
     """
@@ -13,28 +29,64 @@ def print_task_header(task_name: str):
     Args:
         task_name: 任务名称
     """
-    print(f"\n{'='*50}")
-    print(f"{Fore.CYAN}【{task_name}】{Style.RESET_ALL}")
-    print(f"{'='*50}\n")
+    # 单次写入，避免重定向的 stdout 将标题栏拆成多条日志
+    print(_task_banner(task_name), flush=True)
 
 
-def parse_comma_list(value: str, prefix: str = '') -> set:
+@lru_cache(maxsize=128)
+def parse_comma_list(value: str, prefix: str = '') -> frozenset:
     """
-    解析逗号分隔的字符串为集合。
+    解析逗号分隔的字符串为集合 (结果不可变，按参数缓存，重复运行时直接复用)。
     
     Args:
         value: 逗号分隔的字符串 (如 "mkv,webm,flv")
         prefix: 可选前缀 (如 "." 用于扩展名)
     
     Returns:
-        处理后的集合
+        处理后的不可变集合
     """
-    if not value or not value.strip():
-        return set()
-    
-    items = [item.strip().lower() for item in value.split(',') if item.strip()]
-    
-    if prefix:
-        items = [f"{prefix}{item}" if not item.startswith(prefix) else item for item in items]
-    
-    return set(items)
+    if not value:
+        return frozenset()
+
+    def normalized():
+        for raw in value.split(','):
+            item = raw.strip().lower()
+            if not item:
+                continue
+            yield item if not prefix or item.startswith(prefix) else prefix + item
+
+    return frozenset(normalized())
+
+
+def try_remove(path: str) -> Optional[Exception]:
+    """
+    删除单个文件，不抛出异常。
+
+    Args:
+        path: 文件路径
+
+    Returns:
+        删除成功返回 None，失败返回异常对象
+    """
+    try:
+        os.remove(path)
+        return None
+    except Exception as e:
+        return e
+
+
+def remove_files(paths: List[str], max_workers: int = DELETE_MAX_WORKERS) -> List[Tuple[str, Optional[Exception]]]:
+    """
+    并发删除多个文件。
+
+    Args:
+        paths: 待删除的文件路径列表
+        max_workers: 并发删除线程数
+
+    Returns:
+        [(路径, 异常或 None)]，顺序与输入一致
+    """
+    if not paths:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(paths)))) as pool:
+        return list(zip(paths, pool.map(try_remove, paths)))
@@ -3,14 +3,47 @@
 文件执行器模块：包含封装转换、图片转换相关执行函数。
 """
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 from colorama import Fore, Style
 
-from ..core import build_remux_command, run_ffmpeg_command
+from ..core import build_remux_command, run_ffmpeg_batch
 from ..presets import REMUX_PRESETS, IMAGE_FORMATS, AUDIO_TRACK_OPTIONS, SUBTITLE_TRACK_OPTIONS
-from ..utils import auto_generate_output_path
+from ..utils import auto_generate_output_path, dedupe_paths, make_unique_path
 from ..image_converter import batch_convert_images
-from .common import print_task_header
+from .common import print_task_header, try_remove, remove_files, DELETE_MAX_WORKERS
+
+
+# 时间戳常不完整的输入容器，转封装时由 FFmpeg 补全 pts
+GENPTS_INPUT_EXTENSIONS = frozenset({".avi", ".mpg", ".mpeg", ".vob"})
+
+# 支持将 moov 索引前置 (+faststart) 的输出容器
+FASTSTART_EXTENSIONS = frozenset({".mp4", ".mov", ".m4v"})
+
+
+def default_remux_workers() -> int:
+    """默认并发转封装数: CPU 核心数的一半 (流复制主要受磁盘 IO 限制)。"""
+    return max(1, (os.cpu_count() or 2) // 2)
+
+
+def _remux_command(input_path, output_path, remux_kwargs):
+    """
+    构建单个文件的转封装命令 (时间戳常不完整的输入容器补全 pts)。
+
+    Args:
+        input_path: 输入路径
+        output_path: 输出路径 (本批次内唯一)
+        remux_kwargs: 传给 build_remux_command 的流选择参数
+
+    Returns:
+        FFmpeg 命令列表
+    """
+    input_args = None
+    if os.path.splitext(input_path)[1].lower() in GENPTS_INPUT_EXTENSIONS:
+        input_args = ["-fflags", "+genpts"]
+    return build_remux_command(
+        input_path=input_path, output_path=output_path, input_args=input_args, **remux_kwargs,
+    )
 
 
 def execute_remux(args):
@@ -36,6 +69,7 @@ def execute_remux(args):
         extension = preset.get("extension", ".mp4")
         
     overwrite = getattr(args, 'remux_overwrite', False)
+    faststart = getattr(args, 'remux_faststart', False) and extension.lower() in FASTSTART_EXTENSIONS
     
     # 解析流选择参数
     audio_track_key = getattr(args, 'remux_audio_tracks', '全部保留')
@@ -50,6 +84,7 @@ def execute_remux(args):
     input_files = args.remux_input
     if isinstance(input_files, str):
         input_files = [input_files]
+    input_files = dedupe_paths(input_files)
     
     output_dir = args.remux_output if args.remux_output else None
     
@@ -71,55 +106,81 @@ def execute_remux(args):
             print(f"[字幕] 不保留")
         else:
             print(f"[字幕] 仅保留 #{subtitle_tracks}")
+    if faststart:
+        print("[快速启动] 索引前置 (+faststart)，便于网络播放边下边播")
     if overwrite:
         print(f"{Fore.YELLOW}[警告] 覆盖模式已开启，原文件将被删除{Style.RESET_ALL}")
     print("-" * 50)
 
-    success_count = 0
-    fail_count = 0
-    files_to_delete = []  # 成功后需要删除的原文件
+    deleted_count = 0
+    total = len(input_files)
 
+    # 生成输出路径；不同目录的同名文件输出到同一目录时追加序号，避免互相覆盖
+    output_suffix = "_remux" + extension
+    jobs = []
+    taken_outputs = set()
+    same_file = set()
     for i, input_path in enumerate(input_files, 1):
-        print(f"\n[{i}/{len(input_files)}] 处理: {os.path.basename(input_path)}")
-        
-        # 生成输出路径
         if output_dir:
-            basename = os.path.splitext(os.path.basename(input_path))[0]
-            output_path = os.path.join(output_dir, basename + "_remux" + extension)
+            stem = os.path.splitext(os.path.basename(input_path))[0]
+            output_path = os.path.join(output_dir, stem + output_suffix)
         else:
             output_path = auto_generate_output_path(input_path, "_remux", extension)
-        
-        print(f"[输出] {output_path}")
-
-        cmd = build_remux_command(
-            input_path=input_path,
-            output_path=output_path,
-            audio_tracks=audio_tracks,
-            audio_tracks_custom=audio_tracks_custom,
-            subtitle_tracks=subtitle_tracks,
-            subtitle_tracks_custom=subtitle_tracks_custom,
+        output_path = make_unique_path(output_path, taken_outputs)
+        if os.path.normpath(input_path) == os.path.normpath(output_path):
+            same_file.add(i)
+        jobs.append((i, input_path, output_path))
+
+    remux_kwargs = dict(
+        audio_tracks=audio_tracks,
+        audio_tracks_custom=audio_tracks_custom,
+        subtitle_tracks=subtitle_tracks,
+        subtitle_tracks_custom=subtitle_tracks_custom,
+        output_args=["-movflags", "+faststart"] if faststart else None,
+    )
+    max_workers = getattr(args, 'remux_threads', 0) or default_remux_workers()
+    max_workers = max(1, min(max_workers, len(jobs) or 1))
+    if max_workers > 1:
+        print(f"[并发] 同时处理 {max_workers} 个文件")
+
+    # 并发执行，每个任务完成后整体输出其日志；日志在任务结束后才输出，
+    # 逐帧统计行没有实时意义，以静默模式执行只保留错误信息
+    # 覆盖模式：每个文件成功后立即提交到删除线程池，删除与剩余转换重叠进行
+    delete_futures = []
+    with ThreadPoolExecutor(max_workers=DELETE_MAX_WORKERS) as delete_pool:
+        def on_result(index, result):
+            i, input_path, _ = jobs[index]
+            if result == 0 and overwrite and i not in same_file:
+                delete_futures.append((input_path, delete_pool.submit(try_remove, input_path)))
+
+        results = run_ffmpeg_batch(
+            [_remux_command(input_path, output_path, remux_kwargs) for _, input_path, output_path in jobs],
+            max_concurrent=max_workers,
+            quiet=True,
+            headers=[
+                f"[{i}/{total}] 处理: {os.path.basename(input_path)}\n[输出] {output_path}"
+                for i, input_path, output_path in jobs
+            ],
+            on_result=on_result,
         )
+    success_count = results.count(0)
+    fail_count = len(results) - success_count
 
-        result = run_ffmpeg_command(cmd)
-        if result == 0:
-            success_count += 1
-            if overwrite and os.path.normpath(input_path) != os.path.normpath(output_path):
-                files_to_delete.append(input_path)
+    # 删除结果与汇总收集后一次性输出
+    lines = []
+    for input_path, future in delete_futures:
+        error = future.result()
+        if error is None:
+            deleted_count += 1
+            lines.append(f"{Fore.YELLOW}[覆盖模式]{Style.RESET_ALL} ✓ 已删除原文件: {os.path.basename(input_path)}")
         else:
-            fail_count += 1
+            lines.append(f"{Fore.YELLOW}[覆盖模式]{Style.RESET_ALL} ✗ 删除失败: {os.path.basename(input_path)} - {error}")
 
-    # 覆盖模式：删除原文件
-    if overwrite and files_to_delete:
-        print(f"\n{Fore.YELLOW}[覆盖模式] 删除 {len(files_to_delete)} 个原文件...{Style.RESET_ALL}")
-        for f in files_to_delete:
-            try:
-                os.remove(f)
-                print(f"  ✓ 已删除: {os.path.basename(f)}")
-            except Exception as e:
-                print(f"  ✗ 删除失败: {os.path.basename(f)} - {e}")
-
-    print(f"\n{'='*50}")
-    print(f"批量转换完成: 成功 {success_count} 个, 失败 {fail_count} 个")
+    lines.append(f"\n{'='*50}")
+    lines.append(f"批量转换完成: 成功 {success_count} 个, 失败 {fail_count} 个")
+    if overwrite:
+        lines.append(f"已删除原文件: {deleted_count} 个")
+    print("\n".join(lines), flush=True)
 
 
 def execute_image_convert(args):
@@ -135,6 +196,7 @@ def execute_image_convert(args):
     input_files = args.img_input
     if isinstance(input_files, str):
         input_files = [input_files]
+    input_files = dedupe_paths(input_files)
 
     # 确定目标格式
     format_preset = getattr(args, 'img_format', 'PNG (无损)')
@@ -161,27 +223,31 @@ def execute_image_convert(args):
     if overwrite:
         print(f"{Fore.YELLOW}[警告] 覆盖模式已开启，原文件将被删除{Style.RESET_ALL}")
 
+    converted = [] if overwrite else None
     success, fail, skipped, errors = batch_convert_images(
         input_paths=input_files,
         output_dir=output_dir,
         target_extension=target_ext,
         quality=quality,
         skip_same_format=skip_same,
+        converted=converted,
     )
 
     # 覆盖模式：删除成功转换的原文件
-    if overwrite and success > 0:
+    if overwrite and converted:
         print(f"\n{Fore.YELLOW}[覆盖模式] 删除原文件...{Style.RESET_ALL}")
         deleted_count = 0
-        for input_path in input_files:
-            # 只删除成功转换的，且新旧文件扩展名不同的
-            input_ext = os.path.splitext(input_path)[1].lower()
-            if input_ext != target_ext.lower():
-                try:
-                    os.remove(input_path)
-                    deleted_count += 1
-                except Exception as e:
-                    print(f"  ✗ 删除失败: {os.path.basename(input_path)} - {e}")
+        # 只删除确实转换成功、且新旧扩展名不同的原文件，并发删除
+        target_ext_lower = target_ext.lower()
+        to_delete = [
+            p for p in converted
+            if os.path.splitext(p)[1].lower() != target_ext_lower
+        ]
+        for input_path, error in remove_files(to_delete):
+            if error is None:
+                deleted_count += 1
+            else:
+                print(f"  ✗ 删除失败: {os.path.basename(input_path)} - {error}")
         if deleted_count > 0:
             print(f"  ✓ 已删除 {deleted_count} 个原文件")
 
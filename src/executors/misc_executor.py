@@ -2,6 +2,8 @@
 """
 杂项执行器模块：包含通知设置、使用说明相关执行函数。
 """
+from functools import lru_cache
+
 from colorama import Fore, Style
 
 from ..notify import send_feishu_notification, send_webhook_notification, FEISHU_COLORS
@@ -27,9 +29,11 @@ def execute_notification(args):
     print_task_header("通知设置")
 
     # 显示配置加载状态
-    print(f"\n[配置文件信息]")
-    print(f"  路径: {NOTIFY_CONFIG_FILE}")
-    print(f"  加载状态: {'✓ 已加载' if is_config_loaded() else '✗ 未加载 (使用默认配置)'}")
+    print(
+        f"\n[配置文件信息]\n"
+        f"  路径: {NOTIFY_CONFIG_FILE}\n"
+        f"  加载状态: {'✓ 已加载' if is_config_loaded() else '✗ 未加载 (使用默认配置)'}"
+    )
     
     # 处理删除配置请求
     if getattr(args, 'delete_notify_config', False):
@@ -39,13 +43,16 @@ def execute_notification(args):
         print("配置文件已删除，下次启动将使用默认设置")
         return
 
+    # 颜色显示名称只解析一次，配置与测试发送共用
+    feishu_color = FEISHU_COLORS.get(args.feishu_color, "blue")
+
     # 更新配置
     new_config = {
         "enabled": getattr(args, 'enable_auto_notify', False),
         "feishu_webhook": args.feishu_webhook,
         "feishu_title": args.feishu_title,
         "feishu_content": args.feishu_content,
-        "feishu_color": FEISHU_COLORS.get(args.feishu_color, "blue"),
+        "feishu_color": feishu_color,
         "webhook_url": args.webhook_url,
         "webhook_headers": args.webhook_headers,
         "webhook_body": args.webhook_body,
@@ -56,12 +63,15 @@ def execute_notification(args):
     config = get_notify_config()
     
     # 显示配置状态
-    print(f"\n[当前配置]")
-    print(f"  自动通知: {'✓ 已启用' if config['enabled'] else '✗ 未启用'}")
+    status_lines = [
+        "\n[当前配置]",
+        f"  自动通知: {'✓ 已启用' if config['enabled'] else '✗ 未启用'}",
+    ]
     if config["feishu_webhook"]:
-        print(f"  飞书 Webhook: 已配置")
+        status_lines.append("  飞书 Webhook: 已配置")
     if config["webhook_url"]:
-        print(f"  自定义 Webhook: 已配置")
+        status_lines.append("  自定义 Webhook: 已配置")
+    print("\n".join(status_lines))
     
     # 保存配置
     if getattr(args, 'save_notify_config', False):
@@ -77,7 +87,7 @@ def execute_notification(args):
             webhook_url=args.feishu_webhook,
             title=args.feishu_title,
             content=args.feishu_content,
-            color=FEISHU_COLORS.get(args.feishu_color, "blue"),
+            color=feishu_color,
         )
         if result:
             success_count += 1
@@ -107,6 +117,13 @@ def execute_notification(args):
         print(f"\n{Fore.GREEN}✓ 自动通知已启用，其他任务完成后将自动发送通知{Style.RESET_ALL}")
 
 
+@lru_cache(maxsize=None)
+def _help_page(topic: str) -> str:
+    """构建并缓存完整的说明页 (标题 + 正文)，重复查看同一主题时直接复用。"""
+    rule = "=" * 50
+    return f"\n{rule}\n📖 {topic} 使用说明\n{rule}\n\n{get_help_text(topic)}"
+
+
 def execute_help(args):
     """
     执行使用说明显示。
@@ -117,10 +134,5 @@ def execute_help(args):
     print_task_header("使用说明")
 
     topic = getattr(args, 'help_topic', '视频压制')
-    
-    help_content = get_help_text(topic)
-    
-    print(f"\n{'='*50}")
-    print(f"📖 {topic} 使用说明")
-    print(f"{'='*50}\n")
-    print(help_content)
+
+    print(_help_page(topic), flush=True)
@@ -3,6 +3,7 @@
 元数据检测执行器：使用 ffprobe 探测媒体文件元数据并输出报告。
 """
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 from colorama import Fore, Style
 
@@ -15,6 +16,10 @@ from ..media_probe import (
 from .common import print_task_header
 
 
+# 并发 ffprobe 进程数 (探测耗时主要在进程启动与文件 IO，线程池即可)
+PROBE_MAX_WORKERS = 5
+
+
 def execute_media_probe(args):
     """
     执行媒体元数据检测任务。
@@ -68,17 +73,18 @@ def execute_media_probe(args):
     print(f"[文件数量] {len(input_files)}")
     print("-" * 50)
 
-    # 逐个探测并打印报告
+    # 并发探测，按输入顺序打印报告
     results = []
-    for i, file_path in enumerate(input_files, 1):
-        print(f"\n{Fore.CYAN}[{i}/{len(input_files)}] 正在分析: {os.path.basename(file_path)}{Style.RESET_ALL}")
-
-        info = probe_detailed(file_path)
-        if info:
-            results.append(info)
-            # 控制台实时打印报告
-            report = format_media_report(info)
-            print(report)
+    with ThreadPoolExecutor(max_workers=PROBE_MAX_WORKERS) as pool:
+        probed = pool.map(probe_detailed, input_files)
+        for i, (file_path, info) in enumerate(zip(input_files, probed), 1):
+            print(f"\n{Fore.CYAN}[{i}/{len(input_files)}] 正在分析: {os.path.basename(file_path)}{Style.RESET_ALL}")
+
+            if info:
+                results.append(info)
+                # 控制台实时打印报告
+                report = format_media_report(info)
+                print(report)
 
     # 保存报告文件（如果指定了输出路径）
     report_output = getattr(args, 'probe_report_output', '')
@@ -5,18 +5,15 @@ Shield 执行器模块：包含露骨图片识别相关执行函数。
 该模块依赖 imgutils 库，仅在可用时才能导入。
 """
 import os
+from importlib.util import find_spec
 
 from colorama import Fore, Style
 
 from .common import print_task_header
 
 
-# 条件导入 imgutils
-try:
-    from imgutils.validate import anime_rating
-    SHIELD_AVAILABLE = True
-except ImportError:
-    SHIELD_AVAILABLE = False
+# 仅探测 imgutils 是否已安装，不在启动时真正导入 (其依赖的 onnxruntime 等导入开销很大)
+SHIELD_AVAILABLE = find_spec("imgutils") is not None
 
 
 def execute_shield(args):
@@ -32,11 +29,18 @@ def execute_shield(args):
         print(f"{Fore.RED}[错误] Shield 功能不可用，请使用 Shield 增强版{Style.RESET_ALL}")
         return
     
-    from ..nsfw_detect import (
-        scan_directory as shield_scan_directory,
-        scan_files as shield_scan_files,
-        generate_report as shield_generate_report,
-    )
+    # 启动时只探测了 imgutils 是否安装；此处真正导入，依赖 (onnxruntime/DLL 等) 损坏时给出提示
+    try:
+        from imgutils.validate import anime_rating  # noqa: F401
+        from ..nsfw_detect import (
+            scan_directory as shield_scan_directory,
+            scan_files as shield_scan_files,
+            generate_report as shield_generate_report,
+        )
+    except (ImportError, OSError) as e:
+        print(f"{Fore.RED}[错误] Shield 功能不可用，依赖加载失败: {e}{Style.RESET_ALL}")
+        print("请重新安装 Shield 增强版或检查 onnxruntime 运行库")
+        return
     from ..presets import SHIELD_THRESHOLDS, SHIELD_CENSOR_TYPES
     
     # 获取参数
@@ -3,6 +3,7 @@
 视频执行器模块：包含视频压制、音频替换、音视频抽取相关执行函数。
 """
 import os
+import threading
 
 from colorama import Fore, Style
 
@@ -12,8 +13,12 @@ from ..core import (
     build_replace_audio_command,
     build_extract_audio_command,
     build_extract_video_command,
+    merge_output_commands,
     run_ffmpeg_command,
     run_2pass_encode,
+    get_encoder_capabilities,
+    make_progress_parser,
+    encoder_family,
 )
 from ..compat_encoder import run_compat_encode
 from ..presets import (
@@ -22,10 +27,10 @@ from ..presets import (
     ENCODERS,
     RATE_CONTROL_MODES,
     EXTRACT_MODES,
+    PRESET_ENCODE_DEFAULTS,
 )
 from ..utils import generate_output_path, auto_generate_output_path
 from ..post_transfer import transfer_file
-from ..presets import POST_TRANSFER_MODES
 from ..encode_params import (
     EncodeParams,
     EncodeMode,
@@ -89,6 +94,7 @@ def execute_encode(args) -> int:
             audio_bitrate=params.audio_bitrate,
             extra_args=params.extra_args,
             rc_mode=params.rc_mode,
+            threads=params.threads or None,
             dry_run=params.dry_run,
         )
     
@@ -98,7 +104,7 @@ def execute_encode(args) -> int:
             input_path=params.input_path,
             output_path=params.output_path,
             preset_name=params.preset_name,
-            encoder=args.encoder if params.is_custom else None,
+            encoder=params.encoder if params.is_custom else None,
             bitrate=params.bitrate,
             speed_preset=params.speed_preset,
             resolution=params.resolution,
@@ -111,16 +117,17 @@ def execute_encode(args) -> int:
             audio_tracks_custom=params.audio_tracks_custom,
             subtitle_tracks=params.subtitle_tracks,
             subtitle_tracks_custom=params.subtitle_tracks_custom,
+            threads=params.threads or None,
         )
         return_code = run_2pass_encode(pass1_cmd, pass2_cmd, dry_run=params.dry_run)
     
     else:
         # 普通编码模式
-        cmd = build_encode_command(
+        encode_kwargs = dict(
             input_path=params.input_path,
             output_path=params.output_path,
             preset_name=params.preset_name,
-            encoder=args.encoder if params.is_custom else None,
+            encoder=params.encoder if params.is_custom else None,
             crf=params.crf if params.is_custom else None,
             bitrate=params.bitrate,
             speed_preset=params.speed_preset,
@@ -135,27 +142,107 @@ def execute_encode(args) -> int:
             audio_tracks_custom=params.audio_tracks_custom,
             subtitle_tracks=params.subtitle_tracks,
             subtitle_tracks_custom=params.subtitle_tracks_custom,
+            hw_decode=params.hw_decode,
+            threads=params.threads or None,
+        )
+        # 界面提供进度回调时输出结构化进度 (-progress pipe:1)，不再依赖抓取统计行
+        progress_callback = getattr(args, 'progress_callback', None)
+        if progress_callback:
+            encode_kwargs["progress"] = True
+            progress_callback = make_progress_parser(progress_callback)
+        cmd = build_encode_command(**encode_kwargs)
+        if not params.dry_run:
+            _warn_if_encoder_missing(cmd)
+
+        # 硬件编码器初始化失败时改用 libx264
+        fallback = None
+        if params.auto_fallback and _is_hardware_encoder(cmd):
+            fallback = lambda: build_encode_command(**_cpu_fallback_kwargs(params, encode_kwargs))
+        return_code = run_ffmpeg_command(
+            cmd, progress_callback=progress_callback, dry_run=params.dry_run, fallback=fallback,
         )
-        return_code = run_ffmpeg_command(cmd, dry_run=params.dry_run)
     
     # 压制后分发
-    _post_transfer(args, params.output_path, return_code)
+    _post_transfer(params, return_code)
     
     return return_code
 
 
-def _post_transfer(args, output_path: str, return_code: int) -> None:
+def _warn_if_encoder_missing(cmd) -> None:
+    """
+    编码器未编译进当前 FFmpeg 时提前给出提示 (编码器列表未知时不提示)。
+
+    Args:
+        cmd: FFmpeg 命令列表
+    """
+    if "-c:v" not in cmd:
+        return
+    encoder = cmd[cmd.index("-c:v") + 1]
+    if encoder == "copy":
+        return
+
+    def check():
+        capabilities = get_encoder_capabilities()
+        if capabilities and encoder not in capabilities:
+            print(f"{Fore.YELLOW}[警告] 当前 FFmpeg 不包含编码器 {encoder}，编码可能失败{Style.RESET_ALL}", flush=True)
+
+    # 编码器列表已缓存时直接检查；否则放到后台线程探测，不阻塞压制启动
+    if get_encoder_capabilities.cache_info().currsize:
+        check()
+    else:
+        threading.Thread(target=check, daemon=True).start()
+
+
+def _cpu_fallback_kwargs(params: EncodeParams, encode_kwargs: dict) -> dict:
+    """
+    构建改用 libx264 的替代命令参数。
+
+    按自定义模式构建，不再套用预设: 预设中的 NVENC 专属额外参数 (-rc vbr、-b:v 0 等)
+    和 N卡速度档位对 x264 无效甚至导致失败。质量值沿用预设的 CQ/CRF，
+    分辨率、帧率与音频码率仍取预设值。
+
+    Args:
+        params: 编码参数对象
+        encode_kwargs: 原命令的 build_encode_command 参数
+
+    Returns:
+        替代命令的 build_encode_command 参数
+    """
+    kwargs = {
+        **encode_kwargs,
+        "preset_name": None,
+        "encoder": "libx264",
+        "crf": params.crf,
+        "speed_preset": "medium",
+        "hw_decode": False,
+    }
+    preset = None if params.is_custom else PRESET_ENCODE_DEFAULTS.get(params.preset_name)
+    if preset:
+        kwargs["resolution"] = kwargs["resolution"] or preset["resolution"]
+        if kwargs["fps"] is None:
+            kwargs["fps"] = preset["fps"]
+        kwargs["audio_bitrate"] = kwargs["audio_bitrate"] or preset["audio_bitrate"]
+    return kwargs
+
+
+def _is_hardware_encoder(cmd) -> bool:
+    """判断命令的视频编码器是否为硬件编码器 (NVENC/QSV/AMF)。"""
+    if "-c:v" not in cmd:
+        return False
+    return encoder_family(cmd[cmd.index("-c:v") + 1]) != "cpu"
+
+
+def _post_transfer(params: EncodeParams, return_code: int) -> None:
     """
     压制完成后执行文件分发。
     
     Args:
-        args: argparse 解析后的参数对象
-        output_path: 成品文件路径
+        params: 编码参数 (含成品路径与分发设置)
         return_code: 编码返回码 (0 表示成功)
     """
-    transfer_mode_name = getattr(args, 'post_transfer_mode', '不分发')
-    transfer_mode = POST_TRANSFER_MODES.get(transfer_mode_name, 'none')
-    transfer_dir = getattr(args, 'post_transfer_dir', '')
+    output_path = params.output_path
+    transfer_mode = params.post_transfer_mode
+    transfer_dir = params.post_transfer_dir
 
     if transfer_mode == 'none' or not transfer_dir:
         return
@@ -213,6 +300,7 @@ def execute_extract_av(args):
     # 获取抽取模式
     extract_mode_key = getattr(args, 'extract_mode', '仅音频')
     extract_mode = EXTRACT_MODES.get(extract_mode_key, 'audio_only')
+    cmds = []
 
     # ---- 音频抽取逻辑 ----
     if extract_mode in ("audio_only", "both"):
@@ -241,7 +329,7 @@ def execute_extract_av(args):
             audio_encoder=AUDIO_ENCODERS.get(args.extract_encoder, "aac"),
             audio_bitrate=args.extract_bitrate,
         )
-        run_ffmpeg_command(cmd)
+        cmds.append(cmd)
 
     # ---- 视频抽取逻辑 ----
     if extract_mode in ("video_only", "both"):
@@ -260,4 +348,10 @@ def execute_extract_av(args):
             input_path=args.extract_input,
             output_path=video_output,
         )
-        run_ffmpeg_command(cmd)
+        cmds.append(cmd)
+
+    # 同时抽取音频和视频时合并为一条多输出命令，输入只读取一次
+    if len(cmds) > 1:
+        run_ffmpeg_command(merge_output_commands(cmds))
+    elif cmds:
+        run_ffmpeg_command(cmds[0])
@@ -6,6 +6,7 @@ GUI 配置模块：包含 PyQt6 GUI 的配置常量和图标获取函数。
 主窗口配置已迁移至 src/ui/main_window.py 和 src/ui/theme.py。
 """
 import os
+from functools import lru_cache
 
 from .utils import get_base_dir, get_internal_dir
 
@@ -17,9 +18,10 @@ from ._version import __version__ as VERSION
 DEFAULT_SIZE = (960, 720)
 
 
+@lru_cache(maxsize=1)
 def get_icon_path():
     """
-    获取图标路径 (可选)。
+    获取图标路径 (可选)。结果在进程内缓存。
 
     Returns:
         图标文件的绝对路径，如果未找到则返回 None
@@ -34,6 +34,15 @@ from .presets import (
 from .notify import FEISHU_COLORS
 
 
+# 文件选择器通配符 (多个标签页共用)
+_WC_VIDEO = "视频文件 (*.mp4;*.mov;*.avi;*.mkv)|*.mp4;*.mov;*.avi;*.mkv|所有文件 (*.*)|*.*"
+_WC_AUDIO = "音频文件 (*.mp3;*.aac;*.wav;*.flac;*.m4a)|*.mp3;*.aac;*.wav;*.flac;*.m4a|所有文件 (*.*)|*.*"
+_WC_SUB = "字幕文件 (*.srt;*.ass;*.ssa)|*.srt;*.ass;*.ssa|所有文件 (*.*)|*.*"
+_WC_MP4_MKV = "MP4 文件 (*.mp4)|*.mp4|MKV 文件 (*.mkv)|*.mkv|所有文件 (*.*)|*.*"
+_WC_MP4 = "MP4 文件 (*.mp4)|*.mp4|所有文件 (*.*)|*.*"
+_WC_TEXT = "文本文件 (*.txt)|*.txt|所有文件 (*.*)|*.*"
+
+
 def register_encode_tab(subs) -> None:
     """注册视频压制标签页。"""
     encode_parser = subs.add_parser(
@@ -52,7 +61,7 @@ def register_encode_tab(subs) -> None:
         metavar="输入视频",
         required=True,
         widget="FileChooser",
-        gooey_options={"wildcard": "视频文件 (*.mp4;*.mov;*.avi;*.mkv)|*.mp4;*.mov;*.avi;*.mkv|所有文件 (*.*)|*.*"},
+        gooey_options={"wildcard": _WC_VIDEO},
         help="选择要处理的视频文件（支持将文件直接拖动到输入框）",
     )
     io_group.add_argument(
@@ -61,14 +70,14 @@ def register_encode_tab(subs) -> None:
         required=False,
         default="",
         widget="FileSaver",
-        gooey_options={"wildcard": "MP4 文件 (*.mp4)|*.mp4|MKV 文件 (*.mkv)|*.mkv|所有文件 (*.*)|*.*"},
+        gooey_options={"wildcard": _WC_MP4_MKV},
         help="留空则自动生成: 输入文件名_编码器.mp4",
     )
     io_group.add_argument(
         "--subtitle",
         metavar="字幕文件 (可选)",
         widget="FileChooser",
-        gooey_options={"wildcard": "字幕文件 (*.srt;*.ass;*.ssa)|*.srt;*.ass;*.ssa|所有文件 (*.*)|*.*"},
+        gooey_options={"wildcard": _WC_SUB},
         help="选择要烧录的字幕文件 (留空则不烧录)",
     )
     io_group.add_argument(
@@ -325,7 +334,7 @@ def register_replace_audio_tab(subs) -> None:
         metavar="原始视频",
         required=True,
         widget="FileChooser",
-        gooey_options={"wildcard": "视频文件 (*.mp4;*.mov;*.avi;*.mkv)|*.mp4;*.mov;*.avi;*.mkv|所有文件 (*.*)|*.*"},
+        gooey_options={"wildcard": _WC_VIDEO},
         help="选择原始视频文件",
     )
     audio_io.add_argument(
@@ -333,7 +342,7 @@ def register_replace_audio_tab(subs) -> None:
         metavar="新音频文件",
         required=True,
         widget="FileChooser",
-        gooey_options={"wildcard": "音频文件 (*.mp3;*.aac;*.wav;*.flac;*.m4a)|*.mp3;*.aac;*.wav;*.flac;*.m4a|所有文件 (*.*)|*.*"},
+        gooey_options={"wildcard": _WC_AUDIO},
         help="选择要替换的新音频文件",
     )
     audio_io.add_argument(
@@ -342,7 +351,7 @@ def register_replace_audio_tab(subs) -> None:
         required=False,
         default="",
         widget="FileSaver",
-        gooey_options={"wildcard": "MP4 文件 (*.mp4)|*.mp4|所有文件 (*.*)|*.*"},
+        gooey_options={"wildcard": _WC_MP4},
         help="留空则自动生成: [原视频名]_replaced.mp4",
     )
 
@@ -499,7 +508,7 @@ def register_qc_tab(subs) -> None:
         required=False,
         default="",
         widget="FileSaver",
-        gooey_options={"wildcard": "文本文件 (*.txt)|*.txt|所有文件 (*.*)|*.*"},
+        gooey_options={"wildcard": _WC_TEXT},
         help="留空则自动生成: [扫描目录内]/QC_报告.txt",
     )
 
@@ -627,7 +636,7 @@ def register_extract_av_tab(subs) -> None:
         required=False,
         default="",
         widget="FileSaver",
-        gooey_options={"wildcard": "MP4 文件 (*.mp4)|*.mp4|MKV 文件 (*.mkv)|*.mkv|所有文件 (*.*)|*.*"},
+        gooey_options={"wildcard": _WC_MP4_MKV},
         help="留空则自动生成: [原视频名]_noaudio.[ext]",
     )
 
@@ -919,7 +928,7 @@ def register_folder_creator_tab(subs) -> None:
         metavar="TXT 文件",
         required=True,
         widget="FileChooser",
-        gooey_options={"wildcard": "文本文件 (*.txt)|*.txt|所有文件 (*.*)|*.*"},
+        gooey_options={"wildcard": _WC_TEXT},
         help="选择包含文件夹名称的 TXT 文件，每行一个名称",
     )
     folder_io.add_argument(
@@ -1151,7 +1160,7 @@ def register_shield_tab(subs, shield_available: bool = True) -> None:
         "--shield-report",
         metavar="报告路径 (可选)",
         widget="FileSaver",
-        gooey_options={"wildcard": "文本文件 (*.txt)|*.txt|所有文件 (*.*)|*.*"},
+        gooey_options={"wildcard": _WC_TEXT},
         default="",
         help="留空则自动生成: [输出目录]/shield_report.txt",
     )
@@ -1264,7 +1273,7 @@ def register_media_probe_tab(subs) -> None:
         "--probe-report-output",
         metavar="报告输出路径 (可选)",
         widget="FileSaver",
-        gooey_options={"wildcard": "文本文件 (*.txt)|*.txt|所有文件 (*.*)|*.*"},
+        gooey_options={"wildcard": _WC_TEXT},
         default="",
         help="留空则仅在控制台显示，填写则额外保存 TXT 报告",
     )
@@ -35,6 +35,10 @@ HELP_TEXTS = {
 • 编码速度: ultrafast → veryslow
 • N卡速度档位: p1(最快) → p7(最慢)
   ※ 选择 NVENC 编码器时生效
+• GPU 全流程: CUDA 硬件解码 + 显卡缩放 + NVENC 编码
+  ※ 烧录字幕时自动回退到软件解码
+• 硬件编码失败时改用 CPU: 显卡编码器初始化失败时自动用 libx264 重新编码
+• 编码线程数: 0 为自动；限制后可降低压制时的 CPU 占用
 
 ━━━━━━━━━━ 码率控制 ━━━━━━━━━━
 • CRF/CQ: 恒定质量 (推荐)
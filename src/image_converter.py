@@ -3,9 +3,12 @@
 图片格式转换模块：支持批量图片格式互转。
 """
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import List, Optional, Tuple
 from colorama import Fore, Style
 
+from .utils import make_unique_path
+
 try:
     from PIL import Image
 except ImportError:
@@ -28,6 +31,12 @@ PIL_FORMAT_MAP = {
 # 需要特殊处理的格式 (如 JPEG 不支持 alpha 通道)
 FORMATS_NO_ALPHA = {".jpg", ".jpeg", ".bmp"}
 
+# 批量转换默认并发数: 按 CPU 核心数 (Pillow 编解码时释放 GIL，线程即可并行)
+CONVERT_MAX_WORKERS = min(32, os.cpu_count() or 1)
+
+# 进度行每累计多少条合并输出一次
+LOG_FLUSH_LINES = 16
+
 
 def check_pillow_available() -> bool:
     """检查 Pillow 库是否可用。"""
@@ -124,6 +133,8 @@ def batch_convert_images(
     target_extension: str,
     quality: int = 95,
     skip_same_format: bool = True,
+    max_workers: Optional[int] = None,
+    converted: Optional[List[str]] = None,
 ) -> Tuple[int, int, int, List[str]]:
     """
     批量转换图片格式。
@@ -134,6 +145,8 @@ def batch_convert_images(
         target_extension: 目标扩展名 (如 ".png", ".jpg")
         quality: JPEG/WEBP 质量
         skip_same_format: 跳过与目标格式相同的文件
+        max_workers: 并发转换数 (默认 CONVERT_MAX_WORKERS)
+        converted: 可选列表，成功转换的输入路径会追加到其中 (供覆盖模式只删除这些原文件)
 
     Returns:
         (成功数, 失败数, 跳过数, 错误消息列表)
@@ -164,49 +177,73 @@ def batch_convert_images(
         print(f"已启用: 忽略同格式文件")
     print("-" * 50)
 
+    total = len(input_paths)
+    tasks = []
+    taken_outputs = set()
     for i, input_path in enumerate(input_paths, 1):
         # 跳过同格式文件
-        input_ext = os.path.splitext(input_path)[1]
+        input_base, input_ext = os.path.splitext(input_path)
         input_ext_normalized = _normalize_extension(input_ext)
 
         if skip_same_format and input_ext_normalized == target_ext_normalized:
             print(
-                f"[{i}/{len(input_paths)}] "
+                f"[{i}/{total}] "
                 f"{Fore.YELLOW}[跳过] {os.path.basename(input_path)} "
                 f"已是目标格式 ({target_extension}){Style.RESET_ALL}"
             )
             skip_count += 1
             continue
 
-        # 生成输出路径
-        basename = os.path.splitext(os.path.basename(input_path))[0]
-        
+        # 生成输出路径 (复用上面 splitext 的结果，不再重复拆分路径)
         if output_dir:
+            basename = os.path.basename(input_base)
             output_path = os.path.join(output_dir, basename + target_extension)
         else:
             # 在原文件目录生成
-            input_dir = os.path.dirname(input_path)
-            output_path = os.path.join(input_dir, basename + target_extension)
-        
-        # 避免覆盖原文件
-        if os.path.normpath(input_path) == os.path.normpath(output_path):
-            output_path = os.path.join(
-                os.path.dirname(output_path),
-                basename + "_converted" + target_extension
-            )
-
-        # 转换
-        print(f"[{i}/{len(input_paths)}] {os.path.basename(input_path)} -> {os.path.basename(output_path)}", end=" ")
-        
-        success, msg = convert_image(input_path, output_path, target_format, quality)
-        
-        if success:
-            print(f"{Fore.GREEN}✓{Style.RESET_ALL}")
-            success_count += 1
-        else:
-            print(f"{Fore.RED}✗ {msg}{Style.RESET_ALL}")
-            fail_count += 1
-            errors.append(f"{os.path.basename(input_path)}: {msg}")
+            output_path = input_base + target_extension
+
+        # 避免覆盖原文件 (仅扩展名相同时才可能重名)
+        if input_ext.lower() == target_extension and \
+                os.path.normpath(input_path) == os.path.normpath(output_path):
+            output_path = output_path[:-len(target_extension)] + "_converted" + target_extension
+
+        # 不同目录的同名文件输出到同一目录时追加序号，避免并发写同一文件
+        output_path = make_unique_path(output_path, taken_outputs)
+
+        tasks.append((i, input_path, output_path))
+
+    # 并发转换，按完成顺序输出进度
+    if tasks:
+        workers = max(1, min(max_workers or CONVERT_MAX_WORKERS, len(tasks)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(convert_image, input_path, output_path, target_format, quality):
+                    (i, input_path, output_path)
+                for i, input_path, output_path in tasks
+            }
+            # 进度行按批合并输出，减少重定向日志的写入次数
+            pending_lines = []
+            for future in as_completed(futures):
+                i, input_path, output_path = futures[future]
+                success, msg = future.result()
+                label = f"[{i}/{total}] {os.path.basename(input_path)} -> {os.path.basename(output_path)}"
+
+                if success:
+                    pending_lines.append(f"{label} {Fore.GREEN}✓{Style.RESET_ALL}")
+                    success_count += 1
+                    if converted is not None:
+                        converted.append(input_path)
+                else:
+                    pending_lines.append(f"{label} {Fore.RED}✗ {msg}{Style.RESET_ALL}")
+                    fail_count += 1
+                    errors.append(f"{os.path.basename(input_path)}: {msg}")
+
+                if len(pending_lines) >= LOG_FLUSH_LINES:
+                    print("\n".join(pending_lines), flush=True)
+                    pending_lines.clear()
+
+            if pending_lines:
+                print("\n".join(pending_lines), flush=True)
 
     print("-" * 50)
     summary_parts = [f"成功 {success_count} 个", f"失败 {fail_count} 个"]
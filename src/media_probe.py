@@ -14,7 +14,7 @@ from typing import List, Optional, Dict, Any
 
 from colorama import Fore, Style
 
-from .utils import get_ffprobe_path
+from .utils import get_ffprobe_path, SUBPROCESS_FLAGS
 
 # 常见语言代码到中文名称的映射
 LANGUAGE_NAMES = {
@@ -112,7 +112,7 @@ def probe_detailed(file_path: str) -> Optional[DetailedMediaInfo]:
             text=True,
             encoding='utf-8',
             errors='replace',
-            creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0,
+            creationflags=SUBPROCESS_FLAGS,
         )
 
         if result.returncode != 0:
@@ -129,6 +129,43 @@ def probe_detailed(file_path: str) -> Optional[DetailedMediaInfo]:
         return info
 
 
+def probe_duration(file_path: str) -> float:
+    """
+    仅获取媒体时长 (用于进度计算)。
+
+    只请求 format=duration，ffprobe 读取容器头部即可返回，
+    不枚举流、章节等信息。
+
+    Args:
+        file_path: 文件路径。
+
+    Returns:
+        时长 (秒)，失败时返回 0.0。
+    """
+    cmd = [
+        get_ffprobe_path(),
+        "-v", "error",
+        "-show_entries", "format=duration",
+        "-of", "default=noprint_wrappers=1:nokey=1",
+        file_path
+    ]
+
+    try:
+        result = subprocess.run(
+            cmd,
+            capture_output=True,
+            text=True,
+            encoding='utf-8',
+            errors='replace',
+            creationflags=SUBPROCESS_FLAGS,
+        )
+        if result.returncode != 0:
+            return 0.0
+        return float(result.stdout.strip() or 0)
+    except (OSError, ValueError):
+        return 0.0
+
+
 def _parse_detailed_output(file_path: str, data: Dict[str, Any]) -> DetailedMediaInfo:
     """解析 ffprobe JSON 输出为 DetailedMediaInfo。"""
     info = DetailedMediaInfo(path=file_path)
@@ -3,7 +3,7 @@
 通知模块：支持飞书通知和自定义 Webhook 通知。
 """
 import json
-import requests
+from functools import lru_cache
 from typing import Optional, Dict, Any
 
 from colorama import Fore, Style
@@ -21,6 +21,24 @@ FEISHU_COLORS = {
 }
 
 
+@lru_cache(maxsize=1)
+def _get_http_session():
+    """
+    获取共享的 HTTP 会话。
+
+    连续任务的自动通知复用同一连接池 (keep-alive)，避免每次重新进行 TLS 握手。
+    requests 在首次发送通知时才导入，不拖慢程序启动。
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
 def send_feishu_notification(
     webhook_url: str,
     title: str,
@@ -84,7 +102,7 @@ def send_feishu_notification(
     }
 
     try:
-        response = requests.post(
+        response = _get_http_session().post(
             webhook_url,
             headers={"Content-Type": "application/json"},
             data=json.dumps(message),
@@ -138,6 +156,8 @@ def send_webhook_notification(
         print(f"{Fore.YELLOW}[警告] Webhook URL 为空，跳过发送{Style.RESET_ALL}")
         return False
 
+    import requests
+
     # 解析 Headers
     final_headers = {"Content-Type": "application/json"}
     if headers:
@@ -168,7 +188,7 @@ def send_webhook_notification(
         print(f"  Headers: {json.dumps(final_headers, ensure_ascii=False)}")
         print(f"  Body: {json.dumps(final_body, ensure_ascii=False)}")
 
-        response = requests.post(
+        response = _get_http_session().post(
             url,
             headers=final_headers,
             json=final_body,
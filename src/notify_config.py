@@ -7,6 +7,11 @@ import json
 
 from colorama import Fore, Style
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 from .utils import get_base_dir
 from .notify import send_feishu_notification, send_webhook_notification
 
@@ -26,9 +31,24 @@ _notify_config = {
     "webhook_body": '{"message": "任务完成"}',
 }
 
+# JSON 读写: 优先使用 orjson (可选依赖)，否则回退到标准库；均以 UTF-8 字节读写
+if orjson is not None:
+    _json_loads = orjson.loads
+
+    def _json_dumps(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+else:
+    _json_loads = json.loads
+
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+
 # 配置加载状态
 _notify_config_loaded = False
 
+# 已加载配置文件的指纹 (mtime_ns, size)，文件未变化时跳过重复解析
+_notify_config_fingerprint = None
+
 
 def get_notify_config() -> dict:
     """
@@ -62,29 +82,43 @@ def is_config_loaded() -> bool:
 
 
 def load_notify_config():
-    """加载通知配置文件。"""
-    global _notify_config, _notify_config_loaded
+    """
+    加载通知配置文件。
+
+    若配置文件的修改时间和大小与上次加载时一致，则跳过重新解析。
+    """
+    global _notify_config, _notify_config_loaded, _notify_config_fingerprint
     
     print(f"[配置] 配置文件路径: {NOTIFY_CONFIG_FILE}")
     
-    if os.path.exists(NOTIFY_CONFIG_FILE):
-        try:
-            with open(NOTIFY_CONFIG_FILE, "r", encoding="utf-8") as f:
-                saved = json.load(f)
-                _notify_config.update(saved)
-                _notify_config_loaded = True
-                print(f"{Fore.GREEN}[配置] ✓ 已加载通知配置{Style.RESET_ALL}")
-        except Exception as e:
-            print(f"{Fore.YELLOW}[警告] 加载通知配置失败: {e}{Style.RESET_ALL}")
-    else:
+    try:
+        st = os.stat(NOTIFY_CONFIG_FILE)
+    except OSError:
         print(f"[配置] 未找到配置文件，使用默认设置")
+        return
+
+    fingerprint = (st.st_mtime_ns, st.st_size)
+    if _notify_config_loaded and fingerprint == _notify_config_fingerprint:
+        print(f"[配置] 配置文件未变化，沿用已加载的配置")
+        return
+
+    try:
+        with open(NOTIFY_CONFIG_FILE, "rb") as f:
+            saved = _json_loads(f.read())
+            _notify_config.update(saved)
+            _notify_config_loaded = True
+            _notify_config_fingerprint = fingerprint
+            print(f"{Fore.GREEN}[配置] ✓ 已加载通知配置{Style.RESET_ALL}")
+    except Exception as e:
+        print(f"{Fore.YELLOW}[警告] 加载通知配置失败: {e}{Style.RESET_ALL}")
 
 
 def save_notify_config(config: dict):
     """保存通知配置到文件。"""
     try:
-        with open(NOTIFY_CONFIG_FILE, "w", encoding="utf-8") as f:
-            json.dump(config, f, ensure_ascii=False, indent=2)
+        data = _json_dumps(config)
+        with open(NOTIFY_CONFIG_FILE, "wb") as f:
+            f.write(data)
         print(f"{Fore.GREEN}[配置] 通知配置已保存到 {NOTIFY_CONFIG_FILE}{Style.RESET_ALL}")
     except Exception as e:
         print(f"{Fore.RED}[错误] 保存通知配置失败: {e}{Style.RESET_ALL}")
@@ -97,11 +131,12 @@ def delete_notify_config() -> bool:
     Returns:
         True 删除成功或文件不存在
     """
-    global _notify_config_loaded
+    global _notify_config_loaded, _notify_config_fingerprint
     if os.path.exists(NOTIFY_CONFIG_FILE):
         try:
             os.remove(NOTIFY_CONFIG_FILE)
             _notify_config_loaded = False
+            _notify_config_fingerprint = None
             print(f"{Fore.GREEN}[配置] ✓ 已删除通知配置文件{Style.RESET_ALL}")
             return True
         except Exception as e:
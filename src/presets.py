@@ -93,6 +93,33 @@ QUALITY_PRESETS = {
     }
 }
 
+def _build_preset_encode_defaults() -> dict:
+    """
+    将质量预设展开为 build_encode_command / build_2pass_commands 使用的参数默认值。
+
+    预设合并规则集中在此处计算一次 (导入时)，构建命令时只需查表。
+    """
+    table = {}
+    for name, preset in QUALITY_PRESETS.items():
+        if name == "自定义 (Custom)":
+            continue
+        table[name] = {
+            "encoder": preset.get("encoder"),
+            # 预设中的 cq 优先于 crf (NVENC 预设)
+            "cq": preset.get("cq"),
+            "crf": preset.get("crf"),
+            "speed_preset": preset.get("preset"),
+            "resolution": preset.get("resolution"),
+            "fps": preset.get("fps"),
+            "audio_bitrate": preset.get("audio_bitrate", "192k"),
+            "extra_args": preset.get("extra_args"),
+        }
+    return table
+
+
+# 预设名称 -> 命令构建参数默认值 (不含 "自定义")
+PRESET_ENCODE_DEFAULTS = _build_preset_encode_defaults()
+
 # 音频编码器
 AUDIO_ENCODERS = {
     "AAC (推荐)": "aac",
@@ -5,12 +5,26 @@
 import json
 import os
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
-from typing import List, Optional, Dict, Any, Tuple
+from typing import List, Optional, Dict, Any
 
 from colorama import Fore, Style
 
-from .utils import get_ffprobe_path
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import av
+except ImportError:
+    av = None
+
+from .utils import get_ffprobe_path, parse_resolution, SUBPROCESS_FLAGS
+
+# JSON 解析: 优先使用 orjson (可选依赖)，否则回退到标准库
+_json_loads = orjson.loads if orjson is not None else json.loads
 
 
 # Premiere Pro 不兼容的容器格式
@@ -22,9 +36,32 @@ PR_INCOMPATIBLE_CODECS = {"vp8", "vp9", "av1", "theora"}
 # 不兼容的图片格式 (作为视频序列导入时可能有问题)
 PR_INCOMPATIBLE_IMAGE_FORMATS = {".webp", ".heic", ".avif"}
 
+# 并发 ffprobe 进程数上限 (探测耗时主要在进程启动与文件 IO，线程池即可)
+# 每个线程只负责等待一个 ffprobe 子进程，实际并行度由 CPU 核心数决定
+SCAN_MAX_WORKERS = min(32, os.cpu_count() or 1)
+
+# ffprobe 参数: 只输出 _parse_ffprobe_output 用到的字段
+FFPROBE_ARGS = [
+    "-v", "error",
+    "-show_entries",
+    "stream=codec_type,codec_name,width,height,r_frame_rate,bit_rate:format=duration,bit_rate",
+    "-of", "json",
+]
+
+# 报告预览最多返回的行数 (完整报告写入文件)
+REPORT_PREVIEW_LINES = 50
+
 # 常见图片格式扩展名 (用于扫描)
 COMMON_IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".bmp", ".tiff", ".tif", ".webp", ".heic", ".avif"}
 
+# 等价的图片扩展名 (文件头检测结果与后缀比对时视为一致)
+_EQUIVALENT_IMAGE_EXTS = {
+    ".jpg": {".jpg", ".jpeg"},
+    ".jpeg": {".jpg", ".jpeg"},
+    ".tiff": {".tiff", ".tif"},
+    ".tif": {".tiff", ".tif"},
+}
+
 # 图片文件头魔数定义
 IMAGE_SIGNATURES = {
     # JPEG: FF D8 FF
@@ -148,9 +185,51 @@ class MediaInfo:
         self.container = os.path.splitext(self.path)[1].lower()
 
 
+def _probe_with_av(file_path: str) -> Dict[str, Any]:
+    """
+    使用 PyAV (libavformat 绑定) 在进程内读取容器头部信息。
+
+    返回与 ffprobe JSON 输出相同结构的字典 (仅包含 FFPROBE_ARGS 请求的字段)，
+    以便复用 _parse_ffprobe_output。
+
+    Args:
+        file_path: 文件路径。
+
+    Returns:
+        ffprobe 风格的字典。
+    """
+    with av.open(file_path, metadata_errors="ignore") as container:
+        fmt = {}
+        if container.duration is not None:
+            fmt["duration"] = container.duration / av.time_base
+        if container.bit_rate:
+            fmt["bit_rate"] = container.bit_rate
+
+        streams = []
+        for stream in container.streams:
+            entry = {"codec_type": stream.type}
+            codec_context = stream.codec_context
+            if codec_context is not None:
+                entry["codec_name"] = codec_context.name
+            if stream.type == "video" and codec_context is not None:
+                entry["width"] = codec_context.width
+                entry["height"] = codec_context.height
+                rate = stream.base_rate
+                if rate:
+                    entry["r_frame_rate"] = f"{rate.numerator}/{rate.denominator}"
+            if stream.bit_rate:
+                entry["bit_rate"] = stream.bit_rate
+            streams.append(entry)
+
+    return {"format": fmt, "streams": streams}
+
+
 def probe_media(file_path: str) -> Optional[MediaInfo]:
     """
-    使用 ffprobe 获取媒体文件信息。
+    获取媒体文件信息。
+
+    安装了 PyAV (可选依赖) 时在进程内读取容器头部，省去每个文件启动 ffprobe
+    子进程的开销；PyAV 不可用或无法打开文件时使用 ffprobe。
 
     Args:
         file_path: 文件路径。
@@ -158,15 +237,13 @@ def probe_media(file_path: str) -> Optional[MediaInfo]:
     Returns:
         MediaInfo 对象, 若失败则返回 None。
     """
-    ffprobe = get_ffprobe_path()
-    cmd = [
-        ffprobe,
-        "-v", "error",
-        "-show_format",
-        "-show_streams",
-        "-print_format", "json",
-        file_path
-    ]
+    if av is not None:
+        try:
+            return _parse_ffprobe_output(file_path, _probe_with_av(file_path))
+        except Exception:
+            pass  # 交给 ffprobe 处理 (并给出其错误信息)
+
+    cmd = [get_ffprobe_path(), *FFPROBE_ARGS, file_path]
 
     try:
         result = subprocess.run(
@@ -175,7 +252,7 @@ def probe_media(file_path: str) -> Optional[MediaInfo]:
             text=True,
             encoding='utf-8',
             errors='replace',
-            creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0,
+            creationflags=SUBPROCESS_FLAGS,
         )
 
         if result.returncode != 0:
@@ -184,7 +261,7 @@ def probe_media(file_path: str) -> Optional[MediaInfo]:
             info.errors.append(f"无法读取文件: {result.stderr.strip()}")
             return info
 
-        data = json.loads(result.stdout)
+        data = _json_loads(result.stdout)
         return _parse_ffprobe_output(file_path, data)
 
     except Exception as e:
@@ -274,22 +351,18 @@ def check_compatibility(
         info.warnings.append(f"码率 {info.bitrate_kbps}kbps 低于最小阈值 {min_bitrate_kbps}kbps")
 
     # 最大分辨率阈值
-    if max_resolution:
-        try:
-            max_w, max_h = map(int, max_resolution.split("x"))
-            if info.width > max_w or info.height > max_h:
-                info.warnings.append(f"分辨率 {info.width}x{info.height} 超过最大阈值 {max_resolution}")
-        except:
-            pass
-            
+    max_size = parse_resolution(max_resolution)
+    if max_size:
+        max_w, max_h = max_size
+        if info.width > max_w or info.height > max_h:
+            info.warnings.append(f"分辨率 {info.width}x{info.height} 超过最大阈值 {max_resolution}")
+
     # 最小分辨率阈值
-    if min_resolution:
-        try:
-            min_w, min_h = map(int, min_resolution.split("x"))
-            if info.width < min_w or info.height < min_h:
-                info.warnings.append(f"分辨率 {info.width}x{info.height} 低于最小阈值 {min_resolution}")
-        except:
-            pass
+    min_size = parse_resolution(min_resolution)
+    if min_size:
+        min_w, min_h = min_size
+        if info.width < min_w or info.height < min_h:
+            info.warnings.append(f"分辨率 {info.width}x{info.height} 低于最小阈值 {min_resolution}")
 
     # ----------------------------------------
     # 2. 兼容性检查 (使用自定义或默认规则)
@@ -319,14 +392,8 @@ def check_compatibility(
                 expected_ext = get_expected_extension(detected_format)
                 actual_ext = info.container.lower()
                 # 处理 .jpg 和 .jpeg 等价的情况
-                equivalent_exts = {
-                    ".jpg": {".jpg", ".jpeg"},
-                    ".jpeg": {".jpg", ".jpeg"},
-                    ".tiff": {".tiff", ".tif"},
-                    ".tif": {".tiff", ".tif"},
-                }
-                actual_set = equivalent_exts.get(actual_ext, {actual_ext})
-                expected_set = equivalent_exts.get(expected_ext, {expected_ext})
+                actual_set = _EQUIVALENT_IMAGE_EXTS.get(actual_ext, {actual_ext})
+                expected_set = _EQUIVALENT_IMAGE_EXTS.get(expected_ext, {expected_ext})
                 
                 if not actual_set.intersection(expected_set):
                     info.warnings.append(
@@ -336,6 +403,37 @@ def check_compatibility(
     return info
 
 
+def _iter_media_files(directory: str, extensions: set):
+    """
+    基于 os.scandir 的迭代式深度优先遍历，产出扩展名匹配的文件路径。
+
+    DirEntry 的类型判断直接使用目录项自带的文件类型，不额外 stat；
+    无法访问的目录会被跳过 (与 os.walk 默认行为一致)。
+
+    Args:
+        directory: 根目录。
+        extensions: 小写扩展名集合 (含点号)。
+
+    Yields:
+        文件路径。
+    """
+    stack = [directory]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                subdirs = []
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                    elif os.path.splitext(entry.name)[1].lower() in extensions and entry.is_file():
+                        yield entry.path
+        except OSError:
+            continue
+        # 逆序入栈，使子目录按枚举顺序处理
+        stack.extend(reversed(subdirs))
+
+
 def scan_directory(
     directory: str,
     extensions: Optional[List[str]] = None,
@@ -386,28 +484,31 @@ def scan_directory(
 
     print(f"{Fore.CYAN}[小雪工具箱] 开始扫描目录: {directory}{Style.RESET_ALL}")
 
-    for root, dirs, files in os.walk(directory):
-        for filename in files:
-            ext = os.path.splitext(filename)[1].lower()
-            # 扫描视频格式和所有图片格式
-            if ext in extensions or ext in all_image_formats:
-                file_path = os.path.join(root, filename)
-                print(f"  扫描: {file_path}")
-                info = probe_media(file_path)
-                if info:
-                    info = check_compatibility(
-                        info, 
-                        max_bitrate_kbps=max_bitrate_kbps, 
-                        max_resolution=max_resolution,
-                        min_bitrate_kbps=min_bitrate_kbps,
-                        min_resolution=min_resolution,
-                        check_pr_video=check_pr_video,
-                        check_pr_image=check_pr_image,
-                        incompatible_containers=incompatible_containers,
-                        incompatible_codecs=incompatible_codecs,
-                        incompatible_images=incompatible_images,
-                    )
-                    results.append(info)
+    # 扫描视频格式和所有图片格式
+    scan_extensions = set(extensions) | all_image_formats
+    file_paths = []
+    for file_path in _iter_media_files(directory, scan_extensions):
+        print(f"  扫描: {file_path}")
+        file_paths.append(file_path)
+
+    # 并发探测，结果保持扫描顺序
+    workers = max(1, min(SCAN_MAX_WORKERS, len(file_paths)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for info in pool.map(probe_media, file_paths):
+            if info:
+                info = check_compatibility(
+                    info, 
+                    max_bitrate_kbps=max_bitrate_kbps, 
+                    max_resolution=max_resolution,
+                    min_bitrate_kbps=min_bitrate_kbps,
+                    min_resolution=min_resolution,
+                    check_pr_video=check_pr_video,
+                    check_pr_image=check_pr_image,
+                    incompatible_containers=incompatible_containers,
+                    incompatible_codecs=incompatible_codecs,
+                    incompatible_images=incompatible_images,
+                )
+                results.append(info)
 
     print(f"{Fore.GREEN}[完成] 共扫描 {len(results)} 个文件{Style.RESET_ALL}")
     return results
@@ -417,58 +518,73 @@ def generate_report(results: List[MediaInfo], output_path: str) -> str:
     """
     生成 QC 报告 (TXT 格式)。
 
+    报告逐行写入文件，内存中只保留前 REPORT_PREVIEW_LINES 行作为预览。
+
     Args:
         results: MediaInfo 列表。
         output_path: 报告输出路径。
 
     Returns:
-        报告内容字符串。
+        报告预览字符串 (超出部分以提示行代替)。
     """
-    lines = []
-    lines.append("=" * 60)
-    lines.append("小雪工具箱 - 素材质量检测报告 (QC Report)")
-    lines.append("=" * 60)
-    lines.append("")
-
-    # 统计
+    # 统计 (单次遍历完成计数)
     total = len(results)
-    errors_count = sum(1 for r in results if r.errors)
-    warnings_count = sum(1 for r in results if r.warnings)
-    ok_count = total - errors_count - warnings_count + sum(1 for r in results if r.errors and r.warnings)
-
-    lines.append(f"总计扫描: {total} 个文件")
-    lines.append(f"  ✓ 通过: {ok_count}")
-    lines.append(f"  ⚠ 警告: {warnings_count}")
-    lines.append(f"  ✗ 错误: {errors_count}")
-    lines.append("")
-    lines.append("-" * 60)
-
-    for info in results:
-        status_icon = "✓"
-        if info.errors:
-            status_icon = "✗"
-        elif info.warnings:
-            status_icon = "⚠"
-
-        lines.append(f"\n[{status_icon}] {info.filename}")
-        lines.append(f"    路径: {info.path}")
-        if info.is_valid:
-            lines.append(f"    容器: {info.container} | 编码: {info.video_codec} | 分辨率: {info.width}x{info.height}")
-            lines.append(f"    帧率: {info.fps} FPS | 码率: {info.bitrate_kbps} kbps | 时长: {info.duration_sec:.1f}s")
-
-        for err in info.errors:
-            lines.append(f"    [错误] {err}")
-        for warn in info.warnings:
-            lines.append(f"    [警告] {warn}")
-
-    lines.append("\n" + "=" * 60)
-    lines.append("报告生成完毕")
-    lines.append("=" * 60)
-
-    report_content = "\n".join(lines)
-
-    with open(output_path, "w", encoding="utf-8") as f:
-        f.write(report_content)
+    errors_count = warnings_count = ok_count = 0
+    for r in results:
+        if r.errors:
+            errors_count += 1
+        if r.warnings:
+            warnings_count += 1
+        if not r.errors and not r.warnings:
+            ok_count += 1
+
+    preview = []
+    line_count = 0
+
+    with open(output_path, "w", encoding="utf-8", buffering=1024 * 1024) as f:
+        def emit(line: str) -> None:
+            nonlocal line_count
+            f.write(line)
+            f.write("\n")
+            line_count += 1
+            if len(preview) < REPORT_PREVIEW_LINES:
+                preview.append(line)
+
+        emit("=" * 60)
+        emit("小雪工具箱 - 素材质量检测报告 (QC Report)")
+        emit("=" * 60)
+        emit("")
+        emit(f"总计扫描: {total} 个文件")
+        emit(f"  ✓ 通过: {ok_count}")
+        emit(f"  ⚠ 警告: {warnings_count}")
+        emit(f"  ✗ 错误: {errors_count}")
+        emit("")
+        emit("-" * 60)
+
+        for info in results:
+            status_icon = "✓"
+            if info.errors:
+                status_icon = "✗"
+            elif info.warnings:
+                status_icon = "⚠"
+
+            emit(f"\n[{status_icon}] {info.filename}")
+            emit(f"    路径: {info.path}")
+            if info.is_valid:
+                emit(f"    容器: {info.container} | 编码: {info.video_codec} | 分辨率: {info.width}x{info.height}")
+                emit(f"    帧率: {info.fps} FPS | 码率: {info.bitrate_kbps} kbps | 时长: {info.duration_sec:.1f}s")
+
+            for err in info.errors:
+                emit(f"    [错误] {err}")
+            for warn in info.warnings:
+                emit(f"    [警告] {warn}")
+
+        emit("\n" + "=" * 60)
+        emit("报告生成完毕")
+        emit("=" * 60)
+
+    if line_count > len(preview):
+        preview.append(f"\n... (预览已截断，其余 {line_count - len(preview)} 条请查看报告文件)")
 
     print(f"{Fore.GREEN}[成功] 报告已保存到: {output_path}{Style.RESET_ALL}")
-    return report_content
+    return "\n".join(preview)
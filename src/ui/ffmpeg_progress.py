@@ -1,5 +1,5 @@
 # -*- coding: utf-8 -*-
-"""FFmpeg 输出进度解析器 —— 从 stderr 行中提取 frame/fps/time/speed 等指标。"""
+"""FFmpeg 输出进度解析器 —— 从 stderr 统计行或 -progress 结构化进度中提取 frame/fps/time/speed 等指标。"""
 
 import re
 from dataclasses import dataclass
@@ -7,6 +7,8 @@ from typing import Optional
 
 from PyQt6.QtCore import QObject, pyqtSignal
 
+from ..core import parse_progress
+
 
 @dataclass
 class ProgressInfo:
@@ -23,12 +25,16 @@ class ProgressInfo:
 
 
 _DURATION_RE = re.compile(r'Duration:\s*(\d{2}):(\d{2}):(\d{2})\.(\d+)')
-_TIME_RE = re.compile(r'time=\s*(\d{2}):(\d{2}):(\d{2})\.(\d+)')
-_FRAME_RE = re.compile(r'frame=\s*(\d+)')
-_FPS_RE = re.compile(r'fps=\s*([\d.]+)')
-_SIZE_RE = re.compile(r'size=\s*(\d+)\s*kB')
-_BITRATE_RE = re.compile(r'bitrate=\s*([\d.]+)\s*kbits/s')
-_SPEED_RE = re.compile(r'speed=\s*([\d.]+)x')
+_TIME_VALUE_RE = re.compile(r'(\d{2}):(\d{2}):(\d{2})\.(\d+)$')
+_NUMBER_RE = re.compile(r'\d+(?:\.\d+)?')
+
+
+def _leading_number(value: Optional[str]) -> Optional[float]:
+    """取值开头的数字 (如 "1.2x" -> 1.2、"1024KiB" -> 1024)，没有数字时返回 None。"""
+    if not value:
+        return None
+    m = _NUMBER_RE.match(value)
+    return float(m.group()) if m else None
 
 
 def _hms_to_sec(h: str, m: str, s: str, frac: str) -> float:
@@ -42,6 +48,7 @@ class FFmpegProgressParser(QObject):
         parser = FFmpegProgressParser()
         parser.set_duration(120.0)  # 可选，若已知总时长
         log_signal.connect(parser.feed_line)
+        progress_signal.connect(parser.feed_progress)  # 命令带 -progress pipe:1 时
         parser.progress_updated.connect(dashboard.update_metrics)
     """
 
@@ -68,46 +75,73 @@ class FFmpegProgressParser(QObject):
             if dm:
                 self._info.total_duration = _hms_to_sec(*dm.groups())
 
+        # 统计行的所有 key=value 项一次取出
+        stats = parse_progress(line)
+        if not stats:
+            return
+
         updated = False
 
-        tm = _TIME_RE.search(line)
+        tm = _TIME_VALUE_RE.match(stats.get("time", ""))
         if tm:
             self._info.time_sec = _hms_to_sec(*tm.groups())
             updated = True
 
-        fm = _FRAME_RE.search(line)
-        if fm:
-            self._info.frame = int(fm.group(1))
-
-        fpsr = _FPS_RE.search(line)
-        if fpsr:
-            try:
-                self._info.fps = float(fpsr.group(1))
-            except ValueError:
-                pass
-
-        sm = _SIZE_RE.search(line)
-        if sm:
-            self._info.size_kb = int(sm.group(1))
-
-        bm = _BITRATE_RE.search(line)
-        if bm:
-            try:
-                self._info.bitrate_kbps = float(bm.group(1))
-            except ValueError:
-                pass
-
-        spm = _SPEED_RE.search(line)
-        if spm:
-            try:
-                self._info.speed = float(spm.group(1))
-            except ValueError:
-                pass
+        frame = _leading_number(stats.get("frame"))
+        if frame is not None:
+            self._info.frame = int(frame)
+
+        fps = _leading_number(stats.get("fps"))
+        if fps is not None:
+            self._info.fps = fps
+
+        size = _leading_number(stats.get("size") or stats.get("Lsize"))
+        if size is not None:
+            self._info.size_kb = int(size)
+
+        bitrate = _leading_number(stats.get("bitrate"))
+        if bitrate is not None:
+            self._info.bitrate_kbps = bitrate
+
+        speed = _leading_number(stats.get("speed"))
+        if speed is not None:
+            self._info.speed = speed
 
         if updated:
             self._calc_derived()
             self.progress_updated.emit(self._info)
 
+    def feed_progress(self, block: dict):
+        """喂入一个 -progress 结构化进度块 (make_progress_parser 回调的 {键: 值} 字典)。"""
+        # out_time_us 与 out_time_ms 的单位均为微秒 (后者是 FFmpeg 的历史命名)
+        out_time = _leading_number(block.get("out_time_us") or block.get("out_time_ms"))
+        if out_time is None:
+            return
+        self._info.time_sec = out_time / 1_000_000
+
+        frame = _leading_number(block.get("frame"))
+        if frame is not None:
+            self._info.frame = int(frame)
+
+        fps = _leading_number(block.get("fps"))
+        if fps is not None:
+            self._info.fps = fps
+
+        total_size = _leading_number(block.get("total_size"))
+        if total_size is not None:
+            self._info.size_kb = int(total_size) // 1024
+
+        bitrate = _leading_number(block.get("bitrate"))
+        if bitrate is not None:
+            self._info.bitrate_kbps = bitrate
+
+        speed = _leading_number(block.get("speed"))
+        if speed is not None:
+            self._info.speed = speed
+
+        self._calc_derived()
+        self.progress_updated.emit(self._info)
+
     def _calc_derived(self):
         info = self._info
         if info.total_duration > 0 and info.time_sec >= 0:
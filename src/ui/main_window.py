@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 """主窗口：侧边栏导航 + 功能页面 + 进度仪表盘 + 日志面板。"""
 
+import importlib
 import webbrowser
 
 from PyQt6.QtWidgets import (
@@ -26,19 +27,23 @@ from .tabs import (
     NotificationTab, HelpTab,
 )
 
-from ..executors import (
-    execute_encode, execute_replace_audio, execute_extract_av,
-    execute_remux, execute_image_convert, execute_folder_creator,
-    execute_batch_rename, execute_qc, execute_notification,
-    execute_help, execute_shield, execute_media_probe,
-)
 from ..notify_config import send_auto_notification
 from .._version import __version__ as _VERSION
 
-_AUTO_NOTIFY_COMMANDS = {
-    "视频压制", "音频替换", "封装转换", "素材质量检测",
-    "音视频抽取", "图片转换", "文件夹创建", "批量重命名",
-    "媒体元数据检测", "露骨图片识别",
+# 命令 -> (执行器模块, 函数名, 完成后是否自动通知)，首次执行该命令时才导入对应模块
+_EXECUTORS = {
+    "视频压制": ("..executors.video_executor", "execute_encode", True),
+    "音频替换": ("..executors.video_executor", "execute_replace_audio", True),
+    "封装转换": ("..executors.file_executor", "execute_remux", True),
+    "素材质量检测": ("..executors.qc_executor", "execute_qc", True),
+    "媒体元数据检测": ("..executors.probe_executor", "execute_media_probe", True),
+    "音视频抽取": ("..executors.video_executor", "execute_extract_av", True),
+    "图片转换": ("..executors.file_executor", "execute_image_convert", True),
+    "文件夹创建": ("..executors.batch_executor", "execute_folder_creator", True),
+    "批量重命名": ("..executors.batch_executor", "execute_batch_rename", True),
+    "露骨图片识别": ("..executors.shield_executor", "execute_shield", True),
+    "通知设置": ("..executors.misc_executor", "execute_notification", False),
+    "使用说明": ("..executors.misc_executor", "execute_help", False),
 }
 
 
@@ -175,25 +180,24 @@ class MainWindow(QMainWindow):
         self._handlers = {}
 
         tab_defs = [
-            ("视频压制", EncodeTab(), execute_encode),
-            ("音频替换", ReplaceAudioTab(), execute_replace_audio),
-            ("封装转换", RemuxTab(), execute_remux),
-            ("素材质量检测", QcTab(), execute_qc),
-            ("媒体元数据检测", MediaProbeTab(), execute_media_probe),
-            ("音视频抽取", ExtractAvTab(), execute_extract_av),
-            ("图片转换", ImageConvertTab(), execute_image_convert),
-            ("文件夹创建", FolderCreatorTab(), execute_folder_creator),
-            ("批量重命名", BatchRenameTab(), execute_batch_rename),
-            ("露骨图片识别", ShieldTab(shield_available=shield_available), execute_shield),
-            ("通知设置", NotificationTab(config=notify_config), execute_notification),
-            ("使用说明", HelpTab(), execute_help),
+            ("视频压制", EncodeTab()),
+            ("音频替换", ReplaceAudioTab()),
+            ("封装转换", RemuxTab()),
+            ("素材质量检测", QcTab()),
+            ("媒体元数据检测", MediaProbeTab()),
+            ("音视频抽取", ExtractAvTab()),
+            ("图片转换", ImageConvertTab()),
+            ("文件夹创建", FolderCreatorTab()),
+            ("批量重命名", BatchRenameTab()),
+            ("露骨图片识别", ShieldTab(shield_available=shield_available)),
+            ("通知设置", NotificationTab(config=notify_config)),
+            ("使用说明", HelpTab()),
         ]
 
-        for name, tab_widget, handler in tab_defs:
+        for name, tab_widget in tab_defs:
             self._sidebar.add_item(name)
             self._stack.addWidget(tab_widget)
             self._tabs.append(tab_widget)
-            self._handlers[name] = handler
 
         self._sidebar.tab_changed.connect(self._stack.slide_to)
 
@@ -222,7 +226,11 @@ class MainWindow(QMainWindow):
             return
 
         command = tab.command_name
-        handler = self._handlers.get(command)
+        try:
+            handler = self._resolve_handler(command)
+        except Exception as e:
+            self._log_panel.append_log(f"执行器加载失败: {e}\n")
+            return
         if handler is None:
             self._log_panel.append_log(f"未知命令: {command}\n")
             return
@@ -244,21 +252,32 @@ class MainWindow(QMainWindow):
         self._runner = TaskRunner(handler, args, command, parent=self)
         self._runner.log_signal.connect(self._log_panel.append_log)
         self._runner.log_signal.connect(self._ffmpeg_parser.feed_line)
+        self._runner.progress_signal.connect(self._ffmpeg_parser.feed_progress)
         self._runner.finished_signal.connect(self._on_task_finished)
         self._runner.start()
 
+    def _resolve_handler(self, command):
+        """按需导入命令对应的执行器函数，并缓存结果。"""
+        handler = self._handlers.get(command)
+        if handler is None and command in _EXECUTORS:
+            module_name, func_name, _ = _EXECUTORS[command]
+            module = importlib.import_module(module_name, __package__)
+            handler = getattr(module, func_name)
+            self._handlers[command] = handler
+        return handler
+
     def _try_set_duration(self, args):
         """尝试通过 probe 获取输入文件的总时长，传给 parser 计算进度。"""
         input_path = getattr(args, 'input', '') or ''
         if not input_path:
             return
         try:
-            from ..media_probe import probe_detailed
+            from ..media_probe import probe_duration
             import os
             if os.path.isfile(input_path):
-                info = probe_detailed(input_path)
-                if info and info.duration_sec > 0:
-                    self._ffmpeg_parser.set_duration(info.duration_sec)
+                duration = probe_duration(input_path)
+                if duration > 0:
+                    self._ffmpeg_parser.set_duration(duration)
         except Exception:
             pass
 
@@ -275,7 +294,8 @@ class MainWindow(QMainWindow):
             self._log_panel.append_log(f"\n\u2714 {command_name} 执行完成\n")
             self._dashboard.finish(True)
             status_flash(self.statusBar(), "#4caf50", 2000)
-            if command_name in _AUTO_NOTIFY_COMMANDS:
+            entry = _EXECUTORS.get(command_name)
+            if entry and entry[2]:
                 try:
                     send_auto_notification(command_name)
                 except Exception:
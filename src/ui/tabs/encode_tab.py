@@ -81,6 +81,21 @@ class EncodeTab(BaseTab):
             ["使用预设默认"] + NVENC_PRESETS, "使用预设默认",
             "NVENC 速度档位 (p1最快/p7最慢)",
         )
+        self.hw_decode_cb = self.add_checkbox(
+            encoder, "GPU 全流程 (N卡)", False,
+            "开启：使用 CUDA 硬件解码 + scale_cuda 缩放，解码/缩放/编码全部在显卡完成。\n"
+            "仅对 NVENC 编码器生效；烧录字幕时自动回退到软件解码。",
+        )
+        self.auto_fallback_cb = self.add_checkbox(
+            encoder, "硬件编码失败时改用 CPU", False,
+            "开启：N卡/I卡/A卡编码器初始化失败 (驱动或硬件不支持) 时，\n"
+            "自动改用 libx264 重新编码，无需手动切换编码器再次运行。",
+        )
+        self.encode_threads_spin = self.add_spinbox(
+            encoder, "编码线程数", 0, 64, 0,
+            "0 为自动 (由 FFmpeg 按 CPU 核心数决定)。\n"
+            "需要边压制边做其他事时可限制线程数，降低 CPU 占用。",
+        )
 
         # ---- 质量与码率 ----
         quality = self.add_group(
@@ -276,6 +291,7 @@ class EncodeTab(BaseTab):
             if value == preset["encoder"]:
                 self.encoder_combo.setCurrentText(name)
                 break
+        self.hw_decode_cb.setEnabled("nvenc" in preset["encoder"])
 
         if preset.get("crf") is not None:
             self.crf_spin.setValue(preset["crf"])
@@ -307,6 +323,7 @@ class EncodeTab(BaseTab):
         """当编码器切换时，控制 NVENC 档位可用状态。"""
         is_nvenc = "NVENC" in encoder_name or "nvenc" in encoder_name
         self.nvenc_preset_combo.setEnabled(is_nvenc)
+        self.hw_decode_cb.setEnabled(is_nvenc)
 
     def _on_output_format_changed(self, text):
         self.output_format_custom_edit.setEnabled("自定义" in text)
@@ -592,6 +609,9 @@ class EncodeTab(BaseTab):
             output=self.output_edit.text(),
             subtitle=self.subtitle_edit.text(),
             compat_mode=self.compat_mode_cb.isChecked(),
+            hw_decode=self.hw_decode_cb.isChecked(),
+            auto_fallback=self.auto_fallback_cb.isChecked(),
+            encode_threads=self.encode_threads_spin.value(),
             preset=self.preset_combo.currentText(),
             encoder=self.encoder_combo.currentText(),
             speed_preset=self.speed_preset_combo.currentText(),
@@ -13,6 +13,7 @@ from ..base_tab import BaseTab
 from ..args_builder import ArgsNamespace
 from ...presets import REMUX_PRESETS
 from ...media_probe import probe_detailed, LANGUAGE_NAMES
+from ...executors.file_executor import default_remux_workers
 
 
 def _format_duration_short(seconds: float) -> str:
@@ -78,6 +79,15 @@ class RemuxTab(BaseTab):
             fmt, "覆盖原文件", False,
             "⚠️ 危险: 转换后删除原文件，仅保留新文件",
         )
+        self.remux_faststart_cb = self.add_checkbox(
+            fmt, "快速启动 (索引前置)", False,
+            "MP4/MOV: 将 moov 索引移到文件开头，网页/网盘可边下边播。\n"
+            "封装结束后需重写整个文件一次，大文件会多花一些时间。",
+        )
+        self.remux_threads_spin = self.add_spinbox(
+            fmt, "并发数", 1, 16, default_remux_workers(),
+            "批量转换时同时处理的文件数 (流复制主要受磁盘速度限制)",
+        )
         self.add_hint(
             fmt,
             "不重新编码，速度极快。某些编码不兼容某些容器。",
@@ -419,6 +429,8 @@ class RemuxTab(BaseTab):
             remux_format_custom=self.remux_format_custom_edit.text(),
             remux_output=self.remux_output_edit.text(),
             remux_overwrite=self.remux_overwrite_cb.isChecked(),
+            remux_faststart=self.remux_faststart_cb.isChecked(),
+            remux_threads=self.remux_threads_spin.value(),
             remux_audio_tracks=audio_key,
             remux_audio_tracks_custom=audio_custom,
             remux_subtitle_tracks=sub_key,
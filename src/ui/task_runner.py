@@ -22,9 +22,10 @@ class _StreamRedirect:
 
 
 class TaskRunner(QThread):
-    """在工作线程中运行指定的 handler(args)，并通过信号反馈日志和完成状态。"""
+    """在工作线程中运行指定的 handler(args)，并通过信号反馈日志、进度和完成状态。"""
 
     log_signal = pyqtSignal(str)
+    progress_signal = pyqtSignal(object)  # FFmpeg -progress 结构化进度块 (dict)
     finished_signal = pyqtSignal(bool, str)  # (success, command_name)
 
     def __init__(self, handler, args, command_name, parent=None):
@@ -32,6 +33,8 @@ class TaskRunner(QThread):
         self.handler = handler
         self.args = args
         self.command_name = command_name
+        # 支持结构化进度的执行器通过 args.progress_callback 上报进度块
+        self.args.progress_callback = self.progress_signal.emit
 
     def run(self):
         redirect = _StreamRedirect(self.log_signal)
@@ -2,11 +2,22 @@
 """
 工具函数模块：路径处理、FFmpeg 可执行文件定位等。
 """
+import codecs
 import os
+import re
+import shlex
+import subprocess
 import sys
 import shutil
+from functools import lru_cache
 
+# 启动 FFmpeg 等子进程时使用的创建标志 (Windows 下不弹出控制台窗口)。
+# Linux 下 CPython 在未传入 preexec_fn/start_new_session/用户切换等参数时使用 vfork 快速启动子进程，
+# 不复制父进程 (含 GUI) 的页表；启动子进程时请勿添加这些参数。
+SUBPROCESS_FLAGS = subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
 
+
+@lru_cache(maxsize=1)
 def get_base_dir() -> str:
     """
     获取应用程序根目录。
@@ -21,6 +32,7 @@ def get_base_dir() -> str:
         return os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 
+@lru_cache(maxsize=1)
 def get_internal_dir() -> str:
     """
     获取 PyInstaller 打包后的 _internal 目录。
@@ -38,6 +50,7 @@ def get_internal_dir() -> str:
         return os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 
+@lru_cache(maxsize=1)
 def get_ffmpeg_path() -> str:
     """
     获取 ffmpeg 可执行文件的路径。
@@ -68,6 +81,7 @@ def get_ffmpeg_path() -> str:
     return 'ffmpeg'
 
 
+@lru_cache(maxsize=1)
 def get_ffprobe_path() -> str:
     """
     获取 ffprobe 可执行文件的路径。
@@ -98,23 +112,73 @@ def get_ffprobe_path() -> str:
     return 'ffprobe'
 
 
+@lru_cache(maxsize=64)
 def escape_path_for_ffmpeg(path: str) -> str:
     """
-    对路径进行转义，以便在 FFmpeg 的 -vf subtitles 等滤镜中使用。
-    Windows 路径中的反斜杠和冒号需要特殊处理。
-    
-    FFmpeg subtitles 滤镜需要:
-    1. 反斜杠转为正斜杠
-    2. 冒号转义为 \\:
-    3. 单引号需要额外处理
+    对路径进行转义，以便在 FFmpeg 的 -vf subtitles 等滤镜中直接作为参数值使用 (无需外层引号)。
+
+    FFmpeg 滤镜参数需要两级转义:
+    1. 反斜杠转为正斜杠 (Windows 路径)
+    2. 参数值级: 单引号和冒号前加反斜杠
+    3. 滤镜图级: 反斜杠、单引号、方括号、逗号、分号前再加反斜杠
     """
     # 替换反斜杠为正斜杠
     path = path.replace('\\', '/')
-    # 转义冒号 (FFmpeg 滤镜语法要求)
-    path = path.replace(':', '\\:')
-    # 转义单引号
-    path = path.replace("'", "'\\''")
-    return path
+    # 参数值级转义 (冒号分隔参数，单引号为引用符)
+    path = re.sub(r"(['\\:])", r"\\\1", path)
+    # 滤镜图级转义 (逗号/分号分隔滤镜，方括号为链接标签)
+    return re.sub(r"([\\'\[\],;])", r"\\\1", path)
+
+
+def escape_path_for_param_list(path: str) -> str:
+    """
+    对路径进行转义，以便作为 -x265-params 等 "键=值:键=值" 参数列表中的值使用。
+
+    FFmpeg 按冒号拆分参数列表，反斜杠为转义符: 先将反斜杠转为正斜杠 (Windows 路径)，
+    再为冒号 (如盘符 C:) 和剩余的反斜杠加反斜杠转义。
+    """
+    path = path.replace('\\', '/')
+    return re.sub(r"([\\:])", r"\\\1", path)
+
+
+@lru_cache(maxsize=256)
+def parse_resolution(value: str):
+    """
+    解析分辨率字符串 (如 "1920x1080")，结果按字符串缓存，批量任务中同一值只解析一次。
+
+    Returns:
+        (宽, 高)，为空或格式无效时返回 None
+    """
+    if not value:
+        return None
+    try:
+        width, height = map(int, value.split("x"))
+    except ValueError:
+        return None
+    return width, height
+
+
+def split_args(text: str) -> list:
+    """
+    将用户填写的额外参数拆分为参数列表。
+
+    引号内的内容保留为一个参数 (如 -x264-params "keyint=60:bframes=0")；
+    反斜杠不作为转义字符，Windows 路径保持原样。
+    """
+    lexer = shlex.shlex(text, posix=True)
+    lexer.whitespace_split = True
+    lexer.escape = ""
+    lexer.commenters = ""
+    return list(lexer)
+
+
+def format_command(cmd: list) -> str:
+    """
+    将参数列表格式化为可复制执行的命令行 (含空格的参数会加引号)，仅用于显示和日志。
+    """
+    if os.name == 'nt':
+        return subprocess.list2cmdline(cmd)
+    return shlex.join(cmd)
 
 
 def generate_output_path(input_path: str, encoder: str, output_ext: str = None) -> str:
@@ -149,3 +213,70 @@ def auto_generate_output_path(input_path: str, suffix: str, extension: str = Non
         extension = input_ext
     
     return f"{base}{suffix}{extension}"
+
+
+def dedupe_paths(paths: list) -> list:
+    """
+    去除重复的输入路径 (按规范化绝对路径比较，保留首次出现的原始写法和顺序)。
+
+    Args:
+        paths: 路径列表
+
+    Returns:
+        去重后的路径列表
+    """
+    seen = {}
+    for path in paths:
+        seen.setdefault(os.path.normcase(os.path.abspath(path)), path)
+    return list(seen.values())
+
+
+def make_unique_path(path: str, taken: set) -> str:
+    """
+    若路径已被本批次其他任务占用，在扩展名前追加序号 (_1, _2, ...)。
+
+    Args:
+        path: 期望的输出路径
+        taken: 已占用路径的规范化键集合 (会被更新)
+
+    Returns:
+        本批次内唯一的输出路径
+    """
+    base, ext = os.path.splitext(path)
+    candidate = path
+    counter = 1
+    while os.path.normcase(os.path.normpath(candidate)) in taken:
+        candidate = f"{base}_{counter}{ext}"
+        counter += 1
+    taken.add(os.path.normcase(os.path.normpath(candidate)))
+    return candidate
+
+
+def iter_output_text(fd: int, chunk_size: int = 8192):
+    """
+    按块读取子进程输出并增量解码为文本。
+
+    FFmpeg 用 \r 刷新进度行，逐行读取时需等到下一个字符才能确定换行，
+    进度会滞后显示；这里每读到一块就立即产出，并将 \r / \r\n 统一为 \n。
+
+    Args:
+        fd: 子进程输出管道的文件描述符
+        chunk_size: 单次读取的最大字节数
+
+    Yields:
+        解码后的文本块
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    skip_lf = False  # 上一块以 \r 结尾，本块开头的 \n 属于同一个 \r\n
+    while True:
+        chunk = os.read(fd, chunk_size)
+        text = decoder.decode(chunk, final=not chunk)
+        if text and skip_lf:
+            skip_lf = False
+            if text[0] == "\n":
+                text = text[1:]
+        if text:
+            skip_lf = text.endswith("\r")
+            yield text.replace("\r\n", "\n").replace("\r", "\n")
+        if not chunk:
+            break
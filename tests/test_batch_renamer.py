@@ -6,12 +6,22 @@
 """
 import pytest
 import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
 
 from src.batch_renamer import (
     RenameConfig,
     get_sorted_files,
     get_files_sorted_by_size,
     batch_rename,
+    determine_media_type,
+    normalize_extensions,
+    process_parent_folder_name,
+    COPY_MAX_WORKERS,
+    COPY_BUFFER_SIZE,
+    _copy_file,
+    _plan_rename_ops,
 )
 
 
@@ -68,6 +78,17 @@ class TestGetSortedFiles:
         sizes = [os.path.getsize(f) for f in files]
         assert sizes == sorted(sizes, reverse=True)
 
+    def test_sort_by_size_parallel_stat(self, sample_dir):
+        """测试超过阈值时并发 stat 的排序结果与串行一致"""
+        expected = get_sorted_files(sample_dir, ["png", "mp4"], sort_method="size", sort_order="desc")
+
+        with patch('src.batch_renamer.PARALLEL_STAT_THRESHOLD', 0), \
+                patch('src.batch_renamer.ThreadPoolExecutor', wraps=ThreadPoolExecutor) as mock_pool:
+            files = get_sorted_files(sample_dir, ["png", "mp4"], sort_method="size", sort_order="desc")
+
+        mock_pool.assert_called_once()
+        assert files == expected
+
     def test_priority_keyword(self, sample_dir):
         """测试关键词提前排序"""
         files = get_sorted_files(
@@ -112,6 +133,85 @@ class TestGetSortedFiles:
         assert sizes == sorted(sizes)
 
 
+class TestCollectFiles:
+    """测试文件收集"""
+
+    @pytest.fixture
+    def nested_dir(self, tmp_path):
+        """创建多层目录，包含大写扩展名、无扩展名与隐藏文件"""
+        (tmp_path / "a.PNG").write_bytes(b"x")
+        (tmp_path / "png").write_bytes(b"x")
+        (tmp_path / ".png").write_bytes(b"x")
+        (tmp_path / "doc.txt").write_bytes(b"x")
+        sub = tmp_path / "sub" / "deep"
+        sub.mkdir(parents=True)
+        (sub / "b.mp4").write_bytes(b"x")
+        (tmp_path / "sub" / "c.jpg").write_bytes(b"x")
+        return tmp_path
+
+    def test_recursive(self, nested_dir):
+        """测试递归收集并按扩展名过滤"""
+        files = get_sorted_files(str(nested_dir), ["png", ".JPG", "mp4"], recursive=True)
+        assert [os.path.basename(f) for f in files] == ["a.PNG", "b.mp4", "c.jpg"]
+
+    def test_non_recursive(self, nested_dir):
+        """测试非递归只收集顶层文件"""
+        files = get_sorted_files(str(nested_dir), ["png", "jpg", "mp4"], recursive=False)
+        assert [os.path.basename(f) for f in files] == ["a.PNG"]
+
+    def test_determine_media_type(self):
+        """测试媒体类型判断与目标类型过滤"""
+        config = RenameConfig(target_type="both", image_extensions=[".PNG"], video_extensions=["mp4"])
+        assert determine_media_type("x/a.png", config) == "图片"
+        assert determine_media_type("x/b.MP4", config) == "视频"
+        assert determine_media_type("x/c.txt", config) is None
+        config.target_type = "images"
+        assert determine_media_type("x/b.mp4", config) is None
+
+    def test_determine_media_type_normalizes_once(self):
+        """测试逐文件判断时扩展名只标准化一次"""
+        config = RenameConfig(target_type="both", image_extensions=["WEBP"], video_extensions=["mkv"])
+        with patch('src.batch_renamer.normalize_extensions', wraps=normalize_extensions) as mock_norm:
+            for i in range(50):
+                determine_media_type(f"x/{i}.webp", config)
+        assert mock_norm.call_count == 2
+
+
+class TestParentFolderPrefix:
+    """测试父文件夹前缀"""
+
+    def test_prefix_from_nested_dirs(self):
+        """测试多层目录前缀、下划线截断与非法字符清理"""
+        base = os.path.join("root", "base")
+        file_path = os.path.join(base, "角色A_草稿", "场景*1", "x.png")
+        assert process_parent_folder_name(file_path, base, True) == "角色A_场景_1_"
+        assert process_parent_folder_name(file_path, base, False) == "角色A_草稿_场景_1_"
+
+    def test_no_prefix_at_base(self):
+        """测试基础目录下的文件没有前缀"""
+        base = os.path.join("root", "base")
+        assert process_parent_folder_name(os.path.join(base, "x.png"), base) == ""
+
+
+class TestCopyFile:
+    """测试复制模式的文件复制"""
+
+    def test_windows_uses_large_buffer(self, tmp_path):
+        """测试 Windows 上以大缓冲区复制，不修改 shutil 的全局设置"""
+        src = tmp_path / "a.mp4"
+        src.write_bytes(b"x" * 100)
+        dst = tmp_path / "b.mp4"
+        bufsize = shutil.COPY_BUFSIZE
+
+        with patch('src.batch_renamer.sys.platform', "win32"), \
+                patch('src.batch_renamer.shutil.copyfileobj', wraps=shutil.copyfileobj) as mock_copy:
+            _copy_file(str(src), str(dst))
+
+        assert mock_copy.call_args[0][2] == COPY_BUFFER_SIZE
+        assert dst.read_bytes() == src.read_bytes()
+        assert shutil.COPY_BUFSIZE == bufsize
+
+
 class TestBatchRenameWithSort:
     """测试批量重命名结合排序功能"""
 
@@ -164,3 +264,154 @@ class TestBatchRenameWithSort:
         assert success == 3
         # 主视觉图应该获得编号 1
         assert os.path.exists(os.path.join(output_dir, "图片_1.png"))
+
+
+class TestBatchRenameInPlace:
+    """测试原地重命名的冲突与顺序依赖"""
+
+    def test_target_freed_by_earlier_rename(self, tmp_path):
+        """测试目标名恰为前一个文件的原名时，等其让出后再重命名"""
+        (tmp_path / "图片_2.png").write_bytes(b"1")
+        (tmp_path / "x.png").write_bytes(b"22")
+
+        config = RenameConfig(
+            mode="rename_in_place",
+            target_type="images",
+            recursive=False,
+            sort_method="size",
+            sort_order="asc",
+        )
+        success, fail, errors = batch_rename(str(tmp_path), config)
+
+        assert (success, fail, errors) == (2, 0, [])
+        assert (tmp_path / "图片_1.png").read_bytes() == b"1"
+        assert (tmp_path / "图片_2.png").read_bytes() == b"22"
+        assert not (tmp_path / "x.png").exists()
+
+    def test_existing_target_not_overwritten(self, tmp_path):
+        """测试目标名被尚未处理的文件占用时追加序号"""
+        (tmp_path / "a.png").write_bytes(b"a")
+        (tmp_path / "图片_1.png").write_bytes(b"bb")
+
+        config = RenameConfig(
+            mode="rename_in_place",
+            target_type="images",
+            recursive=False,
+            sort_method="size",
+            sort_order="asc",
+        )
+        success, fail, _ = batch_rename(str(tmp_path), config)
+
+        assert (success, fail) == (2, 0)
+        assert (tmp_path / "图片_1_1.png").read_bytes() == b"a"
+        assert (tmp_path / "图片_2.png").read_bytes() == b"bb"
+
+    def test_many_files_parallel(self, tmp_path):
+        """测试大量文件并发重命名后编号连续"""
+        for i in range(20):
+            (tmp_path / f"f{i:02d}.png").write_bytes(b"x")
+
+        config = RenameConfig(mode="rename_in_place", target_type="images", recursive=False)
+        success, fail, _ = batch_rename(str(tmp_path), config)
+
+        assert (success, fail) == (20, 0)
+        assert sorted(os.listdir(tmp_path)) == sorted(f"图片_{i}.png" for i in range(1, 21))
+
+
+    def test_copy_mode_uses_copy_pool_size(self, tmp_path):
+        """测试复制模式使用受限的并发数"""
+        for i in range(10):
+            (tmp_path / f"f{i}.png").write_bytes(b"x")
+        config = RenameConfig(
+            mode="copy_rename", output_dir=str(tmp_path / "out"),
+            target_type="images", recursive=False,
+        )
+
+        with patch('src.batch_renamer.ThreadPoolExecutor', wraps=ThreadPoolExecutor) as mock_pool:
+            success, fail, _ = batch_rename(str(tmp_path), config)
+
+        assert (success, fail) == (10, 0)
+        assert mock_pool.call_args.kwargs["max_workers"] == COPY_MAX_WORKERS
+
+    def test_plan_has_no_side_effects(self, tmp_path):
+        """测试规划阶段不创建目录，执行时才创建保持结构的子目录"""
+        sub = tmp_path / "src" / "sub"
+        sub.mkdir(parents=True)
+        (sub / "a.png").write_bytes(b"x")
+        out = tmp_path / "out"
+        config = RenameConfig(
+            mode="copy_rename", output_dir=str(out), target_type="images", recursive=True,
+        )
+
+        grouped = [(("sub", "图片"), [(str(sub / "a.png"), os.path.join("sub", "a.png"))])]
+        independent_ops, _ = _plan_rename_ops(grouped, str(tmp_path / "src"), str(out), config)
+        assert len(independent_ops) == 1
+        assert not out.exists()
+
+        success, fail, _ = batch_rename(str(tmp_path / "src"), config)
+        assert (success, fail) == (1, 0)
+        assert len(os.listdir(out / "sub")) == 1
+
+    def test_collisions_resolved_with_single_scan(self, tmp_path):
+        """测试冲突检测每个目标目录只扫描一次"""
+        out = tmp_path / "out"
+        out.mkdir()
+        for name in ("图片_1.png", "图片_1_1.png", "图片_1_2.png"):
+            (out / name).write_bytes(b"old")
+        (tmp_path / "a.png").write_bytes(b"new")
+        config = RenameConfig(
+            mode="copy_rename", output_dir=str(out),
+            target_type="images", recursive=False,
+        )
+
+        with patch('src.batch_renamer.os.scandir', wraps=os.scandir) as mock_scandir:
+            success, fail, _ = batch_rename(str(tmp_path), config)
+
+        assert (success, fail) == (1, 0)
+        assert (out / "图片_1_3.png").read_bytes() == b"new"
+        assert (out / "图片_1.png").read_bytes() == b"old"
+        scanned = [os.path.normcase(str(c.args[0])) for c in mock_scandir.call_args_list]
+        assert scanned.count(os.path.normcase(str(out))) == 1
+
+    def test_groups_keep_sort_order_per_directory(self, tmp_path):
+        """测试按目录分组后，组内编号仍遵循排序结果"""
+        (tmp_path / "a").mkdir()
+        (tmp_path / "b").mkdir()
+        # 大小交错分布在两个目录中
+        (tmp_path / "a" / "a1.png").write_bytes(b"x" * 4)
+        (tmp_path / "b" / "b1.png").write_bytes(b"x" * 3)
+        (tmp_path / "a" / "a2.png").write_bytes(b"x" * 2)
+        (tmp_path / "b" / "b2.png").write_bytes(b"x" * 1)
+        config = RenameConfig(
+            mode="rename_in_place", target_type="images", recursive=True,
+            sort_method="size", sort_order="asc",
+        )
+
+        success, fail, _ = batch_rename(str(tmp_path), config)
+
+        assert (success, fail) == (4, 0)
+        assert (tmp_path / "a" / "a_图片_1.png").stat().st_size == 2
+        assert (tmp_path / "a" / "a_图片_2.png").stat().st_size == 4
+        assert (tmp_path / "b" / "b_图片_1.png").stat().st_size == 1
+        assert (tmp_path / "b" / "b_图片_2.png").stat().st_size == 3
+
+    def test_progress_lines_batched(self, tmp_path):
+        """测试进度行按批合并写入"""
+        for i in range(10):
+            (tmp_path / f"f{i}.png").write_bytes(b"x")
+        writes = []
+
+        class _Recorder:
+            def write(self, text):
+                writes.append(text)
+
+            def flush(self):
+                pass
+
+        config = RenameConfig(mode="rename_in_place", target_type="images", recursive=False)
+        with patch('src.batch_renamer.LOG_FLUSH_LINES', 4), patch('sys.stdout', _Recorder()):
+            success, fail, _ = batch_rename(str(tmp_path), config)
+
+        assert (success, fail) == (10, 0)
+        progress = [w for w in writes if "->" in w]
+        assert [w.count("->") for w in progress] == [4, 4, 2]
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""
+兼容模式编码测试用例。
+
+测试 src/compat_encoder.py 中的 AVS 脚本生成与编码命令构建。
+"""
+import pytest
+import io
+import os
+from unittest.mock import patch
+
+from src.utils import iter_output_text
+from src.compat_encoder import (
+    generate_avs_script, cleanup_temp_files, _stdout_is_terminal,
+    build_compat_encode_command,
+)
+
+
+@pytest.fixture
+def bin_dir(tmp_path):
+    """创建模拟的 bin 目录。"""
+    path = tmp_path / "bin"
+    path.mkdir()
+    (path / "VSFilter.dll").write_bytes(b"dll")
+    return str(path)
+
+
+class TestGenerateAvsScript:
+    """测试 AVS 脚本生成"""
+
+    def test_ascii_subtitle_used_directly(self, tmp_path, bin_dir):
+        """测试纯 ASCII 字幕路径直接写入脚本，不复制"""
+        subtitle = tmp_path / "sub.ass"
+        subtitle.write_text("[Script Info]", encoding="utf-8")
+        avs = tmp_path / "out.avs"
+
+        with patch('src.compat_encoder.get_bin_dir', return_value=bin_dir):
+            avs_path, temp_subtitle = generate_avs_script(
+                str(tmp_path / "video.mp4"), str(subtitle), str(avs),
+            )
+
+        assert temp_subtitle is None
+        content = avs.read_text(encoding="utf-8")
+        assert f'TextSub("{str(subtitle).replace(os.sep, "/")}")' in content
+        assert avs.read_bytes().startswith(b"# XiaoXue Toolbox")  # 无 BOM
+        assert content.splitlines()[1] == f'LoadPlugin("{bin_dir.replace(os.sep, "/")}/LSMASHSource.dll")'
+
+    def test_non_ascii_subtitle_copied(self, tmp_path, bin_dir):
+        """测试含中文的字幕路径复制为临时 ASCII 文件名"""
+        subtitle = tmp_path / "字幕.ass"
+        subtitle.write_text("[Script Info]", encoding="utf-8")
+        avs = tmp_path / "out.avs"
+
+        with patch('src.compat_encoder.get_bin_dir', return_value=bin_dir):
+            _, temp_subtitle = generate_avs_script(
+                str(tmp_path / "video.mp4"), str(subtitle), str(avs),
+            )
+
+        try:
+            assert temp_subtitle.isascii()
+            with open(temp_subtitle, encoding="utf-8") as f:
+                assert f.read() == "[Script Info]"
+            assert temp_subtitle.replace(os.sep, "/") in avs.read_text(encoding="utf-8")
+        finally:
+            cleanup_temp_files(None, None, temp_subtitle)
+
+        assert not os.path.exists(temp_subtitle)
+        assert subtitle.exists()
+
+
+def _pipe_with(*chunks):
+    """把若干字节块写入管道并返回读端。"""
+    read_fd, write_fd = os.pipe()
+    for chunk in chunks:
+        os.write(write_fd, chunk)
+    os.close(write_fd)
+    return read_fd
+
+
+class TestIterOutputText:
+    """测试子进程输出的按块解码"""
+
+    def test_carriage_returns_normalized(self):
+        """测试 \\r 与 \\r\\n 统一为换行"""
+        fd = _pipe_with(b"frame=1\rframe=2\r\ndone\n")
+        try:
+            assert "".join(iter_output_text(fd)) == "frame=1\nframe=2\ndone\n"
+        finally:
+            os.close(fd)
+
+    def test_split_crlf_and_multibyte(self):
+        """测试跨块的 \\r\\n 与多字节字符"""
+        data = "进度\r\n完成".encode("utf-8")
+        fd = _pipe_with(data)
+        try:
+            text = "".join(iter_output_text(fd, chunk_size=1))
+        finally:
+            os.close(fd)
+        assert text == "进度\n完成"
+
+
+class TestStdoutIsTerminal:
+    """测试终端直通输出的判断"""
+
+    def test_redirected_stdout_is_not_terminal(self):
+        """测试重定向的输出流 (含无 isatty 的 GUI 转发对象) 不视为终端"""
+        class _Redirect:
+            def write(self, text):
+                pass
+
+        with patch('sys.stdout', io.StringIO()):
+            assert _stdout_is_terminal() is False
+        with patch('sys.stdout', _Redirect()):
+            assert _stdout_is_terminal() is False
+        with patch('sys.stdout', None):
+            assert _stdout_is_terminal() is False
+
+
+@patch('src.compat_encoder.get_ffmpeg_path', return_value="ffmpeg")
+class TestBuildCompatEncodeCommand:
+    """测试兼容模式编码命令的码率控制参数"""
+
+    def _video_args(self, **kwargs):
+        cmd = build_compat_encode_command("in.avs", "in.mp4", "out.mp4", **kwargs)
+        start = cmd.index("-c:v") + 2
+        return cmd[start:cmd.index("-c:a")]
+
+    @pytest.mark.parametrize("encoder, expected", [
+        ("libx264", ["-crf", "20"]),
+        ("h264_nvenc", ["-cq", "20"]),
+        ("h264_qsv", ["-global_quality", "20"]),
+        ("h264_amf", ["-qp_i", "20", "-qp_p", "20"]),
+    ])
+    def test_quality_flags_per_family(self, mock_ffmpeg, encoder, expected):
+        """测试各编码器家族的恒定质量参数"""
+        assert self._video_args(encoder=encoder, crf=20) == expected
+
+    def test_vbr_and_cbr(self, mock_ffmpeg):
+        """测试 VBR/CBR 参数 (与 core 共用码率控制表)"""
+        assert self._video_args(encoder="h264_nvenc", bitrate="5M", rc_mode="vbr") == [
+            "-b:v", "5M", "-rc", "vbr", "-maxrate", "5M", "-bufsize", "5M",
+        ]
+        assert self._video_args(encoder="libx264", bitrate="5M", rc_mode="cbr", crf=20) == [
+            "-b:v", "5M", "-minrate", "5M", "-maxrate", "5M", "-bufsize", "5M",
+        ]
+        assert self._video_args(encoder="h264_amf", bitrate="5M") == ["-b:v", "5M"]
+        assert self._video_args(encoder="h264_amf", bitrate="5M", rc_mode="vbr") == [
+            "-b:v", "5M", "-rc", "vbr_peak", "-maxrate", "5M", "-bufsize", "5M",
+        ]
+
+    def test_threads_cap(self, mock_ffmpeg):
+        """测试线程数上限参数，额外参数已指定时不重复添加"""
+        cmd = build_compat_encode_command("in.avs", "in.mp4", "out.mp4", threads=4)
+        assert cmd[cmd.index("-threads") + 1] == "4"
+
+        cmd = build_compat_encode_command("in.avs", "in.mp4", "out.mp4", threads=4, extra_args="-threads 2")
+        assert cmd.count("-threads") == 1
+        assert cmd[cmd.index("-threads") + 1] == "2"
+
+        assert "-threads" not in build_compat_encode_command("in.avs", "in.mp4", "out.mp4")
@@ -0,0 +1,758 @@
+# -*- coding: utf-8 -*-
+"""
+FFmpeg 命令构建测试。
+
+测试 src/core.py 中 build_encode_command 等函数生成的编码参数。
+"""
+import pytest
+import io
+import os
+import subprocess
+import sys
+import time
+from unittest.mock import patch
+
+from src.core import (
+    build_encode_command, build_2pass_commands, run_2pass_encode, run_ffmpeg_command,
+    run_ffmpeg_batch, make_progress_parser, PROGRESS_ARGS, get_encoder_capabilities,
+    build_multi_output_command, OutputSpec, merge_output_commands, parse_progress,
+)
+
+
+class TestBuildEncodeCommandHwDecode:
+    """测试 NVENC GPU 全流程 (CUDA 硬件解码 + 缩放)。"""
+
+    @patch("src.core.get_ffmpeg_path", return_value="ffmpeg")
+    def test_hwaccel_before_input(self, mock_ffmpeg):
+        """NVENC + hw_decode: -hwaccel 参数位于 -i 之前。"""
+        cmd = build_encode_command(
+            input_path="input.mp4",
+            output_path="output.mp4",
+            encoder="h264_nvenc",
+            hw_decode=True,
+        )
+        assert cmd[:6] == ["ffmpeg", "-y", "-hwaccel", "cuda", "-hwaccel_output_format", "cuda"]
+        assert cmd.index("-hwaccel") < cmd.index("-i")
+
+    @patch("src.core.get_ffmpeg_path", return_value="ffmpeg")
+    def test_scale_cuda(self, mock_ffmpeg):
+        """NVENC + hw_decode: 缩放使用 scale_cuda。"""
+        cmd = build_encode_command(
+            input_path="input.mp4",
+            output_path="output.mp4",
+            encoder="hevc_nvenc",
+            resolution="1280x720",
+            hw_decode=True,
+        )
+        assert cmd[cmd.index("-vf") + 1] == "scale_cuda=1280:720"
+
+    @patch("src.core.get_ffmpeg_path", return_value="ffmpeg")
+    def test_subtitle_falls_back_to_cpu(self, mock_ffmpeg):
+        """烧录字幕时回退到软件解码和 CPU 缩放。"""
+        cmd = build_encode_command(
+            input_path="input.mp4",
+            output_path="output.mp4",
+            encoder="h264_nvenc",
+            resolution="1280x720",
+            subtitle_path="sub.ass",
+            hw_decode=True,
+        )
+        assert "-hwaccel" not in cmd
+        assert "scale=1280:720" in cmd[cmd.index("-vf") + 1]
+
+    @patch("src.core.get_ffmpeg_path", return_value="ffmpeg")
+    def test_ignored_for_cpu_encoder(self, mock_ffmpeg):
+        """CPU 编码器忽略 hw_decode。"""
+        cmd = build_encode_command(
+            input_path="input.mp4",
+            output_path="output.mp4",
+            encoder="libx264",
+            resolution="1280x720",
+            hw_decode=True,
+        )
+        assert "-hwaccel" not in cmd
+        assert cmd[cmd.index("-vf") + 1] == "scale=1280:720"
+
+    @patch("src.core.get_ffmpeg_path", return_value="ffmpeg")
+    def test_nvenc_preset_enables_cuda(self, mock_ffmpeg):
+        """NVENC 预设同样支持 GPU 全流程。"""
+        cmd = build_encode_command(
+            input_path="input.mp4",
+            output_path="output.mp4",
+            preset_name="【速度优先】NVIDIA 显卡加速",
+            hw_decode=True,
+        )
+        assert "-hwaccel" in cmd
+        assert cmd[cmd.index("-c:v") + 1] == "h264_nvenc"
+
+
+class TestBuildEncodeCommandThreads:
+    """测试线程参数。"""
+
+    @patch("src.core.get_ffmpeg_path", return_value="ffmpeg")
+    def test_cpu_encoder_threads(self, mock_ffmpeg):
+        """CPU 编码器使用自动线程数，CPU 滤镜链按核心数并行。"""
+        cmd = build_encode_command("input.mp4", "output.mp4", encoder="libx264", resolution="1280x720")
+        assert cmd[cmd.index("-threads") + 1] == "0"
+        assert cmd[cmd.index("-filter_threads") + 1] == str(os.cpu_count() or 1)
+        assert cmd.index("-filter_threads") < cmd.index("-i")
+
+    @patch("src.core.get_ffmpeg_path", return_value="ffmpeg")
+    def test_extra_args_threads_respected(self, mock_ffmpeg):
+        """额外参数已指定线程数时不重复添加。"""
+        cmd = build_encode_command(
+            "input.mp4", "output.mp4", encoder="libx265", resolution="1280x720",
+            extra_args="-threads 4 -filter_threads 2",
+        )
+        assert cmd.count("-threads") == 1
+        assert cmd[cmd.index("-threads") + 1] == "4"
+        assert cmd.count("-filter_threads") == 1
+
+    @patch("src.core.get_ffmpeg_path", return_value="ffmpeg")
+    def test_user_thread_limit(self, mock_ffmpeg):
+        """指定线程数时作为编码线程上限，硬件编码器同样生效。"""
+        cmd = build_encode_command("input.mp4", "output.mp4", encoder="libx264", threads=4)
+        assert cmd[cmd.index("-threads") + 1] == "4"
+
+        cmd = build_encode_command("input.mp4", "output.mp4", encoder="h264_nvenc", threads=2)
+        assert cmd[cmd.index("-threads") + 1] == "2"
+
+        cmd = build_encode_command("input.mp4", "output.mp4", encoder="libx264", threads=4, extra_args="-threads 8")
+        assert cmd.count("-threads") == 1
+        assert cmd[cmd.index("-threads") + 1] == "8"
+
+    @patch("src.core.get_ffmpeg_path", return_value="ffmpeg")
+    def test_gpu_pipeline_no_threads(self, mock_ffmpeg):
+        """NVENC GPU 全流程不添加 CPU 线程参数。"""
+        cmd = build_encode_command(
+            "input.mp4", "output.mp4", encoder="h264_nvenc", resolution="1280x720", hw_decode=True,
+        )
+        assert "-threads" not in cmd
+        assert "-filter_threads" not in cmd
+
+    @patch("src.core.get_ffmpeg_path", return_value="ffmpeg")
+    def test_2pass_uses_same_thread_policy(self, mock_ffmpeg, tmp_path):
+        """两遍编码的两条命令都带有相同的线程参数。"""
+        pass1, pass2 = build_2pass_commands(
+            "input.mp4", "output.mp4", encoder="libx264", bitrate="5M",
+            resolution="1280x720", passlog_dir=str(tmp_path),
+        )
+        for cmd in (pass1, pass2):
+            assert cmd[cmd.index("-threads") + 1] == "0"
+            assert cmd.index("-filter_threads") < cmd.index("-i")
+
+
+class TestBuildEncodeCommandExtraArgs:
+    """测试额外参数的拆分。"""
+
+    @patch("src.core.get_ffmpeg_path", return_value="ffmpeg")
+    def test_quoted_value_kept_as_one_argument(self, mock_ffmpeg):
+        """引号内含空格的值保留为单个参数，反斜杠路径保持原样。"""
+        cmd = build_encode_command(
+            "in.mp4", "out.mp4", encoder="libx264",
+            extra_args='-x264-params "keyint=60:bframes=0 ref=3" -attach C:\\fonts\\a.ttf',
+        )
+        index = cmd.index("-x264-params")
+        assert cmd[index + 1] == "keyint=60:bframes=0 ref=3"
+        assert cmd[cmd.index("-attach") + 1] == "C:\\fonts\\a.ttf"
+
+
+class TestBuildEncodeCommandRateControl:
+    """测试按编码器家族查表生成的码率控制参数。"""
+
+    @pytest.mark.parametrize("encoder,rc_mode,expected", [
+        ("h264_nvenc", "vbr", ["-b:v", "5M", "-rc", "vbr", "-maxrate", "5M", "-bufsize", "5M"]),
+        ("h264_amf", "2pass", ["-b:v", "5M", "-rc", "vbr_peak", "-2pass", "1"]),
+        ("libx264", "2pass", ["-b:v", "5M", "-maxrate", "5M", "-bufsize", "5M"]),
+        ("h264_qsv", "cbr", ["-b:v", "5M", "-minrate", "5M", "-maxrate", "5M", "-bufsize", "5M"]),
+        ("libx265", None, ["-b:v", "5M"]),
+    ])
+    @patch("src.core.get_ffmpeg_path", return_value="ffmpeg")
+    def test_bitrate_modes(self, mock_ffmpeg, encoder, rc_mode, expected):
+        """码率模式: 码率 + 编码器专属参数 + 限速参数。"""
+        cmd = build_encode_command("in.mp4", "out.mp4", encoder=encoder, bitrate="5M", rc_mode=rc_mode)
+        index = cmd.index("-b:v")
+        assert cmd[index:index + len(expected)] == expected
+
+    @patch("src.core.get_ffmpeg_path", return_value="ffmpeg")
+    def test_amf_quality_fallback_uses_qp(self, mock_ffmpeg):
+        """AMF 在码率模式缺少码率时回退到 qp_i/qp_p，而不是 AMF 不支持的 -crf。"""
+        cmd = build_encode_command("in.mp4", "out.mp4", encoder="h264_amf", crf=22, rc_mode="vbr")
+        assert "-crf" not in cmd
+        assert cmd[cmd.index("-qp_i"):cmd.index("-qp_i") + 4] == ["-qp_i", "22", "-qp_p", "22"]
+
+
+class TestBuild2PassCommands:
+    """测试两遍编码命令的统计文件路径。"""
+
+    @patch("src.core.get_ffmpeg_path", return_value="ffmpeg")
+    def test_cpu_passlogfile_shared_between_passes(self, mock_ffmpeg):
+        """CPU 编码器两遍使用相同的 -passlogfile 前缀。"""
+        pass1, pass2 = build_2pass_commands(
+            input_path="input.mp4",
+            output_path="output.mp4",
+            encoder="libx264",
+            bitrate="6M",
+        )
+        prefix1 = pass1[pass1.index("-passlogfile") + 1]
+        prefix2 = pass2[pass2.index("-passlogfile") + 1]
+        assert prefix1 == prefix2
+        assert "xiaoxue_2pass_" in prefix1
+
+    @patch("src.core.get_ffmpeg_path", return_value="ffmpeg")
+    def test_pass1_video_only_to_null_muxer(self, mock_ffmpeg):
+        """第一遍丢弃音频/字幕/数据流，输出到 null 封装器。"""
+        pass1, pass2 = build_2pass_commands(
+            "input.mp4", "output.mp4", encoder="libx264", audio_tracks="all",
+        )
+        assert pass1[-6:] == ["-an", "-sn", "-dn", "-f", "null", "-"]
+        assert "-an" not in pass2
+
+    @patch("src.core.get_ffmpeg_path", return_value="ffmpeg")
+    def test_each_job_gets_own_passlogfile(self, mock_ffmpeg):
+        """不同任务生成不同的统计文件前缀，避免并发冲突。"""
+        first, _ = build_2pass_commands("a.mp4", "a_out.mp4", encoder="libx264")
+        second, _ = build_2pass_commands("b.mp4", "b_out.mp4", encoder="libx264")
+        assert first[first.index("-passlogfile") + 1] != second[second.index("-passlogfile") + 1]
+
+    @patch("src.core.get_ffmpeg_path", return_value="ffmpeg")
+    def test_x265_stats_path(self, mock_ffmpeg):
+        """libx265 通过 x265-params 指定统计文件。"""
+        pass1, _ = build_2pass_commands(
+            "input.mp4", "output.mp4", encoder="libx265", passlogfile="/tmp/job",
+        )
+        assert pass1[pass1.index("-x265-params") + 1] == "stats=/tmp/job.x265.log"
+
+    @patch("src.core.get_ffmpeg_path", return_value="ffmpeg")
+    def test_x265_stats_path_windows_drive(self, mock_ffmpeg):
+        """Windows 路径的盘符冒号被转义，不会被 x265-params 当作参数分隔符。"""
+        pass1, pass2 = build_2pass_commands(
+            "input.mp4", "output.mp4", encoder="libx265",
+            passlogfile=r"C:\Users\me\AppData\Local\Temp\xiaoxue_2pass_abc",
+        )
+        expected = r"stats=C\:/Users/me/AppData/Local/Temp/xiaoxue_2pass_abc.x265.log"
+        assert pass1[pass1.index("-x265-params") + 1] == expected
+        assert pass2[pass2.index("-x265-params") + 1] == expected
+
+    @patch("src.core.get_ffmpeg_path", return_value="ffmpeg")
+    def test_x265_params_merged_with_extra_args(self, mock_ffmpeg):
+        """额外参数中的 x265-params 与统计文件合并为一个参数，统计文件在最后。"""
+        pass1, _ = build_2pass_commands(
+            "input.mp4", "output.mp4", encoder="libx265", passlogfile="/tmp/job",
+            extra_args="-x265-params aq-mode=3:stats=other.log -tune grain",
+        )
+        assert pass1.count("-x265-params") == 1
+        assert pass1[pass1.index("-x265-params") + 1] == "aq-mode=3:stats=other.log:stats=/tmp/job.x265.log"
+        assert pass1[pass1.index("-tune") + 1] == "grain"
+
+    @patch("src.core.get_ffmpeg_path", return_value="ffmpeg")
+    def test_passlog_dir(self, mock_ffmpeg, tmp_path):
+        """指定 passlog_dir 时统计文件位于该目录。"""
+        pass1, _ = build_2pass_commands(
+            "input.mp4", "output.mp4", encoder="libx264", passlog_dir=str(tmp_path),
+        )
+        prefix = pass1[pass1.index("-passlogfile") + 1]
+        assert os.path.dirname(prefix) == str(tmp_path)
+
+    @patch("src.core.get_ffmpeg_path", return_value="ffmpeg")
+    def test_nvenc_single_multipass_command(self, mock_ffmpeg):
+        """NVENC 内部多遍编码: 只有一条 -multipass 命令，不使用统计文件。"""
+        pass1, pass2 = build_2pass_commands("input.mp4", "output.mp4", encoder="h264_nvenc")
+        assert pass1 is None
+        assert pass2[pass2.index("-multipass") + 1] == "fullres"
+        assert "-2pass" not in pass2
+        assert "-passlogfile" not in pass2
+
+
+class TestRun2PassEncodeCleanup:
+    """测试两遍编码结束后清理统计文件。"""
+
+    def test_logs_removed_after_encode(self, tmp_path):
+        """编码结束后删除 -passlogfile 前缀下的文件。"""
+        prefix = str(tmp_path / "job")
+        for suffix in ("-0.log", "-0.log.mbtree"):
+            (tmp_path / f"job{suffix}").write_text("stats")
+        unrelated = tmp_path / "other.log"
+        unrelated.write_text("keep")
+
+        pass1 = ["ffmpeg", "-passlogfile", prefix, "-pass", "1"]
+        pass2 = ["ffmpeg", "-passlogfile", prefix, "-pass", "2"]
+        with patch("src.core.run_ffmpeg_command", return_value=0):
+            assert run_2pass_encode(pass1, pass2) == 0
+
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["other.log"]
+
+    def test_logs_removed_when_pass1_fails(self, tmp_path):
+        """第一遍失败时同样清理统计文件。"""
+        prefix = str(tmp_path / "job")
+        (tmp_path / "job-0.log").write_text("stats")
+
+        pass1 = ["ffmpeg", "-passlogfile", prefix, "-pass", "1"]
+        with patch("src.core.run_ffmpeg_command", return_value=1):
+            assert run_2pass_encode(pass1, list(pass1)) == 1
+
+        assert list(tmp_path.iterdir()) == []
+
+    def test_each_pass_banner_printed_once(self, capsys):
+        """每一遍只打印一次阶段标题。"""
+        with patch("src.core.run_ffmpeg_command", return_value=0):
+            run_2pass_encode(["ffmpeg"], ["ffmpeg"])
+
+        out = capsys.readouterr().out
+        assert out.count("[Pass 1/2]") == 1
+        assert out.count("[Pass 2/2]") == 1
+
+    def test_single_command_when_no_pass1(self, capsys):
+        """第一遍命令为 None (NVENC) 时只执行一次。"""
+        with patch("src.core.run_ffmpeg_command", return_value=0) as mock_run:
+            assert run_2pass_encode(None, ["ffmpeg", "-multipass", "fullres"]) == 0
+
+        mock_run.assert_called_once_with(["ffmpeg", "-multipass", "fullres"], dry_run=False)
+        assert "[Pass 1/2]" not in capsys.readouterr().out
+
+
+class TestBuildVideoFilters:
+    """测试视频滤镜链合并。"""
+
+    @patch("src.core.get_ffmpeg_path", return_value="ffmpeg")
+    def test_single_chain_order(self, mock_ffmpeg):
+        """帧率、缩放、字幕合并为一条 -vf，字幕在最后。"""
+        cmd = build_encode_command(
+            input_path="input.mp4",
+            output_path="output.mp4",
+            encoder="libx264",
+            resolution="1280x720",
+            fps=30,
+            subtitle_path="sub.ass",
+        )
+        assert cmd.count("-vf") == 1
+        chain = cmd[cmd.index("-vf") + 1].split(",")
+        assert chain[0] == "fps=30"
+        assert chain[1] == "scale=1280:720"
+        assert chain[2].startswith("subtitles=")
+        assert "-r" not in cmd
+
+    @patch("src.core.get_ffmpeg_path", return_value="ffmpeg")
+    def test_subtitle_path_escaped_without_quotes(self, mock_ffmpeg):
+        """字幕路径按滤镜两级规则转义，不使用外层引号。"""
+        cmd = build_encode_command(
+            "input.mp4", "output.mp4", encoder="libx264",
+            subtitle_path="C:\\字幕 目录\\it's [1],a.ass",
+        )
+        assert cmd[cmd.index("-vf") + 1] == (
+            "subtitles=C\\\\:/字幕 目录/it\\\\\\'s \\[1\\]\\,a.ass"
+        )
+
+    @patch("src.core.get_ffmpeg_path", return_value="ffmpeg")
+    def test_copy_keeps_output_rate(self, mock_ffmpeg):
+        """流复制时不使用滤镜，帧率仍用 -r。"""
+        cmd = build_encode_command(
+            input_path="input.mp4",
+            output_path="output.mp4",
+            encoder="copy",
+            fps=25,
+        )
+        assert "-vf" not in cmd
+        assert cmd[cmd.index("-r") + 1] == "25"
+
+    @patch("src.core.get_ffmpeg_path", return_value="ffmpeg")
+    def test_2pass_uses_same_chain(self, mock_ffmpeg):
+        """两遍编码使用相同的滤镜链。"""
+        pass1, pass2 = build_2pass_commands(
+            "input.mp4", "output.mp4", encoder="libx264", resolution="1280x720", fps=24,
+        )
+        for cmd in (pass1, pass2):
+            assert cmd[cmd.index("-vf") + 1] == "fps=24,scale=1280:720"
+            assert "-r" not in cmd
+
+
+class TestPresetDefaults:
+    """测试预设参数在命令构建中的应用。"""
+
+    @patch("src.core.get_ffmpeg_path", return_value="ffmpeg")
+    def test_nvenc_preset_cq_and_extra_args(self, mock_ffmpeg):
+        """NVENC 预设使用 cq 并追加预设额外参数。"""
+        cmd = build_encode_command(
+            input_path="input.mp4",
+            output_path="output.mp4",
+            preset_name="【速度优先】NVIDIA 显卡加速",
+        )
+        assert cmd[cmd.index("-c:v") + 1] == "h264_nvenc"
+        assert cmd[cmd.index("-cq") + 1] == "23"
+        assert cmd[cmd.index("-preset") + 1] == "p4"
+        assert cmd[cmd.index("-maxrate") + 1] == "20M"
+
+    @patch("src.core.get_ffmpeg_path", return_value="ffmpeg")
+    def test_custom_preset_not_applied(self, mock_ffmpeg):
+        """自定义预设不引入默认参数。"""
+        cmd = build_encode_command(
+            input_path="input.mp4",
+            output_path="output.mp4",
+            preset_name="自定义 (Custom)",
+        )
+        assert cmd[cmd.index("-c:v") + 1] == "libx264"
+        assert "-preset" not in cmd
+
+
+class TestRunFfmpegCommand:
+    """测试命令执行与输出转发 (以 Python 子进程代替 FFmpeg)。"""
+
+    def test_streams_lines_and_returns_code(self):
+        """逐行转发输出并回调进度，返回子进程退出码。"""
+        cmd = [sys.executable, "-c", "import sys; print('line a'); print('line b'); sys.exit(3)"]
+        out = io.StringIO()
+        seen = []
+
+        result = run_ffmpeg_command(cmd, progress_callback=seen.append, output=out)
+
+        assert result == 3
+        assert seen == ["line a\n", "line b\n"]
+        assert "line a\nline b\n" in out.getvalue()
+
+    def test_argument_with_spaces_not_split(self):
+        """参数列表直接传给子进程，含空格和引号的参数保持完整。"""
+        arg = 'my "video" file.mp4'
+        cmd = [sys.executable, "-c", "import sys; print(sys.argv[1])", arg]
+        seen = []
+
+        assert run_ffmpeg_command(cmd, progress_callback=seen.append, output=io.StringIO()) == 0
+        assert seen == [arg + "\n"]
+
+    def test_carriage_return_progress_split_into_lines(self):
+        """回车刷新的进度行与 CRLF 换行均切分为独立的行，末尾不完整的行也会转发。"""
+        script = "import sys; sys.stdout.write('frame=1\\rframe=2\\r\\ndone'); sys.stdout.flush()"
+        seen = []
+
+        assert run_ffmpeg_command([sys.executable, "-c", script], progress_callback=seen.append, output=io.StringIO()) == 0
+        assert seen == ["frame=1\n", "frame=2\n", "done"]
+
+    def test_burst_written_in_few_writes(self):
+        """一次性输出的大量行合并写入，而不是逐行写入。"""
+        script = "import sys; sys.stdout.write(''.join(f'line {i}\\n' for i in range(200)))"
+        writes = []
+
+        class _Recorder:
+            def write(self, text):
+                writes.append(text)
+
+            def flush(self):
+                pass
+
+        assert run_ffmpeg_command([sys.executable, "-c", script], output=_Recorder()) == 0
+
+        log_writes = [w for w in writes if w.startswith("line ")]
+        assert "".join(log_writes).count("line ") == 200
+        assert len(log_writes) < 20
+
+    def test_hardware_error_hint_from_log_tail(self):
+        """失败时根据输出末尾的关键词给出硬件编码器提示 (忽略大小写)。"""
+        script = "import sys; print('x' * 100); print('[h264_nvenc] no nvenc CAPABLE devices found'); sys.exit(1)"
+        out = io.StringIO()
+
+        assert run_ffmpeg_command([sys.executable, "-c", script], output=out) == 1
+        assert "NVIDIA NVENC 编码失败可能的原因" in out.getvalue()
+
+    def test_slow_callback_drops_oldest_lines(self):
+        """回调较慢时不阻塞输出读取，队列满后丢弃最旧的行，最后一行总会送达。"""
+        cmd = [sys.executable, "-c", "for i in range(50): print(f'frame={i}')"]
+        out = io.StringIO()
+        seen = []
+
+        def slow_callback(line):
+            time.sleep(0.01)
+            seen.append(line)
+
+        with patch("src.core.PROGRESS_QUEUE_SIZE", 2):
+            assert run_ffmpeg_command(cmd, progress_callback=slow_callback, output=out) == 0
+
+        assert out.getvalue().count("\nframe=") == 50
+        assert len(seen) < 50
+        assert seen[-1] == "frame=49\n"
+
+    def test_structured_progress_parsed_and_hidden(self):
+        """-progress 输出的 key=value 块解析为字典，且不打印到日志。"""
+        script = (
+            "print('Stream #0:0: Video: h264 cabac=1 ref=3'); "
+            "print('frame=10'); print('out_time_ms=400000'); print('progress=continue'); "
+            "print('frame=20'); print('out_time_ms=800000'); print('progress=end')"
+        )
+        cmd = [sys.executable, "-c", script, *PROGRESS_ARGS]
+        out = io.StringIO()
+        blocks = []
+
+        assert run_ffmpeg_command(cmd, progress_callback=make_progress_parser(blocks.append), output=out) == 0
+
+        assert blocks == [
+            {"frame": "10", "out_time_ms": "400000", "progress": "continue"},
+            {"frame": "20", "out_time_ms": "800000", "progress": "end"},
+        ]
+        log = out.getvalue().split("-" * 50, 1)[1]
+        assert "cabac=1 ref=3" in log
+        assert "out_time_ms" not in log
+
+    def test_hardware_error_runs_fallback_once(self):
+        """检测到硬件编码器错误时执行替代命令，替代命令失败后不再继续回退。"""
+        failing = [sys.executable, "-c", "import sys; print('No NVENC capable devices found'); sys.exit(1)"]
+        ok = [sys.executable, "-c", "print('cpu encode')"]
+        out = io.StringIO()
+        calls = []
+
+        def fallback():
+            calls.append(1)
+            return ok
+
+        assert run_ffmpeg_command(failing, output=out, fallback=fallback) == 0
+        assert calls == [1]
+        assert "[回退]" in out.getvalue()
+
+        calls.clear()
+        assert run_ffmpeg_command(failing, output=io.StringIO(), fallback=lambda: calls.append(1) or failing) == 1
+        assert calls == [1]
+
+    def test_other_errors_do_not_fall_back(self):
+        """非硬件编码器错误不触发回退。"""
+        failing = [sys.executable, "-c", "import sys; print('Invalid data'); sys.exit(1)"]
+        calls = []
+
+        assert run_ffmpeg_command(failing, output=io.StringIO(), fallback=lambda: calls.append(1)) == 1
+        assert calls == []
+
+    @patch("src.core.subprocess.Popen")
+    @patch("src.core.subprocess.run")
+    def test_quiet_waits_without_streaming(self, mock_run, mock_popen):
+        """quiet 模式以 -loglevel error 直接等待进程结束，只打印错误日志。"""
+        mock_run.return_value = subprocess.CompletedProcess(
+            args=[], returncode=1, stderr=b"No NVENC capable devices found\n",
+        )
+        out = io.StringIO()
+
+        result = run_ffmpeg_command(["ffmpeg", "-y", "-i", "in.mp4", "out.mp4"], output=out, quiet=True)
+
+        assert result == 1
+        mock_popen.assert_not_called()
+        cmd = mock_run.call_args[0][0]
+        assert cmd == [
+            "ffmpeg", "-hide_banner", "-nostats", "-loglevel", "error",
+            "-y", "-i", "in.mp4", "out.mp4",
+        ]
+        assert mock_run.call_args[1]["stdout"] is subprocess.DEVNULL
+        assert "No NVENC capable devices found" in out.getvalue()
+        assert "NVIDIA NVENC 编码失败可能的原因" in out.getvalue()
+
+    @patch("src.core.subprocess.run")
+    def test_quiet_ignored_with_progress_callback(self, mock_run):
+        """传入进度回调时 quiet 不生效，仍逐行转发输出。"""
+        cmd = [sys.executable, "-c", "print('frame=1')"]
+        seen = []
+
+        assert run_ffmpeg_command(cmd, progress_callback=seen.append, output=io.StringIO(), quiet=True) == 0
+
+        mock_run.assert_not_called()
+        assert seen == ["frame=1\n"]
+
+
+class TestParseProgress:
+    """测试统计行解析。"""
+
+    def test_all_pairs_in_one_pass(self):
+        """等号后的空格被跳过，值保留原始文本。"""
+        line = "frame=  123 fps= 25 q=28.0 size=    1024KiB time=00:00:05.00 bitrate=1677.7kbits/s speed=1.2x\n"
+        assert parse_progress(line) == {
+            "frame": "123", "fps": "25", "q": "28.0", "size": "1024KiB",
+            "time": "00:00:05.00", "bitrate": "1677.7kbits/s", "speed": "1.2x",
+        }
+
+    def test_non_stats_line(self):
+        """没有 key=value 项的行返回 None。"""
+        assert parse_progress("Stream #0:0: Video: h264\n") is None
+
+
+class TestRunFfmpegBatch:
+    """测试批量并发执行 (以 Python 子进程代替 FFmpeg)。"""
+
+    def test_returns_codes_in_order_and_logs_not_interleaved(self, capsys):
+        """返回码按输入顺序排列，每个任务的日志整体输出。"""
+        cmds = [
+            [sys.executable, "-c", f"import sys; print('job {i} a'); print('job {i} b'); sys.exit({i})"]
+            for i in range(4)
+        ]
+        seen = []
+
+        results = run_ffmpeg_batch(cmds, max_concurrent=3, progress_callback=lambda i, line: seen.append(i))
+
+        assert results == [0, 1, 2, 3]
+        assert sorted(seen) == [0, 0, 1, 1, 2, 2, 3, 3]
+        out = capsys.readouterr().out
+        for i in range(4):
+            assert f"job {i} a\njob {i} b\n" in out
+
+    def test_headers_and_on_result(self, capsys):
+        """自定义任务标题，每个任务完成时回调 (序号, 返回码)。"""
+        cmds = [[sys.executable, "-c", f"import sys; sys.exit({i})"] for i in range(2)]
+        done = []
+
+        run_ffmpeg_batch(
+            cmds, headers=["first", "second"], on_result=lambda i, code: done.append((i, code)),
+        )
+
+        assert sorted(done) == [(0, 0), (1, 1)]
+        out = capsys.readouterr().out
+        assert "\nfirst\n" in out and "\nsecond\n" in out
+
+    @patch("src.core._nvidia_gpu_count", return_value=0)
+    @patch("src.core.ThreadPoolExecutor")
+    def test_nvenc_limited_to_gpu_count(self, mock_pool, mock_gpus):
+        """含 NVENC 的批次在无法检测 GPU 时串行执行。"""
+        mock_pool.return_value.__enter__.return_value.submit.side_effect = RuntimeError("stop")
+        cmds = [["ffmpeg", "-c:v", "h264_nvenc", f"{i}.mp4"] for i in range(3)]
+
+        with pytest.raises(RuntimeError):
+            run_ffmpeg_batch(cmds, max_concurrent=3)
+
+        assert mock_pool.call_args.kwargs["max_workers"] == 1
+
+
+class TestBuildEncodeCommandProgress:
+    """测试结构化进度参数。"""
+
+    @patch("src.core.get_ffmpeg_path", return_value="ffmpeg")
+    def test_progress_args_before_output(self, mock_ffmpeg):
+        """progress=True 时进度参数位于输出路径之前，默认不添加。"""
+        cmd = build_encode_command("in.mp4", "out.mp4", encoder="libx264", progress=True)
+        assert cmd[-len(PROGRESS_ARGS) - 1:] == [*PROGRESS_ARGS, "out.mp4"]
+
+        assert "-progress" not in build_encode_command("in.mp4", "out.mp4", encoder="libx264")
+
+
+class TestBuildMultiOutputCommand:
+    """测试单输入多输出命令。"""
+
+    @patch("src.core.get_ffmpeg_path", return_value="ffmpeg")
+    def test_single_input_shared_by_outputs(self, mock_ffmpeg):
+        """输入只出现一次，各路输出按顺序带各自的码率参数。"""
+        cmd = build_multi_output_command("in.mp4", [
+            OutputSpec("hi.mp4", encoder="libx264", bitrate="8M"),
+            OutputSpec("lo.mp4", encoder="h264_nvenc", crf=28),
+        ])
+
+        assert cmd.count("-i") == 1
+        assert "-filter_complex" not in cmd
+        hi = cmd[cmd.index("-i") + 2:cmd.index("hi.mp4")]
+        lo = cmd[cmd.index("hi.mp4") + 1:cmd.index("lo.mp4")]
+        assert hi[:2] == ["-map", "0:v:0"] and "-b:v" in hi and "-threads" in hi
+        assert lo[:2] == ["-map", "0:v:0"] and ["-cq", "28"] == lo[lo.index("-cq"):lo.index("-cq") + 2]
+        assert cmd[-1] == "lo.mp4"
+
+    @patch("src.core.get_ffmpeg_path", return_value="ffmpeg")
+    def test_resolutions_fork_after_one_decode(self, mock_ffmpeg):
+        """分辨率不同时通过 split 在解码后分叉，未缩放的一路直接映射分支。"""
+        cmd = build_multi_output_command("in.mp4", [
+            OutputSpec("src.mp4"),
+            OutputSpec("720.mp4", resolution="1280x720"),
+            OutputSpec("480.mp4", resolution="854x480"),
+        ])
+
+        graph = cmd[cmd.index("-filter_complex") + 1]
+        assert graph == (
+            "[0:v:0]split=3[s0][s1][s2];[s1]scale=1280:720[v1];[s2]scale=854:480[v2]"
+        )
+        maps = [cmd[i + 1] for i, arg in enumerate(cmd) if arg == "-map" and "a" not in cmd[i + 1]]
+        assert maps == ["[s0]", "[v1]", "[v2]"]
+
+    @patch("src.core.get_ffmpeg_path", return_value="ffmpeg")
+    def test_copy_output_maps_input_directly(self, mock_ffmpeg):
+        """流复制的一路直接映射输入流，不参与 split。"""
+        cmd = build_multi_output_command("in.mp4", [
+            OutputSpec("a.mp4", encoder="copy"),
+            OutputSpec("720.mp4", resolution="1280x720"),
+            OutputSpec("480.mp4", resolution="854x480"),
+        ])
+
+        graph = cmd[cmd.index("-filter_complex") + 1]
+        assert graph == "[0:v:0]split=2[s1][s2];[s1]scale=1280:720[v1];[s2]scale=854:480[v2]"
+        maps = [cmd[i + 1] for i, arg in enumerate(cmd) if arg == "-map" and "a" not in cmd[i + 1]]
+        assert maps == ["0:v:0", "[v1]", "[v2]"]
+
+    @patch("src.core.get_ffmpeg_path", return_value="ffmpeg")
+    def test_copy_plus_single_scaled(self, mock_ffmpeg):
+        """只有一路缩放时不生成 split，流复制仍映射输入流。"""
+        cmd = build_multi_output_command("in.mp4", [
+            OutputSpec("a.mp4", encoder="copy", resolution="1280x720"),
+            OutputSpec("720.mp4", resolution="1280x720"),
+        ])
+
+        assert cmd[cmd.index("-filter_complex") + 1] == "[0:v:0]scale=1280:720[v1]"
+        maps = [cmd[i + 1] for i, arg in enumerate(cmd) if arg == "-map" and "a" not in cmd[i + 1]]
+        assert maps == ["0:v:0", "[v1]"]
+
+    @patch("src.core.get_ffmpeg_path", return_value="ffmpeg")
+    def test_all_copy_has_no_filtergraph(self, mock_ffmpeg):
+        """全部流复制时不生成 -filter_complex。"""
+        cmd = build_multi_output_command("in.mp4", [
+            OutputSpec("a.mkv", encoder="copy", resolution="1280x720"),
+            OutputSpec("b.mp4", encoder="copy"),
+        ])
+
+        assert "-filter_complex" not in cmd
+
+    @patch("src.core.get_ffmpeg_path", return_value="ffmpeg")
+    def test_progress_is_global(self, mock_ffmpeg):
+        """progress=True 时进度参数位于输入之前，只出现一次。"""
+        cmd = build_multi_output_command(
+            "in.mp4", [OutputSpec("a.mp4"), OutputSpec("b.mp4")], progress=True,
+        )
+        assert cmd[2:2 + len(PROGRESS_ARGS)] == PROGRESS_ARGS
+        assert cmd.count("-progress") == 1
+
+    def test_merge_output_commands(self):
+        """输入相同的命令合并为单条多输出命令，输入不同时报错。"""
+        audio = ["ffmpeg", "-y", "-i", "in.mp4", "-vn", "-c:a", "copy", "a.m4a"]
+        video = ["ffmpeg", "-y", "-i", "in.mp4", "-an", "-c:v", "copy", "v.mp4"]
+
+        assert merge_output_commands([audio, video]) == [*audio, "-an", "-c:v", "copy", "v.mp4"]
+        with pytest.raises(ValueError):
+            merge_output_commands([audio, ["ffmpeg", "-y", "-i", "other.mp4", "v.mp4"]])
+
+
+class TestEncoderCapabilities:
+    """测试编码器列表探测与持久化缓存。"""
+
+    ENCODERS_OUTPUT = (
+        "Encoders:\n"
+        " V..... = Video\n"
+        " A..... = Audio\n"
+        " ------\n"
+        " V....D libx264              libx264 H.264 / AVC\n"
+        " V....D h264_nvenc           NVIDIA NVENC H.264 encoder\n"
+        " A....D aac                  AAC (Advanced Audio Coding)\n"
+    )
+
+    def test_probe_once_then_read_cache(self, tmp_path):
+        """首次探测后写入缓存文件，FFmpeg 未变化时直接读取缓存。"""
+        ffmpeg = tmp_path / "ffmpeg"
+        ffmpeg.write_bytes(b"bin")
+        caps_file = tmp_path / "caps.json"
+        completed = subprocess.CompletedProcess(args=[], returncode=0, stdout=self.ENCODERS_OUTPUT, stderr="")
+
+        with patch("src.core.get_ffmpeg_path", return_value=str(ffmpeg)), \
+                patch("src.core.FFMPEG_CAPS_FILE", str(caps_file)), \
+                patch("src.core.subprocess.run", return_value=completed) as mock_run:
+            get_encoder_capabilities.cache_clear()
+            first = get_encoder_capabilities()
+            get_encoder_capabilities.cache_clear()
+            second = get_encoder_capabilities()
+        get_encoder_capabilities.cache_clear()
+
+        assert first == second == {"libx264", "h264_nvenc", "aac"}
+        mock_run.assert_called_once()
+        assert caps_file.exists()
+
+    def test_probe_failure_returns_empty(self, tmp_path):
+        """FFmpeg 无法执行时返回空集合 (未知)，不写缓存。"""
+        with patch("src.core.get_ffmpeg_path", return_value=str(tmp_path / "missing")), \
+                patch("src.core.FFMPEG_CAPS_FILE", str(tmp_path / "caps.json")), \
+                patch("src.core.subprocess.run", side_effect=FileNotFoundError):
+            get_encoder_capabilities.cache_clear()
+            assert get_encoder_capabilities() == frozenset()
+        get_encoder_capabilities.cache_clear()
+        assert not (tmp_path / "caps.json").exists()
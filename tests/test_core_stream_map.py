@@ -232,3 +232,15 @@ class TestBuildRemuxCommandStreamMap:
         )
         assert "0:a:0?" in cmd
         assert "0:s:1?" in cmd
+
+    @patch("src.core.get_ffmpeg_path", return_value="ffmpeg")
+    def test_input_and_output_args(self, mock_ffmpeg):
+        """输入参数位于 -i 之前，输出参数位于输出路径之前。"""
+        cmd = build_remux_command(
+            input_path="input.avi",
+            output_path="output.mp4",
+            input_args=["-fflags", "+genpts"],
+            output_args=["-movflags", "+faststart"],
+        )
+        assert cmd[:5] == ["ffmpeg", "-y", "-fflags", "+genpts", "-i"]
+        assert cmd[-3:] == ["-movflags", "+faststart", "output.mp4"]
@@ -832,3 +832,76 @@ class TestNvencPresetOverride:
         assert params.encoder == "h264_nvenc"
         assert params.speed_preset == "p4"  # 默认 p4
         assert params.is_custom is True
+
+
+class TestPostTransferParams:
+    """压制后分发参数解析测试"""
+    
+    def test_default_no_transfer(self, base_args):
+        """测试默认不分发"""
+        params = resolve_encoder_params(
+            args=base_args,
+            quality_presets=QUALITY_PRESETS,
+            encoders=ENCODERS,
+            audio_encoders=AUDIO_ENCODERS,
+            rate_control_modes=RATE_CONTROL_MODES,
+            generate_output_path_func=generate_output_path,
+        )
+        
+        assert params.post_transfer_mode == "none"
+        assert params.post_transfer_dir == ""
+    
+    def test_transfer_mode_resolved(self, base_args, tmp_path):
+        """测试分发模式名称解析为内部值"""
+        base_args.post_transfer_mode = "移动到指定目录"
+        base_args.post_transfer_dir = str(tmp_path)
+        
+        params = resolve_encoder_params(
+            args=base_args,
+            quality_presets=QUALITY_PRESETS,
+            encoders=ENCODERS,
+            audio_encoders=AUDIO_ENCODERS,
+            rate_control_modes=RATE_CONTROL_MODES,
+            generate_output_path_func=generate_output_path,
+        )
+        
+        assert params.post_transfer_mode == "move"
+        assert params.post_transfer_dir == str(tmp_path)
+
+
+class TestPrintEncodeInfo:
+    """编码信息打印测试"""
+
+    def test_joined_output(self, capsys):
+        """测试合并写出后内容与逐行打印一致"""
+        params = EncodeParams(
+            input_path="/test/input.mp4",
+            output_path="/test/output.mp4",
+            is_custom=True,
+            crf=20,
+            bitrate="8M",
+        )
+
+        print_encode_info(params, QUALITY_PRESETS)
+
+        out = capsys.readouterr().out
+        assert out == "[自定义模式]\n  编码器: libx264\n  CRF: 20\n  视频码率: 8M\n"
+
+    def test_gpu_pipeline_only_in_normal_mode(self, capsys):
+        """测试 GPU 全流程提示只在普通模式显示为已启用"""
+        params = EncodeParams(
+            input_path="/test/input.mp4",
+            output_path="/test/output.mp4",
+            encoder="h264_nvenc",
+            is_custom=True,
+            hw_decode=True,
+        )
+        print_encode_info(params, QUALITY_PRESETS)
+        assert "已启用 CUDA 硬件解码" in capsys.readouterr().out
+
+        params.rc_mode = "2pass"
+        params.bitrate = "8M"
+        print_encode_info(params, QUALITY_PRESETS)
+        out = capsys.readouterr().out
+        assert "已启用 CUDA 硬件解码" not in out
+        assert "当前编码模式不支持" in out
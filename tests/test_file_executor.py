@@ -10,6 +10,7 @@ from unittest.mock import patch, MagicMock
 from dataclasses import dataclass
 from typing import List, Optional
 
+from src.executors.common import remove_files
 from src.executors.file_executor import (
     execute_remux,
     execute_image_convert,
@@ -23,6 +24,7 @@ class MockRemuxArgs:
     remux_output: str = ""
     remux_preset: str = "MP4 (H.264 兼容)"
     remux_overwrite: bool = False
+    remux_threads: int = 0
     
     def __post_init__(self):
         if self.remux_input is None:
@@ -45,6 +47,12 @@ class MockImageConvertArgs:
             self.img_input = []
 
 
+def _fake_ffmpeg_run(cmd, output=None, **kwargs):
+    """模拟 FFmpeg 执行，将日志写入传入的缓冲"""
+    output.write(f"log for {cmd[-1]}\n")
+    return 0
+
+
 class TestExecuteRemux:
     """测试封装转换执行器"""
     
@@ -58,7 +66,7 @@ class TestExecuteRemux:
             files.append(str(video_file))
         return files
     
-    @patch('src.executors.file_executor.run_ffmpeg_command')
+    @patch('src.core.run_ffmpeg_command')
     @patch('src.executors.file_executor.build_remux_command')
     def test_execute_remux_single_file(self, mock_build, mock_run, mock_video_files):
         """测试单文件封装转换"""
@@ -74,7 +82,7 @@ class TestExecuteRemux:
         mock_build.assert_called_once()
         mock_run.assert_called_once()
     
-    @patch('src.executors.file_executor.run_ffmpeg_command')
+    @patch('src.core.run_ffmpeg_command')
     @patch('src.executors.file_executor.build_remux_command')
     def test_execute_remux_batch(self, mock_build, mock_run, mock_video_files):
         """测试批量封装转换"""
@@ -91,7 +99,7 @@ class TestExecuteRemux:
         assert mock_build.call_count == 3
         assert mock_run.call_count == 3
     
-    @patch('src.executors.file_executor.run_ffmpeg_command')
+    @patch('src.core.run_ffmpeg_command')
     @patch('src.executors.file_executor.build_remux_command')
     def test_execute_remux_with_output_dir(self, mock_build, mock_run, mock_video_files, tmp_path):
         """测试指定输出目录"""
@@ -113,7 +121,7 @@ class TestExecuteRemux:
         call_kwargs = mock_build.call_args.kwargs
         assert str(output_dir) in call_kwargs.get("output_path", "")
     
-    @patch('src.executors.file_executor.run_ffmpeg_command')
+    @patch('src.core.run_ffmpeg_command')
     @patch('src.executors.file_executor.build_remux_command')
     def test_execute_remux_string_input(self, mock_build, mock_run, mock_video_files):
         """测试字符串输入（非列表）"""
@@ -128,7 +136,7 @@ class TestExecuteRemux:
         
         mock_build.assert_called_once()
     
-    @patch('src.executors.file_executor.run_ffmpeg_command')
+    @patch('src.core.run_ffmpeg_command')
     @patch('src.executors.file_executor.build_remux_command')
     def test_execute_remux_preset_extension(self, mock_build, mock_run, mock_video_files):
         """测试不同预设使用不同扩展名"""
@@ -154,6 +162,41 @@ class TestExecuteRemux:
             output_path = call_kwargs.get("output_path", "")
             assert output_path.endswith(expected_ext), f"预设 {preset} 应使用扩展名 {expected_ext}"
 
+    @patch('src.core.run_ffmpeg_command', return_value=0)
+    @patch('src.executors.file_executor.build_remux_command')
+    def test_execute_remux_faststart_and_genpts(self, mock_build, mock_run, tmp_path):
+        """测试 MP4 输出开启快速启动，AVI 输入补全时间戳"""
+        avi = tmp_path / "clip.avi"
+        avi.write_text("fake")
+        mock_build.return_value = ["ffmpeg", "-i", str(avi), "output.mp4"]
+
+        args = MockRemuxArgs()
+        args.remux_input = [str(avi)]
+        args.remux_faststart = True
+
+        execute_remux(args)
+
+        call_kwargs = mock_build.call_args.kwargs
+        assert call_kwargs["output_args"] == ["-movflags", "+faststart"]
+        assert call_kwargs["input_args"] == ["-fflags", "+genpts"]
+
+    @patch('src.core.run_ffmpeg_command', return_value=0)
+    @patch('src.executors.file_executor.build_remux_command')
+    def test_execute_remux_faststart_ignored_for_mkv(self, mock_build, mock_run, mock_video_files):
+        """测试 MKV 输出不添加 faststart，MKV 输入不添加 genpts"""
+        mock_build.return_value = ["ffmpeg", "-i", "input.mkv", "output.mkv"]
+
+        args = MockRemuxArgs()
+        args.remux_input = [mock_video_files[0]]
+        args.remux_preset = "MKV (多轨封装)"
+        args.remux_faststart = True
+
+        execute_remux(args)
+
+        call_kwargs = mock_build.call_args.kwargs
+        assert call_kwargs["output_args"] is None
+        assert call_kwargs["input_args"] is None
+
 
 class TestExecuteImageConvert:
     """测试图片转换执行器"""
@@ -272,3 +315,130 @@ class TestExecuteImageConvert:
         mock_convert.assert_called_once()
         call_kwargs = mock_convert.call_args.kwargs
         assert call_kwargs["skip_same_format"] is False
+
+    @patch('src.executors.file_executor.batch_convert_images')
+    def test_overwrite_deletes_converted_only(self, mock_convert, mock_image_files):
+        """测试覆盖模式只删除转换成功的原文件"""
+        def fake_convert(**kwargs):
+            kwargs["converted"].append(mock_image_files[0])
+            return 1, 1, 1, ["test_image_2.bmp: 失败"]
+        mock_convert.side_effect = fake_convert
+
+        args = MockImageConvertArgs()
+        args.img_input = mock_image_files
+        args.img_format = "PNG (无损)"
+        args.img_overwrite = True
+
+        execute_image_convert(args)
+
+        assert not os.path.exists(mock_image_files[0])
+        assert os.path.exists(mock_image_files[1])
+        assert os.path.exists(mock_image_files[2])
+
+
+class TestExecuteRemuxConcurrency:
+    """测试封装转换并发执行"""
+
+    @pytest.fixture
+    def mock_video_files(self, tmp_path):
+        files = []
+        for i in range(4):
+            video_file = tmp_path / f"clip_{i}.mkv"
+            video_file.write_text("fake")
+            files.append(str(video_file))
+        return files
+
+    @patch('src.core.run_ffmpeg_command', side_effect=_fake_ffmpeg_run)
+    def test_logs_not_interleaved(self, mock_run, mock_video_files, capsys):
+        """测试每个任务的日志整体输出"""
+        args = MockRemuxArgs(remux_input=mock_video_files, remux_threads=4)
+
+        execute_remux(args)
+
+        out = capsys.readouterr().out
+        for path in mock_video_files:
+            output_path = os.path.splitext(path)[0] + "_remux.mp4"
+            assert f"[输出] {output_path}\nlog for {output_path}" in out
+        assert "成功 4 个, 失败 0 个" in out
+
+    @patch('src.core.run_ffmpeg_command', side_effect=_fake_ffmpeg_run)
+    def test_batch_runs_quiet(self, mock_run, mock_video_files):
+        """测试批量转封装以静默模式执行 (日志在任务结束后整体输出)"""
+        execute_remux(MockRemuxArgs(remux_input=mock_video_files, remux_threads=2))
+
+        assert all(c.kwargs["quiet"] is True for c in mock_run.call_args_list)
+
+    @patch('src.core.run_ffmpeg_command', side_effect=_fake_ffmpeg_run)
+    def test_same_name_outputs_get_suffix(self, mock_run, tmp_path):
+        """测试不同目录的同名文件输出到同一目录时追加序号"""
+        (tmp_path / "a").mkdir()
+        (tmp_path / "b").mkdir()
+        first = tmp_path / "a" / "clip.mkv"
+        second = tmp_path / "b" / "clip.mkv"
+        first.write_text("fake")
+        second.write_text("fake")
+        out_dir = tmp_path / "out"
+        out_dir.mkdir()
+
+        args = MockRemuxArgs(
+            remux_input=[str(first), str(second)], remux_output=str(out_dir), remux_threads=4,
+        )
+        execute_remux(args)
+
+        outputs = {c.args[0][c.args[0].index("-i") + 1]: c.args[0][-1] for c in mock_run.call_args_list}
+        assert outputs == {
+            str(first): str(out_dir / "clip_remux.mp4"),
+            str(second): str(out_dir / "clip_remux_1.mp4"),
+        }
+
+    @patch('src.core.run_ffmpeg_command', side_effect=_fake_ffmpeg_run)
+    def test_duplicate_inputs_processed_once(self, mock_run, mock_video_files, capsys):
+        """测试重复的输入路径只处理一次"""
+        first = mock_video_files[0]
+        duplicate = os.path.join(os.path.dirname(first), ".", os.path.basename(first))
+        args = MockRemuxArgs(remux_input=[first, duplicate, first], remux_threads=2)
+
+        execute_remux(args)
+
+        assert mock_run.call_count == 1
+        assert "成功 1 个, 失败 0 个" in capsys.readouterr().out
+
+    @patch('src.core.run_ffmpeg_command')
+    def test_overwrite_deletes_each_success(self, mock_run, mock_video_files, capsys):
+        """测试覆盖模式下成功的文件立即删除，失败的保留"""
+        failed = mock_video_files[1]
+
+        def fake_run(cmd, output=None, **kwargs):
+            return 1 if cmd[cmd.index("-i") + 1] == failed else 0
+
+        mock_run.side_effect = fake_run
+        args = MockRemuxArgs(remux_input=mock_video_files, remux_overwrite=True, remux_threads=2)
+
+        execute_remux(args)
+
+        remaining = [p for p in mock_video_files if os.path.exists(p)]
+        assert remaining == [failed]
+        assert "已删除原文件: 3 个" in capsys.readouterr().out
+
+
+class TestRemoveFiles:
+    """测试覆盖模式的并发删除"""
+
+    def test_remove_files_reports_each_path(self, tmp_path):
+        """测试逐个返回删除结果，缺失文件返回异常"""
+        existing = [tmp_path / f"{i}.jpg" for i in range(5)]
+        for p in existing:
+            p.write_bytes(b"x")
+        missing = tmp_path / "missing.jpg"
+        paths = [str(p) for p in existing] + [str(missing)]
+
+        results = remove_files(paths)
+
+        assert [p for p, _ in results] == paths
+        assert all(err is None for _, err in results[:-1])
+        assert isinstance(results[-1][1], FileNotFoundError)
+        assert not any(p.exists() for p in existing)
+
+    def test_remove_files_empty(self):
+        """测试空列表"""
+        assert remove_files([]) == []
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+图片格式转换模块测试用例。
+
+测试 src/image_converter.py 中的批量转换功能。
+"""
+import pytest
+import os
+from unittest.mock import patch
+
+PIL = pytest.importorskip("PIL")
+from PIL import Image
+
+from src.image_converter import batch_convert_images
+
+
+@pytest.fixture
+def image_files(tmp_path):
+    """创建若干测试图片。"""
+    paths = []
+    for i in range(6):
+        path = tmp_path / f"img{i}.png"
+        Image.new("RGBA", (8, 8), (i * 40, 0, 0, 128)).save(path)
+        paths.append(str(path))
+    return paths
+
+
+class TestBatchConvertImages:
+    """测试批量图片转换"""
+
+    def test_convert_all(self, image_files, tmp_path):
+        """测试全部文件转换成功"""
+        out_dir = tmp_path / "out"
+        success, fail, skipped, errors = batch_convert_images(image_files, str(out_dir), ".jpg")
+
+        assert (success, fail, skipped, errors) == (6, 0, 0, [])
+        assert sorted(os.listdir(out_dir)) == [f"img{i}.jpg" for i in range(6)]
+
+    def test_skip_and_fail_counted(self, image_files, tmp_path):
+        """测试同格式跳过与转换失败计数"""
+        broken = tmp_path / "broken.bmp"
+        broken.write_bytes(b"not an image")
+        out_dir = tmp_path / "out"
+
+        success, fail, skipped, errors = batch_convert_images(
+            image_files + [str(broken)], str(out_dir), ".png"
+        )
+
+        assert (success, fail, skipped) == (0, 1, 6)
+        assert errors[0].startswith("broken.bmp:")
+
+    def test_converted_paths_collected(self, image_files, tmp_path):
+        """测试只收集成功转换的输入路径"""
+        broken = tmp_path / "broken.bmp"
+        broken.write_bytes(b"not an image")
+        converted = []
+
+        batch_convert_images(
+            image_files[:2] + [str(broken)], str(tmp_path / "out"), ".jpg", converted=converted
+        )
+
+        assert sorted(converted) == sorted(image_files[:2])
+
+    def test_single_worker(self, image_files, tmp_path):
+        """测试指定单线程时结果一致"""
+        out_dir = tmp_path / "out"
+        success, fail, skipped, _ = batch_convert_images(
+            image_files, str(out_dir), ".webp", max_workers=1
+        )
+
+        assert (success, fail, skipped) == (6, 0, 0)
+        assert len(os.listdir(out_dir)) == 6
+
+    def test_in_place_output_paths(self, image_files):
+        """测试未指定输出目录时输出到原目录，同格式不覆盖原文件"""
+        src_dir = os.path.dirname(image_files[0])
+
+        success, _, _, _ = batch_convert_images(image_files[:1], None, ".jpg")
+        assert success == 1
+        assert os.path.exists(os.path.join(src_dir, "img0.jpg"))
+
+        success, _, _, _ = batch_convert_images(
+            image_files[:1], None, ".png", skip_same_format=False
+        )
+        assert success == 1
+        assert os.path.exists(os.path.join(src_dir, "img0_converted.png"))
+
+    def test_progress_lines_batched(self, image_files, tmp_path):
+        """测试进度行按批合并写入"""
+        class _Recorder:
+            def __init__(self):
+                self.writes = []
+
+            def write(self, text):
+                self.writes.append(text)
+
+            def flush(self):
+                pass
+
+        recorder = _Recorder()
+        with patch('src.image_converter.LOG_FLUSH_LINES', 4), patch('sys.stdout', recorder):
+            batch_convert_images(image_files, str(tmp_path / "out"), ".jpg")
+
+        progress = [w for w in recorder.writes if "->" in w]
+        assert [w.count("->") for w in progress] == [4, 2]
+
+    def test_same_name_outputs_get_suffix(self, tmp_path):
+        """测试不同目录的同名图片输出到同一目录时不互相覆盖"""
+        paths = []
+        for sub in ("a", "b"):
+            (tmp_path / sub).mkdir()
+            path = tmp_path / sub / "img.png"
+            Image.new("RGB", (8, 8)).save(path)
+            paths.append(str(path))
+        out_dir = tmp_path / "out"
+
+        success, _, _, _ = batch_convert_images(paths, str(out_dir), ".jpg")
+
+        assert success == 2
+        assert sorted(os.listdir(out_dir)) == ["img.jpg", "img_1.jpg"]
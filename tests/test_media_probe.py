@@ -8,6 +8,7 @@ import json
 from unittest.mock import patch, MagicMock
 from src.media_probe import (
     probe_detailed,
+    probe_duration,
     format_media_report,
     generate_media_report,
     _parse_detailed_output,
@@ -232,6 +233,31 @@ class TestParseDetailedOutput:
 # 测试格式化函数
 # ============================================================
 
+class TestProbeDuration:
+    """测试仅获取时长的轻量探测"""
+
+    @patch('src.media_probe.get_ffprobe_path', return_value="ffprobe")
+    @patch('src.media_probe.subprocess.run')
+    def test_probe_duration(self, mock_run, mock_ffprobe):
+        """测试只请求 format=duration 并解析"""
+        mock_run.return_value = MagicMock(returncode=0, stdout="123.456\n", stderr="")
+
+        assert probe_duration("video.mp4") == pytest.approx(123.456)
+        cmd = mock_run.call_args[0][0]
+        assert cmd[cmd.index("-show_entries") + 1] == "format=duration"
+        assert "-show_streams" not in cmd
+
+    @patch('src.media_probe.get_ffprobe_path', return_value="ffprobe")
+    @patch('src.media_probe.subprocess.run')
+    def test_probe_duration_failure(self, mock_run, mock_ffprobe):
+        """测试失败或无时长时返回 0"""
+        mock_run.return_value = MagicMock(returncode=0, stdout="N/A\n", stderr="")
+        assert probe_duration("image.png") == 0.0
+
+        mock_run.return_value = MagicMock(returncode=1, stdout="", stderr="error")
+        assert probe_duration("broken.mp4") == 0.0
+
+
 class TestFormatFunctions:
     """测试格式化辅助函数。"""
 
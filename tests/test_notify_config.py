@@ -20,6 +20,7 @@ from src.notify_config import (
     send_auto_notification,
     NOTIFY_CONFIG_FILE,
 )
+from src.notify import _get_http_session, send_feishu_notification, send_webhook_notification
 
 
 class TestNotifyConfigGetAndUpdate:
@@ -105,6 +106,23 @@ class TestNotifyConfigFileOperations:
         assert loaded["feishu_webhook"] == "https://test.webhook.url"
         assert loaded["feishu_title"] == "测试标题"
     
+    def test_save_notify_config_round_trip(self, tmp_path):
+        """测试 save_notify_config 写出缩进的 UTF-8 JSON 并可被重新加载"""
+        config_file = tmp_path / "notify_config.json"
+        original_config = get_notify_config()
+
+        with patch('src.notify_config.NOTIFY_CONFIG_FILE', str(config_file)), \
+             patch('src.notify_config._notify_config_loaded', False), \
+             patch('src.notify_config._notify_config_fingerprint', None):
+            save_notify_config({"feishu_title": "保存测试", "enabled": True})
+            text = config_file.read_text(encoding="utf-8")
+            assert '\n  "feishu_title": "保存测试"' in text
+
+            load_notify_config()
+            assert get_notify_config()["feishu_title"] == "保存测试"
+
+        update_notify_config(original_config)
+
     def test_config_file_path_is_absolute(self):
         """测试配置文件路径是绝对路径"""
         assert os.path.isabs(NOTIFY_CONFIG_FILE)
@@ -114,6 +132,44 @@ class TestNotifyConfigFileOperations:
         assert NOTIFY_CONFIG_FILE.endswith(".json")
 
 
+class TestLoadNotifyConfigFingerprint:
+    """测试配置文件未变化时跳过重复解析"""
+    
+    def test_unchanged_file_is_not_reparsed(self, tmp_path):
+        """测试文件指纹一致时不再解析 JSON"""
+        config_file = tmp_path / "notify_config.json"
+        config_file.write_text(json.dumps({"feishu_title": "指纹测试"}), encoding="utf-8")
+        original_config = get_notify_config()
+        
+        with patch('src.notify_config.NOTIFY_CONFIG_FILE', str(config_file)), \
+             patch('src.notify_config._notify_config_loaded', False), \
+             patch('src.notify_config._notify_config_fingerprint', None):
+            load_notify_config()
+            assert get_notify_config()["feishu_title"] == "指纹测试"
+            
+            with patch('src.notify_config._json_loads') as mock_load:
+                load_notify_config()
+                mock_load.assert_not_called()
+        
+        update_notify_config(original_config)
+    
+    def test_modified_file_is_reparsed(self, tmp_path):
+        """测试文件内容变化后重新解析"""
+        config_file = tmp_path / "notify_config.json"
+        config_file.write_text(json.dumps({"feishu_title": "旧标题"}), encoding="utf-8")
+        original_config = get_notify_config()
+        
+        with patch('src.notify_config.NOTIFY_CONFIG_FILE', str(config_file)), \
+             patch('src.notify_config._notify_config_loaded', False), \
+             patch('src.notify_config._notify_config_fingerprint', None):
+            load_notify_config()
+            config_file.write_text(json.dumps({"feishu_title": "新的标题"}), encoding="utf-8")
+            load_notify_config()
+            assert get_notify_config()["feishu_title"] == "新的标题"
+        
+        update_notify_config(original_config)
+
+
 class TestSendAutoNotification:
     """测试自动通知发送功能"""
     
@@ -195,6 +251,23 @@ class TestSendAutoNotification:
         update_notify_config(original_config)
 
 
+class TestHttpSession:
+    """测试通知请求复用 HTTP 会话"""
+
+    def test_notifications_share_session(self):
+        """测试飞书与 Webhook 通知使用同一会话发送"""
+        session = _get_http_session()
+        assert _get_http_session() is session
+
+        response = MagicMock(status_code=200)
+        response.json.return_value = {"code": 0}
+        with patch.object(session, "post", return_value=response) as mock_post:
+            assert send_feishu_notification("https://example.com/hook", "标题", "内容")
+            assert send_webhook_notification("https://example.com/api")
+
+        assert mock_post.call_count == 2
+
+
 class TestNotifyConfigEdgeCases:
     """测试边界情况"""
     
@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+"""
+素材质量检测模块测试用例。
+
+测试 src/qc.py 中的目录扫描和报告生成功能。
+"""
+import pytest
+import os
+import subprocess
+from fractions import Fraction
+from types import SimpleNamespace
+from unittest.mock import patch, MagicMock
+
+from src.qc import (
+    MediaInfo, scan_directory, generate_report, probe_media, check_compatibility,
+    FFPROBE_ARGS, REPORT_PREVIEW_LINES,
+)
+
+
+def _fake_probe(file_path):
+    """返回固定参数的 MediaInfo，避免依赖 ffprobe。"""
+    info = MediaInfo(path=file_path)
+    info.video_codec = "h264"
+    info.width = 1920
+    info.height = 1080
+    info.bitrate_kbps = 8000
+    return info
+
+
+@pytest.fixture
+def media_dir(tmp_path):
+    """创建包含视频、图片和无关文件的目录结构。"""
+    (tmp_path / "a.mp4").write_bytes(b"fake")
+    (tmp_path / "note.txt").write_text("ignore me", encoding="utf-8")
+    sub = tmp_path / "sub"
+    sub.mkdir()
+    (sub / "b.mkv").write_bytes(b"fake")
+    (sub / "c.png").write_bytes(b"\x89PNG\r\n\x1a\n" + b"\x00" * 8)
+    return tmp_path
+
+
+@patch('src.qc.av', None)
+class TestProbeMedia:
+    """测试单文件探测 (ffprobe)"""
+
+    @patch('src.qc.get_ffprobe_path', return_value="ffprobe")
+    @patch('src.qc.subprocess.run')
+    def test_probe_parses_json(self, mock_run, mock_ffprobe):
+        """测试仅请求所需字段并解析 JSON 输出"""
+        mock_run.return_value = subprocess.CompletedProcess(
+            args=[], returncode=0, stderr="",
+            stdout='{"streams": [{"codec_type": "video", "codec_name": "h264", '
+                   '"width": 1920, "height": 1080, "r_frame_rate": "30/1"}], '
+                   '"format": {"duration": "12.5", "bit_rate": "8000000"}}',
+        )
+
+        info = probe_media("clip.mp4")
+
+        cmd = mock_run.call_args[0][0]
+        assert cmd == ["ffprobe", *FFPROBE_ARGS, "clip.mp4"]
+        assert info.video_codec == "h264"
+        assert (info.width, info.height) == (1920, 1080)
+        assert info.bitrate_kbps == 8000
+        assert info.duration_sec == 12.5
+
+    @patch('src.qc.get_ffprobe_path', return_value="ffprobe")
+    @patch('src.qc.subprocess.run')
+    def test_probe_failure(self, mock_run, mock_ffprobe):
+        """测试 ffprobe 返回错误时标记为无效"""
+        mock_run.return_value = subprocess.CompletedProcess(
+            args=[], returncode=1, stdout="", stderr="Invalid data",
+        )
+
+        info = probe_media("broken.mp4")
+
+        assert info.is_valid is False
+        assert "Invalid data" in info.errors[0]
+
+
+def _fake_av_module(container):
+    """构建最小化的 PyAV 模块替身。"""
+    module = MagicMock()
+    module.time_base = 1000000
+    module.open.return_value.__enter__.return_value = container
+    return module
+
+
+class TestProbeMediaWithAv:
+    """测试 PyAV 进程内探测"""
+
+    def test_av_result_matches_ffprobe_fields(self):
+        """测试 PyAV 结果映射为与 ffprobe 相同的字段"""
+        video = SimpleNamespace(
+            type="video", bit_rate=7000000, base_rate=Fraction(30000, 1001),
+            codec_context=SimpleNamespace(name="h264", width=1920, height=1080),
+        )
+        audio = SimpleNamespace(
+            type="audio", bit_rate=192000, base_rate=None,
+            codec_context=SimpleNamespace(name="aac"),
+        )
+        container = SimpleNamespace(duration=12500000, bit_rate=8000000, streams=[video, audio])
+
+        with patch('src.qc.av', _fake_av_module(container)), \
+                patch('src.qc.subprocess.run') as mock_run:
+            info = probe_media("clip.mp4")
+
+        mock_run.assert_not_called()
+        assert info.video_codec == "h264"
+        assert (info.width, info.height) == (1920, 1080)
+        assert info.fps == 29.97
+        assert info.duration_sec == 12.5
+        assert info.bitrate_kbps == 8000
+        assert info.audio_codec == "aac"
+        assert info.audio_bitrate_kbps == 192
+
+    @patch('src.qc.get_ffprobe_path', return_value="ffprobe")
+    def test_av_failure_falls_back_to_ffprobe(self, mock_ffprobe):
+        """测试 PyAV 打开失败时回退到 ffprobe"""
+        module = MagicMock()
+        module.open.side_effect = OSError("cannot open")
+
+        with patch('src.qc.av', module), patch('src.qc.subprocess.run') as mock_run:
+            mock_run.return_value = subprocess.CompletedProcess(
+                args=[], returncode=1, stdout="", stderr="Invalid data",
+            )
+            info = probe_media("broken.mp4")
+
+        mock_run.assert_called_once()
+        assert info.is_valid is False
+
+
+class TestScanDirectory:
+    """测试目录扫描"""
+
+    @patch('src.qc.probe_media', side_effect=_fake_probe)
+    def test_scan_collects_media_files_only(self, mock_probe, media_dir):
+        """测试只扫描媒体文件"""
+        results = scan_directory(str(media_dir))
+
+        names = sorted(r.filename for r in results)
+        assert names == ["a.mp4", "b.mkv", "c.png"]
+        assert mock_probe.call_count == 3
+
+    @patch('src.qc.probe_media', side_effect=_fake_probe)
+    def test_scan_applies_thresholds(self, mock_probe, media_dir):
+        """测试探测结果会经过阈值检查"""
+        results = scan_directory(str(media_dir), max_bitrate_kbps=4000)
+
+        for info in results:
+            assert any("超过最大阈值" in w for w in info.warnings)
+
+    @patch('src.qc.probe_media', side_effect=_fake_probe)
+    def test_scan_nested_and_uppercase(self, mock_probe, tmp_path):
+        """测试多层子目录与大写扩展名"""
+        deep = tmp_path / "x" / "y" / "z"
+        deep.mkdir(parents=True)
+        (deep / "D.MOV").write_bytes(b"fake")
+        (tmp_path / "x" / "e.webm").write_bytes(b"fake")
+        (tmp_path / "x" / "y" / "skip.doc").write_bytes(b"fake")
+
+        results = scan_directory(str(tmp_path))
+
+        assert sorted(r.filename for r in results) == ["D.MOV", "e.webm"]
+
+    @patch('src.qc.probe_media', side_effect=_fake_probe)
+    def test_scan_empty_directory(self, mock_probe, tmp_path):
+        """测试空目录"""
+        assert scan_directory(str(tmp_path)) == []
+        mock_probe.assert_not_called()
+
+
+class TestCheckThresholds:
+    """测试码率/分辨率阈值检查"""
+
+    def test_resolution_thresholds(self):
+        """测试最大/最小分辨率阈值"""
+        info = check_compatibility(
+            _fake_probe("a.mp4"), max_resolution="1280x720", min_resolution="3840x2160",
+            check_pr_video=False, check_pr_image=False,
+        )
+        assert info.warnings == [
+            "分辨率 1920x1080 超过最大阈值 1280x720",
+            "分辨率 1920x1080 低于最小阈值 3840x2160",
+        ]
+
+    def test_invalid_resolution_ignored(self):
+        """测试格式无效的分辨率阈值被忽略"""
+        info = check_compatibility(
+            _fake_probe("a.mp4"), max_resolution="abc", min_resolution="1x2x3",
+            check_pr_video=False, check_pr_image=False,
+        )
+        assert info.warnings == []
+
+
+class TestGenerateReport:
+    """测试报告生成"""
+
+    def test_report_written_to_file(self, tmp_path):
+        """测试报告内容写入文件并返回"""
+        ok = _fake_probe(str(tmp_path / "ok.mp4"))
+        bad = _fake_probe(str(tmp_path / "bad.mkv"))
+        bad.warnings.append("测试警告")
+        report_path = tmp_path / "report.txt"
+
+        content = generate_report([ok, bad], str(report_path))
+
+        assert report_path.read_text(encoding="utf-8") == content + "\n"
+        assert "总计扫描: 2 个文件" in content
+        assert "[⚠] bad.mkv" in content
+        assert "[警告] 测试警告" in content
+
+    def test_report_summary_counts(self, tmp_path):
+        """测试通过/警告/错误计数"""
+        ok = _fake_probe(str(tmp_path / "ok.mp4"))
+        warn = _fake_probe(str(tmp_path / "warn.mp4"))
+        warn.warnings.append("w")
+        err = _fake_probe(str(tmp_path / "err.mp4"))
+        err.errors.append("e")
+        both = _fake_probe(str(tmp_path / "both.mp4"))
+        both.errors.append("e")
+        both.warnings.append("w")
+
+        content = generate_report([ok, warn, err, both], str(tmp_path / "r.txt"))
+
+        assert "  ✓ 通过: 1" in content
+        assert "  ⚠ 警告: 2" in content
+        assert "  ✗ 错误: 2" in content
+
+    def test_report_preview_truncated(self, tmp_path):
+        """测试大量文件时只返回预览，完整内容写入文件"""
+        results = [_fake_probe(str(tmp_path / f"{i}.mp4")) for i in range(100)]
+        report_path = tmp_path / "report.txt"
+
+        preview = generate_report(results, str(report_path))
+
+        full = report_path.read_text(encoding="utf-8")
+        assert "99.mp4" in full
+        assert "99.mp4" not in preview
+        assert len(preview.split("\n")) < len(full.split("\n"))
+        assert "预览已截断" in preview
+        assert full.startswith("\n".join(preview.split("\n")[:REPORT_PREVIEW_LINES // 2]))
@@ -40,6 +40,11 @@ class TestParseCommaList:
         result = parse_comma_list("")
         assert result == set()
     
+    def test_parse_returns_frozenset(self):
+        """测试返回不可变集合"""
+        assert isinstance(parse_comma_list("mkv,webm"), frozenset)
+        assert isinstance(parse_comma_list(""), frozenset)
+    
     def test_parse_whitespace_only(self):
         """测试仅空白字符"""
         result = parse_comma_list("   ")
@@ -80,6 +85,10 @@ class TestParseCommaList:
         result = parse_comma_list("mkv,,webm,,,flv")
         assert result == {"mkv", "webm", "flv"}
 
+    def test_parse_cached(self):
+        """测试相同参数直接复用缓存结果"""
+        assert parse_comma_list("mkv,webm", prefix=".") is parse_comma_list("mkv,webm", prefix=".")
+
 
 class TestExecuteQC:
     """测试素材质量检测执行器"""
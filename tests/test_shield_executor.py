@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+"""
+Shield 执行器模块测试用例。
+
+测试 src/executors/shield_executor.py 中的可用性检查。
+"""
+import sys
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from src.executors.shield_executor import execute_shield
+
+
+class TestExecuteShieldAvailability:
+    """测试 Shield 依赖可用性检查"""
+
+    @patch('src.executors.shield_executor.SHIELD_AVAILABLE', False)
+    def test_not_installed(self, capsys):
+        """测试未安装 imgutils 时提示不可用"""
+        execute_shield(SimpleNamespace())
+
+        assert "Shield 功能不可用" in capsys.readouterr().out
+
+    @patch('src.executors.shield_executor.SHIELD_AVAILABLE', True)
+    def test_broken_dependency_reported(self, capsys):
+        """测试 imgutils 已安装但导入失败时提示不可用，而不是抛出异常"""
+        with patch.dict(sys.modules, {"imgutils": None, "imgutils.validate": None}):
+            execute_shield(SimpleNamespace(shield_input_dir="x"))
+
+        assert "依赖加载失败" in capsys.readouterr().out
@@ -15,6 +15,7 @@ from src.executors.video_executor import (
     execute_encode,
     execute_replace_audio,
     execute_extract_av,
+    _warn_if_encoder_missing,
 )
 from src.executors.common import print_task_header
 
@@ -75,6 +76,17 @@ class TestPrintTaskHeader:
         assert "测试任务" in captured.out
         assert "=" in captured.out  # 包含分隔线
 
+    def test_print_task_header_repeated(self, capsys):
+        """测试重复打印同一标题输出一致"""
+        print_task_header("测试任务")
+        first = capsys.readouterr().out
+        print_task_header("测试任务")
+        second = capsys.readouterr().out
+
+        assert first == second
+        assert first.startswith("\n" + "=" * 50 + "\n")
+        assert first.endswith("=" * 50 + "\n\n")
+
 
 class TestExecuteEncode:
     """测试视频压制执行器"""
@@ -124,6 +136,103 @@ class TestExecuteEncode:
         
         assert result == 0 or mock_build.called
     
+    @patch('src.executors.video_executor._warn_if_encoder_missing')
+    @patch('src.executors.video_executor.run_ffmpeg_command', return_value=0)
+    @patch('src.core.get_ffmpeg_path', return_value="ffmpeg")
+    def test_auto_fallback_builds_x264_command(self, mock_ffmpeg, mock_run, mock_warn, mock_video_file):
+        """开启自动回退时，为硬件编码器提供改用 libx264 的替代命令"""
+        args = MockArgs()
+        args.input = mock_video_file
+        args.preset = "自定义 (Custom)"
+        args.encoder = "H.264 (NVIDIA NVENC)"
+        args.auto_fallback = True
+        args.debug_mode = False
+
+        execute_encode(args)
+
+        fallback = mock_run.call_args.kwargs["fallback"]
+        cmd = fallback()
+        assert cmd[cmd.index("-c:v") + 1] == "libx264"
+        assert cmd[cmd.index("-preset") + 1] == "medium"
+
+    @patch('src.executors.video_executor._warn_if_encoder_missing')
+    @patch('src.executors.video_executor.run_ffmpeg_command', return_value=0)
+    @patch('src.core.get_ffmpeg_path', return_value="ffmpeg")
+    def test_preset_fallback_drops_nvenc_args(self, mock_ffmpeg, mock_run, mock_warn, mock_video_file):
+        """NVENC 预设的替代命令不带预设中的 -rc/-b:v 0，质量值沿用预设 CQ"""
+        args = MockArgs()
+        args.input = mock_video_file
+        args.preset = "【速度优先】NVIDIA 显卡加速"
+        args.auto_fallback = True
+        args.debug_mode = False
+
+        execute_encode(args)
+
+        assert "-rc" in mock_run.call_args[0][0]
+        cmd = mock_run.call_args.kwargs["fallback"]()
+        assert cmd[cmd.index("-c:v") + 1] == "libx264"
+        assert "-rc" not in cmd
+        assert "-b:v" not in cmd
+        assert cmd[cmd.index("-crf") + 1] == "23"
+        assert cmd[cmd.index("-preset") + 1] == "medium"
+        assert cmd[cmd.index("-b:a") + 1] == "192k"
+
+    @patch('src.executors.video_executor.run_ffmpeg_command', return_value=0)
+    @patch('src.core.get_ffmpeg_path', return_value="ffmpeg")
+    def test_encode_threads_passed(self, mock_ffmpeg, mock_run, mock_video_file):
+        """界面设置的编码线程数写入命令"""
+        args = MockArgs()
+        args.input = mock_video_file
+        args.encode_threads = 6
+
+        execute_encode(args)
+
+        cmd = mock_run.call_args[0][0]
+        assert cmd[cmd.index("-threads") + 1] == "6"
+
+    @patch('src.executors.video_executor.run_ffmpeg_command', return_value=0)
+    @patch('src.core.get_ffmpeg_path', return_value="ffmpeg")
+    def test_structured_progress_with_callback(self, mock_ffmpeg, mock_run, mock_video_file):
+        """界面提供进度回调时命令带 -progress，进度块按 key=value 解析后回调"""
+        blocks = []
+        args = MockArgs()
+        args.input = mock_video_file
+        args.progress_callback = blocks.append
+
+        execute_encode(args)
+
+        cmd = mock_run.call_args[0][0]
+        assert "-progress" in cmd
+        on_line = mock_run.call_args.kwargs["progress_callback"]
+        for line in ("frame=10\n", "out_time_us=2000000\n", "progress=continue\n"):
+            on_line(line)
+        assert blocks == [{"frame": "10", "out_time_us": "2000000", "progress": "continue"}]
+
+    @patch('src.executors.video_executor.run_ffmpeg_command', return_value=0)
+    @patch('src.core.get_ffmpeg_path', return_value="ffmpeg")
+    def test_no_progress_args_without_callback(self, mock_ffmpeg, mock_run, mock_video_file):
+        """命令行模式 (无进度回调) 保持原有的统计行输出"""
+        args = MockArgs()
+        args.input = mock_video_file
+
+        execute_encode(args)
+
+        assert "-progress" not in mock_run.call_args[0][0]
+        assert mock_run.call_args.kwargs["progress_callback"] is None
+
+    @patch('src.executors.video_executor.run_ffmpeg_command', return_value=0)
+    @patch('src.core.get_ffmpeg_path', return_value="ffmpeg")
+    def test_no_fallback_by_default(self, mock_ffmpeg, mock_run, mock_video_file):
+        """未开启自动回退时不提供替代命令"""
+        args = MockArgs()
+        args.input = mock_video_file
+        args.preset = "自定义 (Custom)"
+        args.encoder = "H.264 (NVIDIA NVENC)"
+
+        execute_encode(args)
+
+        assert mock_run.call_args.kwargs["fallback"] is None
+
     def test_execute_encode_missing_input(self):
         """测试输入文件不存在时的错误处理"""
         args = MockArgs()
@@ -137,6 +246,35 @@ class TestExecuteEncode:
         assert result == 1
 
 
+class TestWarnIfEncoderMissing:
+    """测试编码器缺失提示"""
+
+    @patch('src.executors.video_executor.threading.Thread')
+    @patch('src.executors.video_executor.get_encoder_capabilities')
+    def test_cached_capabilities_checked_inline(self, mock_caps, mock_thread, capsys):
+        """编码器列表已缓存时直接检查，不启动后台线程"""
+        mock_caps.cache_info.return_value.currsize = 1
+        mock_caps.return_value = frozenset({"libx264"})
+
+        _warn_if_encoder_missing(["ffmpeg", "-c:v", "hevc_nvenc", "out.mp4"])
+
+        mock_thread.assert_not_called()
+        assert "hevc_nvenc" in capsys.readouterr().out
+
+    @patch('src.executors.video_executor.threading.Thread')
+    @patch('src.executors.video_executor.get_encoder_capabilities')
+    def test_uncached_probe_runs_in_background(self, mock_caps, mock_thread):
+        """编码器列表未缓存时在后台线程探测，不阻塞压制启动"""
+        mock_caps.cache_info.return_value.currsize = 0
+
+        _warn_if_encoder_missing(["ffmpeg", "-c:v", "libx264", "out.mp4"])
+
+        mock_caps.assert_not_called()
+        mock_thread.assert_called_once()
+        assert mock_thread.call_args.kwargs["daemon"] is True
+        mock_thread.return_value.start.assert_called_once()
+
+
 class TestExecuteReplaceAudio:
     """测试音频替换执行器"""
     
@@ -325,5 +463,8 @@ class TestExecuteExtractAV:
         # 两个命令都应被调用
         mock_build_audio.assert_called_once()
         mock_build_video.assert_called_once()
-        # run_ffmpeg_command 应被调用两次 (音频一次，视频一次)
-        assert mock_run.call_count == 2
+        # 合并为单条多输出命令，只启动一次 FFmpeg
+        mock_run.assert_called_once()
+        assert mock_run.call_args[0][0] == [
+            "ffmpeg", "-i", mock_video_file, "output.m4a", "-an", "-c:v", "copy", "output.mp4",
+        ]